@@ -0,0 +1,94 @@
+"""
+設定の既定値と読み込み・保存
+GUI・CLIで同じ設定ファイル（config.json）を使う
+"""
+
+import json
+import logging
+from pathlib import Path
+
+
+def default_config():
+    """設定の既定値"""
+    return {
+        "cooltime_min": 2.0,
+        "cooltime_max": 4.0,
+        "ua_switch_interval": 15,
+        "retry_delay": 5.0,
+        "captcha_delay": 30.0,
+        "ip_limit_delay": 60.0,
+        "server_error_delay": 10.0,
+        "max_blocked_retries": 3,
+        "max_backoff_delay": 600.0,
+        "adaptive_rate": True,
+        "rate_increase_step": 0.01,
+        "rate_decrease_factor": 0.5,
+        "rate_error_decrease_factor": 0.8,
+        "slow_response_seconds": 5.0,
+        "site_base_url": "https://r.gnavi.co.jp",
+        "detail_fetch_mode": "http",
+        "listing_fetch_mode": "http",
+        "listing_concurrency": 3,
+        "listing_per_page": 30,
+        "area_sharding": False,
+        "shard_concurrency": 2,
+        "shard_catch_all": True,
+        "engine_mode": "sequential",
+        "streaming_mode": False,
+        "async_concurrency": 4,
+        "parse_workers": 0,
+        "page_archive_enabled": False,
+        "page_archive_path": "page_archive",
+        "page_archive_compression": "zstd",
+        "driver_pool_size": 3,
+        "driver_pool_memory_ceiling": 85.0,
+        "store_cache_enabled": True,
+        "store_cache_ttl_hours": 72,
+        "diff_mode": False,
+        "last_save_path": str(Path.home() / "Downloads"),
+        "user_agents": [
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+        ],
+        "time_zone_aware": {
+            "peak_hours": {"start": 12, "end": 13, "multiplier": 1.5},
+            "evening_hours": {"start": 18, "end": 20, "multiplier": 1.3},
+            "safe_hours": {"start": 23, "end": 6, "multiplier": 0.8}
+        }
+    }
+
+
+def load_config(config_file, logger=None):
+    """
+    設定ファイルを読み込み、既定値に上書きして返す
+
+    Args:
+        config_file (Path or str): 設定ファイル（存在しなければ既定値のみ）
+
+    Returns:
+        dict: 設定
+    """
+    logger = logger or logging.getLogger(__name__)
+    config = default_config()
+    config_file = Path(config_file)
+
+    try:
+        if config_file.exists():
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config.update(json.load(f))
+    except Exception as e:
+        logger.error(f"設定読み込みエラー: {e}")
+
+    return config
+
+
+def save_config(config_file, config, logger=None):
+    """設定をファイルに保存"""
+    logger = logger or logging.getLogger(__name__)
+    try:
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+        logger.info("設定保存完了")
+    except Exception as e:
+        logger.error(f"設定保存エラー: {e}")
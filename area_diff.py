@@ -0,0 +1,236 @@
+"""
+エリア差分モード
+前回実行時の店舗一覧と比較し、新規・変更された店舗だけを詳細取得の対象にする
+（変更は一覧ページの店舗カードの内容のハッシュで判定）
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse, urljoin
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+from store_url_classifier import is_store_url
+
+DELTA_ADDED = '追加'
+DELTA_CHANGED = '変更'
+DELTA_REMOVED = '削除'
+DELTA_UNCHANGED = '変更なし'
+
+# ファイル名に使えない文字
+UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\s]')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# カードの探索をここで打ち切る（ページ全体をカードとして扱わない）
+CARD_BOUNDARY_TAGS = {'body', 'html', 'main'}
+
+
+def store_key(url):
+    """店舗一覧の比較キー（クエリ・末尾のパスを除いたベースURL）"""
+    parsed = urlparse(url)
+    store_id = parsed.path.strip('/').split('/')[0]
+    return f"{parsed.netloc.lower()}/{store_id}"
+
+
+def listing_card_fingerprints(html_text, page_url, url_filter=is_store_url):
+    """
+    一覧ページの店舗カードごとの内容ハッシュ
+
+    店舗リンクから親要素をたどり、他の店舗へのリンクを含まない最も外側の要素を
+    その店舗のカードとみなす（店舗名・ジャンル・予算などカードの表示内容が変われば値が変わる）
+
+    Args:
+        html_text (str): 一覧ページのHTML（ブラウザのpage_sourceも可）
+        page_url (str): 相対リンクの基準URL
+
+    Returns:
+        dict: {比較キー: ハッシュ}（lxmlが無い・解析失敗時は空）
+    """
+    if not LXML_AVAILABLE or not html_text:
+        return {}
+    try:
+        doc = lxml_html.fromstring(html_text)
+    except Exception:
+        return {}
+
+    anchors = {}
+    for anchor in doc.iter('a'):
+        href = anchor.get('href')
+        if not href:
+            continue
+        url = urljoin(page_url, href.strip())
+        if url_filter(url):
+            anchors[anchor] = store_key(url)
+
+    def keys_in(element):
+        return {anchors[a] for a in element.iter('a') if a in anchors}
+
+    fingerprints = {}
+    for anchor, key in anchors.items():
+        if key in fingerprints:
+            continue
+        card = anchor
+        parent = card.getparent()
+        while parent is not None and parent.tag not in CARD_BOUNDARY_TAGS and keys_in(parent) == {key}:
+            card = parent
+            parent = card.getparent()
+        text = WHITESPACE_RE.sub(' ', card.text_content()).strip()
+        fingerprints[key] = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+    return fingerprints
+
+
+class AreaDelta:
+    """前回との差分"""
+
+    def __init__(self, added, changed, removed, unchanged, previous_run=None):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.unchanged = unchanged
+        self.previous_run = previous_run
+
+    @property
+    def targets(self):
+        """詳細取得が必要な店舗（新規 + 変更）"""
+        return self.added + self.changed
+
+    def summary(self):
+        return (
+            f"追加 {len(self.added)}件 / 変更 {len(self.changed)}件 / "
+            f"削除 {len(self.removed)}件 / 変更なし {len(self.unchanged)}件"
+        )
+
+    def to_rows(self):
+        """差分シート用の行"""
+        rows = []
+        for label, stores in (
+            (DELTA_ADDED, self.added),
+            (DELTA_CHANGED, self.changed),
+            (DELTA_REMOVED, self.removed),
+            (DELTA_UNCHANGED, self.unchanged)
+        ):
+            for store in stores:
+                rows.append({'区分': label, 'URL': store['url'], '店舗名': store['name']})
+        return rows
+
+
+def _card_changed(old_fingerprint, new_fingerprint):
+    """カードの内容が変わったか（どちらかが未取得の場合は比較しない）"""
+    return bool(old_fingerprint and new_fingerprint and old_fingerprint != new_fingerprint)
+
+
+class AreaSnapshotStore:
+    """(都道府県, 市区町村) ごとの店舗一覧スナップショット管理クラス"""
+
+    def __init__(self, snapshot_dir, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.snapshot_dir = Path(snapshot_dir)
+
+    def snapshot_path(self, prefecture, city):
+        area = f"{prefecture}_{city}" if city else f"{prefecture}_全域"
+        return self.snapshot_dir / f"{UNSAFE_FILENAME_RE.sub('_', area)}.json"
+
+    def load(self, prefecture, city):
+        """
+        前回のスナップショットを読み込み
+
+        Returns:
+            dict: {'saved_at': ..., 'stores': {比較キー: {'url':..., 'name':..., 'fingerprint':...}}}（無い場合はNone）
+        """
+        path = self.snapshot_path(prefecture, city)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"スナップショット読み込みエラー: {path} - {e}")
+            return None
+
+    def diff(self, prefecture, city, store_list, complete=True):
+        """
+        今回の店舗一覧を前回と比較
+
+        Args:
+            complete (bool): エリアの全店舗を取得した一覧か（件数上限で打ち切った一覧では、
+                上限より後ろの店舗が含まれないため削除を判定しない）
+
+        Returns:
+            AreaDelta: 差分（前回が無い場合は全件が追加）
+        """
+        snapshot = self.load(prefecture, city)
+        previous = snapshot['stores'] if snapshot else {}
+
+        added, changed, unchanged = [], [], []
+        seen = set()
+        for store in store_list:
+            key = store_key(store['url'])
+            if key in seen:
+                continue
+            seen.add(key)
+
+            old = previous.get(key)
+            if old is None:
+                added.append(store)
+            elif _card_changed(old.get('fingerprint'), store.get('fingerprint')):
+                changed.append(store)
+            else:
+                unchanged.append(store)
+
+        removed = [
+            {'url': old['url'], 'name': old.get('name', '')}
+            for key, old in previous.items() if key not in seen
+        ] if complete else []
+
+        return AreaDelta(added, changed, removed, unchanged, snapshot.get('saved_at') if snapshot else None)
+
+    def save(self, prefecture, city, store_list, complete=True, exclude=()):
+        """
+        今回の店舗一覧を次回の比較用に保存
+
+        Args:
+            complete (bool): エリアの全店舗を取得した一覧か（Falseなら前回のスナップショットに追記・更新する）
+            exclude (set): 詳細取得に失敗した店舗の比較キー（前回の内容のまま残し、次回も取得対象にする）
+        """
+        path = self.snapshot_path(prefecture, city)
+        snapshot = self.load(prefecture, city) if (exclude or not complete) else None
+        previous = snapshot['stores'] if snapshot else {}
+
+        stores = {} if complete else dict(previous)
+        for store in store_list:
+            key = store_key(store['url'])
+            if key in exclude:
+                if key in previous:
+                    stores[key] = previous[key]
+                continue
+            stores[key] = {'url': store['url'], 'name': store['name'], 'fingerprint': store.get('fingerprint')}
+
+        state = {
+            'prefecture': prefecture,
+            'city': city,
+            'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'stores': stores
+        }
+
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.logger.info(
+                f"店舗一覧スナップショット保存: {path.name} ({len(stores)}件"
+                + (f", 取得失敗 {len(exclude)}件は次回再取得" if exclude else "") + ")"
+            )
+        except Exception as e:
+            self.logger.warning(f"スナップショット保存エラー: {e}")
@@ -0,0 +1,200 @@
+"""
+エリア分割による店舗一覧取得
+都道府県（または全国）の検索をおすすめエリア単位に分割し、
+エリアごとに独立して一覧を取得したうえで店舗の重複を除いて統合する
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class AreaShard:
+    """一覧取得の単位（おすすめエリア、またはエリア外の店舗を拾う都道府県全体）"""
+
+    def __init__(self, prefecture, city='', area_code=None):
+        self.prefecture = prefecture
+        self.city = city
+        self.area_code = area_code
+
+    @property
+    def catch_all(self):
+        return not self.city
+
+    @property
+    def label(self):
+        return f"{self.prefecture} {self.city}" if self.city else f"{self.prefecture}（エリア外）"
+
+    def __repr__(self):
+        return f"AreaShard({self.label}, {self.area_code})"
+
+
+def plan_area_shards(prefecture_mapper, prefecture, catch_all=True):
+    """
+    都道府県・全国をエリア単位に分割
+
+    Args:
+        prefecture_mapper (PrefectureMapper): エリア情報
+        prefecture (str): 都道府県名または「全国」
+        catch_all (bool): おすすめエリアに含まれない店舗を拾うため、都道府県全体の一覧も加える
+
+    Returns:
+        list: AreaShard のリスト（同じエリアコードは1回のみ）
+    """
+    if prefecture == '全国':
+        prefectures = [name for name in prefecture_mapper.get_prefectures() if name != '全国']
+    else:
+        prefectures = [prefecture]
+
+    shards = []
+    seen_codes = set()
+    for name in prefectures:
+        areas = prefecture_mapper.prefecture_areas.get(name, {})
+        if not isinstance(areas, dict):
+            areas = {}
+        for city, area_code in areas.items():
+            if area_code in seen_codes:
+                continue
+            seen_codes.add(area_code)
+            shards.append(AreaShard(name, city, area_code))
+        # おすすめエリアが無い都道府県は全体の一覧のみ
+        if catch_all or not areas:
+            shards.append(AreaShard(name, '', prefecture_mapper.prefecture_codes.get(name)))
+    return shards
+
+
+class ShardedListingCollector:
+    """エリアごとの一覧取得を並行実行し、店舗の重複を除いて統合するクラス"""
+
+    def __init__(self, fetch_shard, shards, concurrency=2, callback=None, logger=None):
+        """
+        Args:
+            fetch_shard (callable): fetch_shard(エリア, 取得件数, 無制限) -> 店舗一覧
+                （全エリアで1つのエンジンのアクセス間隔・応答判定を共有する）
+            shards (list): plan_area_shards() の結果
+            concurrency (int): 同時に取得するエリア数
+            callback (callable): 進捗コールバック（エンジンと同じ形式）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.fetch_shard = fetch_shard
+        self.shards = shards
+        self.concurrency = max(1, int(concurrency))
+        self.callback = callback
+        self.stop_requested = False
+
+        self.store_list = []
+        self.shard_counts = {}
+        self.duplicates = 0
+        # 取得した店舗は store_list にすべて保持するため、誤判定のある Bloom フィルタではなく完全な集合で重複を判定
+        self._seen = set()
+        self._limit = float('inf')
+        self._lock = threading.Lock()
+
+    def collect(self, max_count, unlimited, on_store=None):
+        """
+        全エリアの店舗一覧を取得
+
+        Args:
+            max_count (int): 全エリア合計の取得件数
+            unlimited (bool): 件数無制限
+            on_store (callable): on_store(店舗) を新しい店舗が見つかるたびに呼び出す
+
+        Returns:
+            list: 重複を除いた店舗一覧
+        """
+        pending = list(self.shards)
+        completed = 0
+        self._limit = float('inf') if unlimited else max_count
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            running = {}
+            while (pending or running) and not self.stop_requested:
+                while pending and len(running) < self.concurrency and not self._reached(max_count, unlimited):
+                    shard = pending.pop(0)
+                    remaining = max_count - len(self.store_list)
+                    running[executor.submit(self._collect_shard, shard, remaining, unlimited, on_store)] = shard
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = running.pop(future)
+                    completed += 1
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.logger.warning(f"エリア一覧の取得に失敗: {shard.label} - {e}")
+                    self._notify(completed, shard, max_count, unlimited)
+
+            if self.stop_requested:
+                for future in running:
+                    future.cancel()
+
+        skipped = len(pending)
+        self.logger.info(
+            f"エリア分割取得完了: {len(self.store_list)}件 "
+            f"(エリア {completed}/{len(self.shards)}件, 重複除外 {self.duplicates}件"
+            + (f", 件数到達で未取得 {skipped}エリア)" if skipped else ")")
+        )
+        return self.store_list
+
+    def stop(self):
+        """未着手のエリアを取得しない（取得中の一覧はエンジン側で止める）"""
+        self.stop_requested = True
+
+    def _reached(self, max_count, unlimited):
+        with self._lock:
+            return not unlimited and len(self.store_list) >= max_count
+
+    def _collect_shard(self, shard, max_count, unlimited, on_store):
+        self.logger.info(f"エリア一覧取得開始: {shard.label}")
+        stores = self.fetch_shard(shard, max_count, unlimited)
+
+        added = []
+        with self._lock:
+            for store in stores:
+                if store['url'] not in self._seen:
+                    self._seen.add(store['url'])
+                    # 並行取得中の各エリアは開始時点の残り件数で取得するため、合計はここで切る
+                    if len(self.store_list) < self._limit:
+                        self.store_list.append(store)
+                        added.append(store)
+                else:
+                    self.duplicates += 1
+            self.shard_counts[shard.label] = len(added)
+
+        if on_store:
+            for store in added:
+                on_store(store)
+        return added
+
+    def _notify(self, completed, shard, max_count, unlimited):
+        if not self.callback:
+            return
+        collected = len(self.store_list)
+        if unlimited:
+            progress = completed / len(self.shards) * 50
+        else:
+            progress = min(max(completed / len(self.shards), collected / max(max_count, 1)), 1.0) * 50
+        self.callback({
+            'phase': 'listing',
+            'message': (
+                f'エリア分割取得中 ({completed}/{len(self.shards)}): {shard.label} '
+                f'+{self.shard_counts.get(shard.label, 0)}件 (累計 {collected}件)'
+            ),
+            'progress': progress,
+            'current': collected,
+            'target': max_count if not unlimited else '無制限'
+        })
+
+
+# エリア分割の計画を表示
+if __name__ == "__main__":
+    import sys
+    from prefecture_mapper import PrefectureMapper
+
+    target = sys.argv[1] if len(sys.argv) > 1 else '東京都'
+    plan = plan_area_shards(PrefectureMapper(), target)
+    print(f"{target}: {len(plan)}エリア")
+    for planned in plan:
+        print(f"  {planned.label}: {planned.area_code}")
@@ -0,0 +1,152 @@
+"""
+asyncio版店舗詳細取得パイプライン
+グローバルなアクセス間隔を守りつつN件を同時に取得
+"""
+
+import time
+import asyncio
+import logging
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+from http_detail_fetcher import GurunaviHtmlParser, LXML_AVAILABLE
+from response_guard import RESPONSE_OK
+
+ASYNC_PIPELINE_AVAILABLE = AIOHTTP_AVAILABLE and LXML_AVAILABLE
+
+
+class AsyncDetailPipeline:
+    """店舗詳細の並行取得クラス（結果は完了順にコールバック）"""
+
+    def __init__(self, budget, user_agent, concurrency=4, timeout=15, guard=None, parse_pool=None, archive=None, logger=None):
+        """
+        Args:
+            budget (PolitenessBudget): 全体で共有するアクセス間隔
+            user_agent (str): User-Agent
+            concurrency (int): 同時に処理中にするリクエスト数
+            timeout (float): 1リクエストのタイムアウト（秒）
+            guard (ResponseGuard): CAPTCHA・IP制限の検出とバックオフ（検出したURLは再投入）
+            parse_pool (ParsePool): 解析を別プロセスで行う場合に指定（取得は解析の完了を待たない）
+            archive (PageArchive): 取得したページの保存先（省略時は保存しない）
+        """
+        if not ASYNC_PIPELINE_AVAILABLE:
+            raise ImportError("aiohttp と lxml をインストールしてください: pip install aiohttp lxml")
+
+        self.logger = logger or logging.getLogger(__name__)
+        self.budget = budget
+        self.user_agent = user_agent
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.guard = guard
+        self.parser = GurunaviHtmlParser(self.logger)
+        self.parse_pool = parse_pool
+        self.archive = archive
+        self._parsing = set()
+        self.stop_requested = False
+
+    def run(self, items, on_result):
+        """
+        店舗詳細を並行取得
+
+        Args:
+            items (list): (行番号, URL) のリスト
+            on_result (callable): on_result(行番号, URL, 店舗データ or None) を完了順に呼び出す
+        """
+        asyncio.run(self._run(items, on_result))
+
+    def stop(self):
+        """未着手の取得を中止"""
+        self.stop_requested = True
+
+    async def _run(self, items, on_result):
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        headers = {
+            'User-Agent': self.user_agent,
+            'Accept-Language': 'ja,en-US;q=0.8,en;q=0.6'
+        }
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(headers=headers, connector=connector, timeout=timeout) as session:
+            workers = [
+                asyncio.create_task(self._worker(session, queue, on_result))
+                for _ in range(self.concurrency)
+            ]
+            await asyncio.gather(*workers)
+            # 取得が終わった後も解析中のページは結果を待つ
+            if self._parsing:
+                await asyncio.gather(*self._parsing)
+
+    async def _worker(self, session, queue, on_result):
+        while not self.stop_requested:
+            try:
+                row_number, url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            await self.budget.async_wait()
+            if self.stop_requested:
+                return
+
+            started = time.monotonic()
+            response = await self._fetch_html(session, url)
+            if response is None:
+                self.budget.record_error()
+                detail = None
+            else:
+                status_code, html_text = response
+                if self.guard is not None:
+                    outcome, retry = self.guard.inspect(
+                        url, status_code, html_text, elapsed=time.monotonic() - started
+                    )
+                    if retry:
+                        # バックオフ後に取得し直す（共有のアクセス間隔は停止済み）
+                        queue.put_nowait((row_number, url))
+                        continue
+                    ok = outcome == RESPONSE_OK
+                else:
+                    ok = status_code == 200
+                    if not ok:
+                        self.logger.warning(f"HTTPステータス異常: {url} - {status_code}")
+                if ok and self.archive is not None:
+                    self.archive.put(url, html_text, status_code=status_code)
+                if ok and self.parse_pool is not None:
+                    task = asyncio.create_task(self._parse_in_pool(row_number, url, html_text, on_result))
+                    self._parsing.add(task)
+                    task.add_done_callback(self._parsing.discard)
+                    continue
+                detail = self.parser.parse(html_text, url) if ok else None
+
+            self._deliver(on_result, row_number, url, detail)
+
+    async def _parse_in_pool(self, row_number, url, html_text, on_result):
+        """解析プロセスの結果をイベントループ上でコールバック（結果の記録は常に同じスレッド）"""
+        try:
+            detail = await asyncio.wrap_future(self.parse_pool.submit(url, html_text))
+        except Exception as e:
+            self.logger.warning(f"解析プロセスエラー: {url} - {e}")
+            detail = None
+        self._deliver(on_result, row_number, url, detail)
+
+    def _deliver(self, on_result, row_number, url, detail):
+        try:
+            on_result(row_number, url, detail)
+        except Exception as e:
+            self.logger.error(f"結果コールバックエラー (行{row_number}): {e}")
+
+    async def _fetch_html(self, session, url):
+        """1店舗分のHTMLを取得（通信エラー時はNone）"""
+        try:
+            async with session.get(url) as response:
+                html_text = await response.text(errors='replace')
+                return response.status, html_text
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"非同期HTTP取得エラー: {url} - {e}")
+            return None
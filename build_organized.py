@@ -73,6 +73,8 @@ def install_all_requirements():
         'openpyxl',
         'selenium',
         'requests',
+        'lxml',
+        'aiohttp',
         'urllib3',
         'certifi',
         'psutil'
@@ -137,6 +139,9 @@ a = Analysis(
         'selenium.webdriver.chrome.service',
         'selenium.common.exceptions',
         'requests',
+        'lxml',
+        'lxml.html',
+        'aiohttp',
         'urllib3',
         'certifi',
         'tkinter',
@@ -24,6 +24,21 @@ try:
 except ImportError:
     WDM_AVAILABLE = False
 
+# 広告・アナリティクス等のブロック対象URL
+BLOCKED_URL_PATTERNS = [
+    '*googletagmanager*',
+    '*google-analytics*',
+    '*doubleclick*',
+    '*facebook*',
+    '*twitter.com/widgets*',
+    '*platform.twitter*',
+    '*amazon-adsystem*',
+    '*googleapis.com/maps*',
+    '*hotjar*',
+    '*newrelic*',
+    '*clarity.ms*'
+]
+
 class ChromeDriverManager:
     """ChromeDriver管理クラス（最適化版）"""
     
@@ -285,6 +300,27 @@ class ChromeDriverManager:
         
         return self.create_driver_with_options(options)
     
+    def set_user_agent(self, driver, user_agent):
+        """起動中のドライバーのUser-AgentをCDPで切り替え（再起動不要）"""
+        if 'Windows' in user_agent:
+            platform_name = 'Win32'
+        elif 'Macintosh' in user_agent:
+            platform_name = 'MacIntel'
+        else:
+            platform_name = 'Linux x86_64'
+        
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setUserAgentOverride', {
+            'userAgent': user_agent,
+            'acceptLanguage': 'ja-JP,ja;q=0.9',
+            'platform': platform_name
+        })
+        
+        # 反映確認
+        current = driver.execute_script("return navigator.userAgent;")
+        if current != user_agent:
+            raise Exception(f"User-Agentが反映されていません: {current}")
+    
     def cleanup_driver(self, driver):
         """ドライバーのクリーンアップ"""
         try:
@@ -0,0 +1,225 @@
+"""
+ChromeDriverプール
+N個のヘッドレスChromeを常駐させ、作業キューから店舗URLを並列処理
+"""
+
+import time
+import queue
+import random
+import logging
+import threading
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+from chrome_driver_manager import BLOCKED_URL_PATTERNS
+
+
+class PoolWorker:
+    """プール内の1ドライバー（専用UA・専用クールタイム）"""
+
+    def __init__(self, worker_id, driver, user_agent):
+        self.worker_id = worker_id
+        self.driver = driver
+        self.user_agent = user_agent
+        self.processed = 0
+        self.next_available = 0.0
+
+
+class DriverPool:
+    """ChromeDriverプールクラス"""
+
+    def __init__(self, chrome_manager, config, pool_size=None, memory_ceiling=None,
+                 time_multiplier=1.0, budget=None, logger=None):
+        """
+        Args:
+            chrome_manager (ChromeDriverManager): ドライバー作成に使用
+            config (dict): user_agents / cooltime_min / cooltime_max を含む設定
+            pool_size (int): ドライバー数（省略時は config['driver_pool_size']）
+            memory_ceiling (float): システムメモリ使用率の上限（%）。超えるとプールを縮小
+            time_multiplier (float): 時間帯別の倍率
+            budget (PolitenessBudget): 全体で共有するアクセス間隔（省略可）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.chrome_manager = chrome_manager
+        self.config = config
+        self.pool_size = max(1, int(pool_size or config.get('driver_pool_size', 3)))
+        self.memory_ceiling = memory_ceiling or config.get('driver_pool_memory_ceiling', 85.0)
+        self.time_multiplier = time_multiplier
+        self.budget = budget
+        self.workers = []
+        self.stop_requested = False
+
+        self._lock = threading.Lock()
+        self._pending_results = {}
+        self._expected_rows = []
+        self._next_index = 0
+        self._results = []
+
+    def start(self):
+        """ドライバーを起動（UAはワーカーごとにずらす）"""
+        user_agents = self.config['user_agents']
+        for worker_id in range(self.pool_size):
+            user_agent = user_agents[worker_id % len(user_agents)]
+            try:
+                driver = self.chrome_manager.create_optimized_driver(headless=True, user_agent=user_agent)
+                self._configure_driver(driver)
+                self.workers.append(PoolWorker(worker_id, driver, user_agent))
+            except Exception as e:
+                self.logger.error(f"プールドライバー起動エラー (ワーカー{worker_id}): {e}")
+
+        if not self.workers:
+            raise Exception("ドライバープールの起動に失敗しました")
+
+        self.logger.info(f"ドライバープール起動完了: {len(self.workers)}/{self.pool_size}台")
+        return len(self.workers)
+
+    def _configure_driver(self, driver):
+        """タイムアウトとリソースブロックを設定"""
+        driver.set_page_load_timeout(30)
+        driver.set_script_timeout(20)
+        try:
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            self.logger.debug(f"リソースブロック設定エラー: {e}")
+
+    def process(self, items, extract_fn, on_result=None):
+        """
+        作業キューのURLを並列処理
+
+        Args:
+            items (list): (行番号, URL) のリスト（キャッシュ済み・再開時の取得済み行は欠番になる）
+            extract_fn (callable): extract_fn(driver, url) -> 店舗データ
+            on_result (callable): on_result(行番号, 店舗データ) を行番号順に呼び出す
+
+        Returns:
+            list: 行番号順の店舗データ
+        """
+        work_queue = queue.Queue()
+        for item in items:
+            work_queue.put(item)
+
+        self._pending_results = {}
+        # 欠番を待たないよう、出力順は受け取った行番号の並びで決める
+        self._expected_rows = sorted(row for row, _ in items)
+        self._next_index = 0
+        self._results = []
+
+        threads = []
+        for worker in self.workers:
+            thread = threading.Thread(
+                target=self._worker_loop,
+                args=(worker, work_queue, extract_fn, on_result),
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        # 途中停止などで欠番がある場合も、取得済み分は順番に返す
+        with self._lock:
+            for row in sorted(self._pending_results):
+                self._emit(row, self._pending_results.pop(row), on_result)
+
+        return self._results
+
+    def _worker_loop(self, worker, work_queue, extract_fn, on_result):
+        while not self.stop_requested:
+            if self._should_shrink(worker):
+                return
+
+            try:
+                row_number, url = work_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            self._wait_cooldown(worker)
+
+            try:
+                detail = extract_fn(worker.driver, url)
+            except Exception as e:
+                self.logger.error(f"プールワーカー{worker.worker_id} 取得エラー: {url} - {e}")
+                if self.budget:
+                    self.budget.record_error()
+                detail = None
+
+            worker.processed += 1
+            self._collect(row_number, url, detail, on_result)
+
+    def _wait_cooldown(self, worker):
+        """ワーカー単位のクールタイム + 全体のアクセス間隔"""
+        delay = worker.next_available - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.budget:
+            self.budget.wait()
+
+        if self.budget:
+            # ワーカー単位の間隔も全体のレート制御に合わせる
+            cooltime = self.budget.next_interval() * len(self.workers)
+        else:
+            cooltime = random.uniform(self.config['cooltime_min'], self.config['cooltime_max']) * self.time_multiplier
+        worker.next_available = time.monotonic() + cooltime
+
+    def _collect(self, row_number, url, detail, on_result):
+        """結果を受け取り、行番号順に揃えて出力"""
+        with self._lock:
+            self._pending_results[row_number] = (url, detail)
+            while (self._next_index < len(self._expected_rows)
+                   and self._expected_rows[self._next_index] in self._pending_results):
+                row = self._expected_rows[self._next_index]
+                self._emit(row, self._pending_results.pop(row), on_result)
+                self._next_index += 1
+
+    def _emit(self, row_number, result, on_result):
+        url, detail = result
+        self._results.append((row_number, url, detail))
+        if on_result:
+            try:
+                on_result(row_number, url, detail)
+            except Exception as e:
+                self.logger.error(f"結果コールバックエラー (行{row_number}): {e}")
+
+    def _should_shrink(self, worker):
+        """メモリ逼迫時はワーカーを1台ずつ減らす（最低1台は維持）"""
+        if not PSUTIL_AVAILABLE:
+            return False
+
+        try:
+            memory_percent = psutil.virtual_memory().percent
+        except Exception:
+            return False
+
+        if memory_percent <= self.memory_ceiling:
+            return False
+
+        with self._lock:
+            if len(self.workers) <= 1 or worker not in self.workers:
+                return False
+            self.workers.remove(worker)
+
+        self.logger.warning(
+            f"メモリ使用率 {memory_percent:.1f}% が上限 {self.memory_ceiling}% を超えたため"
+            f"ワーカー{worker.worker_id}を停止（残り{len(self.workers)}台）"
+        )
+        self.chrome_manager.cleanup_driver(worker.driver)
+        return True
+
+    def stop(self):
+        """未着手のURLの処理を中止"""
+        self.stop_requested = True
+
+    def close(self):
+        """全ドライバーを終了"""
+        with self._lock:
+            workers = list(self.workers)
+            self.workers.clear()
+        for worker in workers:
+            self.chrome_manager.cleanup_driver(worker.driver)
+        self.logger.info("ドライバープール終了")
@@ -0,0 +1,249 @@
+"""
+一括抽出スクリプト
+店舗名・電話番号・郵便番号・住所を1回のexecute_scriptでまとめて取得
+（住所版・ラベル版・マルチアプローチ版の各extractorで共用）
+"""
+
+import time
+import logging
+
+# 各extractorが必要とする候補を全て1回で返す
+STORE_EXTRACTION_SCRIPT = """
+const PHONE_RE = /\\d{2,4}[-\\s]?\\d{2,4}[-\\s]?\\d{3,4}/;
+const text = (elem) => (elem && elem.innerText ? elem.innerText.trim() : '');
+const result = {
+    title: document.title || '',
+    name: null,
+    h1_texts: [],
+    phone: null,
+    label_phone: null,
+    address: null,
+    diagnostics: {}
+};
+
+// 店舗名（ヘッダー → h1）
+const headerName = document.querySelector('#header-main-name a');
+const h1List = Array.from(document.querySelectorAll('h1'));
+result.h1_texts = h1List.map(text).filter(t => t);
+if (headerName) {
+    result.name = text(headerName);
+    result.diagnostics.name = '#header-main-name a';
+} else if (h1List.length) {
+    result.name = text(h1List[0]);
+    result.diagnostics.name = 'h1';
+}
+
+// 電話番号（ヘッダー → ヘッダー情報 → 青文字 → 電話番号らしい要素）
+const phoneCandidates = [
+    ['#header-main-phone .number', false],
+    ['#header-main-phone-info .number', false],
+    ['.commonAccordion_content_item_desc.-blue, p.-blue', true],
+    ['[class*="phone"]', true],
+    ['[class*="tel"]', true],
+    ['.number', true]
+];
+for (const [selector, needsMatch] of phoneCandidates) {
+    for (const elem of document.querySelectorAll(selector)) {
+        const value = text(elem);
+        if (value && (!needsMatch || PHONE_RE.test(value))) {
+            result.phone = {value: value, raw: elem.innerText, source: selector};
+            break;
+        }
+    }
+    if (result.phone) {
+        break;
+    }
+}
+
+// アコーディオンのラベル（電話・住所）
+const items = Array.from(document.querySelectorAll('.commonAccordion_content_item'));
+for (const item of items) {
+    const title = text(item.querySelector('.commonAccordion_content_item_title'));
+    const desc = item.querySelector('.commonAccordion_content_item_desc');
+    if (!title || !desc) {
+        continue;
+    }
+    if (!result.label_phone && title.includes('電話')) {
+        const blue = desc.querySelector('p.-blue') || desc.querySelector('.-blue');
+        result.label_phone = {
+            value: blue ? text(blue) : '',
+            raw: text(desc),
+            source: blue ? 'label:p.-blue' : 'label:desc'
+        };
+    }
+    if (!result.address && title.includes('住所')) {
+        result.address = {
+            text: text(desc).replace(/地図アプリで見る/g, ''),
+            source: '.commonAccordion_content_item'
+        };
+    }
+}
+
+// 住所（テーブル構造が最優先）
+for (const th of document.querySelectorAll('th')) {
+    if (text(th).includes('住所') && th.nextElementSibling) {
+        result.address = {text: text(th.nextElementSibling), source: 'th:住所'};
+        break;
+    }
+}
+if (!result.address) {
+    for (const elem of document.querySelectorAll('.address, .adr, [class*="address"]')) {
+        const value = text(elem);
+        if (value && !value.includes('メール') && !value.includes('URL')) {
+            const stripped = value.replace(/〒\\d{3}-\\d{4}\\s*/g, '').split('\\n')[0].trim();
+            if (stripped.length > 5) {
+                result.address = {text: value, source: '.address'};
+                break;
+            }
+        }
+    }
+}
+
+if (result.address) {
+    const match = result.address.text.match(/〒(\\d{3}-\\d{4})/);
+    result.address.postal_code = match ? match[1] : '';
+    result.address.address = result.address.text.replace(/〒\\d{3}-\\d{4}\\s*/g, '').split('\\n')[0].trim();
+    result.diagnostics.address = result.address.source;
+}
+if (result.phone) {
+    result.diagnostics.phone = result.phone.source;
+}
+if (result.label_phone) {
+    result.diagnostics.label_phone = result.label_phone.source;
+}
+return result;
+"""
+
+
+def run_extraction_bundle(driver, logger=None):
+    """
+    一括抽出スクリプトを実行
+
+    Returns:
+        dict: 抽出結果（失敗時はNone）
+    """
+    logger = logger or logging.getLogger(__name__)
+    try:
+        result = driver.execute_script(STORE_EXTRACTION_SCRIPT)
+        if result:
+            logger.debug(f"一括抽出: {result.get('diagnostics')}")
+        return result
+    except Exception as e:
+        logger.warning(f"一括抽出スクリプトエラー: {e}")
+        return None
+
+
+def name_from_title(title):
+    """titleタグから店舗名を取得"""
+    if not title:
+        return None
+    name = title.split(' - ')[0].split('｜')[0].strip()
+    if name and name != 'ぐるなび':
+        return name
+    return None
+
+
+class RoundTripCounter:
+    """WebDriverのコマンド送信回数を数えるクラス（ベンチマーク用）"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.count = 0
+        self.commands = {}
+        self._original_execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            self.count += 1
+            self.commands[driver_command] = self.commands.get(driver_command, 0) + 1
+            return self._original_execute(driver_command, params)
+
+        # WebElementの操作もdriver.executeを経由するため、ここで全て数えられる
+        driver.execute = counting_execute
+
+    def reset(self):
+        self.count = 0
+        self.commands = {}
+
+    def restore(self):
+        self.driver.execute = self._original_execute
+
+
+def benchmark_round_trips(driver, urls, logger=None):
+    """
+    店舗1件あたりのWebDriver往復回数を旧方式（項目別取得）と一括抽出で比較
+
+    Returns:
+        dict: extractor名 -> {'before': 平均往復回数, 'after': 平均往復回数, 'before_sec': ..., 'after_sec': ...}
+    """
+    from gurunavi_address_extractor import GurunaviAddressExtractor
+    from gurunavi_label_based_extractor import GurunaviLabelBasedExtractor
+    from gurunavi_multi_approach_extractor import GurunaviMultiApproachExtractor
+
+    logger = logger or logging.getLogger(__name__)
+    counter = RoundTripCounter(driver)
+    totals = {}
+
+    def measure(name, phase, fn):
+        counter.reset()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        entry = totals.setdefault(name, {'before': 0, 'after': 0, 'before_sec': 0.0, 'after_sec': 0.0})
+        entry[phase] += counter.count
+        entry[f'{phase}_sec'] += elapsed
+
+    try:
+        for url in urls:
+            driver.get(url)
+
+            address = GurunaviAddressExtractor(driver, logger)
+            measure('address', 'before', lambda: (
+                address._extract_shop_name(),
+                address._extract_phone_number(),
+                address._extract_postal_and_address()
+            ))
+            measure('address', 'after', lambda: address._extract_fields_from_bundle(run_extraction_bundle(driver, logger)))
+
+            label = GurunaviLabelBasedExtractor(driver, logger)
+            measure('label', 'before', lambda: (label._extract_shop_name(), label._extract_phone_by_label()))
+            measure('label', 'after', lambda: label._extract_fields_from_bundle(run_extraction_bundle(driver, logger)))
+
+            multi = GurunaviMultiApproachExtractor(driver, logger)
+            measure('multi', 'before', lambda: (
+                multi._extract_shop_name_with_header(),
+                multi._extract_phone_number_with_header()
+            ))
+            measure('multi', 'after', lambda: multi._extract_fields_from_bundle(run_extraction_bundle(driver, logger)))
+    finally:
+        counter.restore()
+
+    count = max(len(urls), 1)
+    return {
+        name: {key: value / count for key, value in entry.items()}
+        for name, entry in totals.items()
+    }
+
+
+# ベンチマーク
+if __name__ == "__main__":
+    import sys
+    from chrome_driver_manager import ChromeDriverManager
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if len(sys.argv) < 2:
+        print("使い方: python extraction_bundle.py <店舗URL> [<店舗URL> ...]")
+        sys.exit(1)
+
+    manager = ChromeDriverManager()
+    bench_driver = manager.create_optimized_driver(headless=True)
+    try:
+        results = benchmark_round_trips(bench_driver, sys.argv[1:])
+        print("店舗1件あたりのWebDriver往復回数（旧方式 → 一括抽出）:")
+        for extractor_name, entry in results.items():
+            print(
+                f"  {extractor_name:8}: {entry['before']:.1f}回 → {entry['after']:.1f}回 "
+                f"({entry['before_sec']*1000:.0f}ms → {entry['after_sec']*1000:.0f}ms)"
+            )
+    finally:
+        manager.cleanup_driver(bench_driver)
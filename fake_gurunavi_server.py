@@ -0,0 +1,548 @@
+"""
+ぐるなび模擬サーバー
+一覧・店舗ページを生成して配信し、設定したリクエストレートを超えると
+429・CAPTCHAページ・アクセスブロックを返す（アクセス間隔・バックオフの負荷試験用）
+"""
+
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import deque, Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OUTCOME_OK = 'ok'
+OUTCOME_NOT_FOUND = 'not_found'
+OUTCOME_RATE_LIMITED = 'rate_limited'
+OUTCOME_CAPTCHA = 'captcha'
+OUTCOME_BLOCKED = 'blocked'
+OUTCOME_SERVER_ERROR = 'server_error'
+
+CAPTCHA_PAGE = """<html><head><title>アクセスが集中しています | ぐるなび</title></head>
+<body><h1>ご利用の環境からのアクセスが集中しています</h1>
+<p>ロボットではないことを確認してください。</p>
+<div class="g-recaptcha" data-sitekey="fake-site-key"></div>
+</body></html>"""
+
+BLOCK_PAGE = """<html><head><title>403 Forbidden</title></head>
+<body><h1>Access Denied</h1>
+<p>アクセスが制限されました。しばらく時間をおいてから再度アクセスしてください。</p>
+</body></html>"""
+
+RATE_LIMIT_PAGE = """<html><head><title>429 Too Many Requests</title></head>
+<body><h1>Too Many Requests</h1></body></html>"""
+
+SERVER_ERROR_PAGE = """<html><head><title>500 Internal Server Error</title></head>
+<body><h1>Internal Server Error</h1></body></html>"""
+
+NOT_FOUND_PAGE = """<html><head><title>ページが見つかりません | ぐるなび</title></head>
+<body><h1>お探しのページは見つかりません</h1></body></html>"""
+
+
+class RatePolicy:
+    """クライアントごとのリクエストレートと応答の関係"""
+
+    def __init__(self, window=10.0, rate_limit_rps=2.0, captcha_rps=4.0, block_rps=8.0,
+                 block_duration=60.0, retry_after=5, client_key='ip'):
+        """
+        Args:
+            window (float): レートを計測する直近の時間幅（秒）
+            rate_limit_rps (float): これを超えると429を返す（件/秒）
+            captcha_rps (float): これを超えるとCAPTCHAページを返す（件/秒）
+            block_rps (float): これを超えるとblock_duration秒ブロックする（件/秒）
+            retry_after (int): 429のRetry-Afterヘッダー（秒）
+            client_key (str): 'ip' ならIP単位、'ip+ua' ならIPとUser-Agentの組で計測
+        """
+        self.window = window
+        self.rate_limit_rps = rate_limit_rps
+        self.captcha_rps = captcha_rps
+        self.block_rps = block_rps
+        self.block_duration = block_duration
+        self.retry_after = retry_after
+        self.client_key = client_key
+
+
+class FakeGurunaviServer:
+    """ぐるなび模擬サーバークラス"""
+
+    def __init__(self, policy=None, stores_per_area=300, per_page=30, latency=(0.05, 0.2),
+                 host='127.0.0.1', port=0, seed=0, link_base_url=None, flaky_stores=None, logger=None):
+        """
+        Args:
+            policy (RatePolicy): レート制限の設定（省略時は既定値）
+            stores_per_area (int): 1エリアあたりの店舗数
+            per_page (int): 一覧1ページあたりの店舗数
+            latency (tuple): 応答前の待機時間の範囲（秒）
+            link_base_url (str): 一覧ページの店舗リンクのベースURL（省略時はこのサーバー自身）
+            flaky_stores (dict): 店舗ID → 最初に500を返す回数（一時的な障害の再取得の試験用）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.policy = policy or RatePolicy()
+        self.stores_per_area = stores_per_area
+        self.per_page = per_page
+        self.latency = latency
+        self.link_base_url = link_base_url.rstrip('/') if link_base_url else None
+        self.random = random.Random(seed)
+
+        self.outcomes = Counter()
+        self.flaky_stores = dict(flaky_stores or {})
+        self.store_hits = Counter()
+        self._history = {}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def site_url(self):
+        """一覧ページに載せるリンクのベースURL"""
+        return self.link_base_url or self.base_url
+
+    def listing_url(self, area_code='jp', page=1):
+        return f"{self.base_url}/area/{area_code}/rs/" + (f"?p={page}" if page > 1 else '')
+
+    def store_url(self, store_id):
+        return f"{self.base_url}/{store_id}/"
+
+    # レート判定
+
+    def classify_client(self, client):
+        """
+        クライアントの直近レートから応答の種類を決定
+
+        Returns:
+            str: OUTCOME_* のいずれか（OKの場合はページ内容で404になり得る）
+        """
+        policy = self.policy
+        now = time.monotonic()
+        with self._lock:
+            if self._blocked_until.get(client, 0) > now:
+                return OUTCOME_BLOCKED
+
+            history = self._history.setdefault(client, deque())
+            history.append(now)
+            while history and history[0] < now - policy.window:
+                history.popleft()
+            rate = len(history) / policy.window
+
+            if rate > policy.block_rps:
+                self._blocked_until[client] = now + policy.block_duration
+                return OUTCOME_BLOCKED
+            if rate > policy.captcha_rps:
+                return OUTCOME_CAPTCHA
+            if rate > policy.rate_limit_rps:
+                return OUTCOME_RATE_LIMITED
+            return OUTCOME_OK
+
+    def _record(self, outcome):
+        with self._lock:
+            self.outcomes[outcome] += 1
+
+    def _take_failure(self, store_id):
+        """一時的な障害を起こす店舗ならTrue（残り回数を1減らす）"""
+        with self._lock:
+            remaining = self.flaky_stores.get(store_id, 0)
+            if remaining <= 0:
+                return False
+            self.flaky_stores[store_id] = remaining - 1
+            return True
+
+    def reset(self):
+        """計測履歴・ブロック状態・集計をリセット"""
+        with self._lock:
+            self._history.clear()
+            self._blocked_until.clear()
+            self.outcomes.clear()
+            self.store_hits.clear()
+
+    # ページ生成
+
+    def _store_ids(self, area_code):
+        return [
+            'f' + hashlib.md5(f"{area_code}:{i}".encode()).hexdigest()[:7]
+            for i in range(self.stores_per_area)
+        ]
+
+    def render_listing(self, area_code, page):
+        store_ids = self._store_ids(area_code)
+        last_page = max(1, -(-len(store_ids) // self.per_page))
+        if page > last_page:
+            return None
+
+        site_url = self.site_url
+        page_ids = store_ids[(page - 1) * self.per_page:page * self.per_page]
+        links = '\n'.join(
+            f'<div class="result-cassette"><a href="{site_url}/{store_id}/">店舗 {store_id}</a>'
+            f'<a href="{site_url}/{store_id}/map/">地図</a></div>'
+            for store_id in page_ids
+        )
+        pager = ''.join(f'<a href="/area/{area_code}/rs/?p={n}">{n}</a>' for n in range(1, last_page + 1))
+        return (
+            f"<html><head><title>{area_code}のグルメ・レストラン | ぐるなび</title></head><body>"
+            f"<p>検索結果 {len(store_ids):,}件</p>{links}"
+            f'<a href="{site_url}/area/jp/rs/">全国</a><a href="{site_url}/kanjirank/">幹事</a>'
+            f'<nav class="pager">{pager}</nav></body></html>'
+        )
+
+    def render_store(self, store_id):
+        if not store_id.startswith('f') or len(store_id) != 8:
+            return None
+
+        digits = int(store_id[1:], 16)
+        phone = f"03-{digits % 9000 + 1000}-{digits // 9000 % 9000 + 1000}"
+        postal = f"{digits % 900 + 100}-{digits // 900 % 9000 + 1000}"
+        address = f"東京都千代田区丸の内{digits % 9 + 1}-{digits % 20 + 1}-{digits % 30 + 1}"
+        return (
+            f"<html><head><title>店舗{store_id} - ぐるなび</title></head><body>"
+            f'<div id="header-main-name"><a>店舗{store_id}</a></div>'
+            f'<div id="header-main-phone"><span class="number">{phone}</span></div>'
+            f'<table id="info-table"><tr><th>店名</th><td>店舗{store_id}</td></tr>'
+            f"<tr><th>住所</th><td>〒{postal} {address}</td></tr></table>"
+            f"</body></html>"
+        )
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/__stats':
+                    self._send(200, json.dumps(dict(server.outcomes)), 'application/json')
+                    return
+
+                low, high = server.latency
+                if high > 0:
+                    time.sleep(server.random.uniform(low, high))
+
+                client = self.client_address[0]
+                if server.policy.client_key == 'ip+ua':
+                    client = f"{client}|{self.headers.get('User-Agent', '')}"
+
+                outcome = server.classify_client(client)
+                if outcome == OUTCOME_BLOCKED:
+                    server._record(outcome)
+                    self._send(403, BLOCK_PAGE)
+                    return
+                if outcome == OUTCOME_CAPTCHA:
+                    server._record(outcome)
+                    self._send(200, CAPTCHA_PAGE)
+                    return
+                if outcome == OUTCOME_RATE_LIMITED:
+                    server._record(outcome)
+                    self._send(429, RATE_LIMIT_PAGE, headers={'Retry-After': str(server.policy.retry_after)})
+                    return
+
+                store_id = parsed.path.strip('/')
+                if store_id and '/' not in store_id:
+                    with server._lock:
+                        server.store_hits[store_id] += 1
+                if server._take_failure(store_id):
+                    server._record(OUTCOME_SERVER_ERROR)
+                    self._send(500, SERVER_ERROR_PAGE)
+                    return
+
+                html_text = self._render(parsed)
+                if html_text is None:
+                    server._record(OUTCOME_NOT_FOUND)
+                    self._send(404, NOT_FOUND_PAGE)
+                    return
+                server._record(OUTCOME_OK)
+                self._send(200, html_text)
+
+            def _render(self, parsed):
+                parts = parsed.path.strip('/').split('/')
+                if len(parts) == 3 and parts[0] == 'area' and parts[2] == 'rs':
+                    page = int(parse_qs(parsed.query).get('p', ['1'])[0])
+                    return server.render_listing(parts[1], page)
+                if len(parts) == 1 and parts[0]:
+                    return server.render_store(parts[0])
+                return None
+
+            def _send(self, status, body_text, content_type='text/html', headers=None):
+                body = body_text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug(f"模擬サーバー: {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"模擬サーバー起動: {self.base_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def engine_config(server, overrides=None):
+    """模擬サーバーに向けたスクレイピングエンジンの設定（既定値 + 対象サイトの差し替え）"""
+    from app_config import default_config
+
+    config = default_config()
+    config.update({
+        'site_base_url': server.base_url,
+        'detail_fetch_mode': 'http',
+        'listing_fetch_mode': 'http',
+        'store_cache_enabled': False,
+        'diff_mode': False,
+        'page_archive_enabled': False
+    })
+    config.update(overrides or {})
+    return config
+
+
+def run_engine(server, config, store_count, work_dir, callback=None, logger=None):
+    """
+    実際のスクレイピングエンジン（ImprovedScraperEngine）で模擬サーバーの一覧・店舗詳細を取得
+
+    Args:
+        server (FakeGurunaviServer): 起動済みの模擬サーバー
+        config (dict): エンジンの設定（engine_config() の結果）
+        store_count (int): 取得する店舗数
+        work_dir (str): 結果ファイルの保存先
+
+    Returns:
+        tuple: (ImprovedScraperEngine, 取得結果, 所要時間)
+    """
+    from prefecture_mapper import PrefectureMapper
+    from scraper_engine import ImprovedScraperEngine
+
+    logger = logger or logging.getLogger(__name__)
+    # HTTP取得のみで完結するためブラウザ（ChromeDriverManager）は渡さない
+    engine = ImprovedScraperEngine(None, PrefectureMapper(server.base_url), config, callback=callback)
+    started = time.perf_counter()
+    try:
+        store_list = engine.get_store_list('全国', '', store_count, False)
+        results = engine.start_processing(store_list, {
+            'prefecture': '全国', 'city': '', 'save_path': work_dir,
+            'filename': f"load_test_{int(time.time() * 1000)}"
+        }) or []
+    finally:
+        engine.cleanup()
+    return engine, results, time.perf_counter() - started
+
+
+def _engine_counters(engine):
+    keys = ('captcha_encounters', 'ip_restrictions', 'server_errors', 'requeued_requests', 'failed_stores')
+    counters = {key: engine.stats.get(key, 0) for key in keys}
+    counters['backoff_seconds'] = round(engine.stats.get('backoff_seconds', 0), 1)
+    return counters
+
+
+def run_load_test(server, intervals, requests_per_step=40, concurrency=1, engine_overrides=None, logger=None):
+    """
+    アクセス間隔を段階的に短くしながら実際のエンジンで一覧・店舗詳細を取得し、応答の内訳を集計
+
+    Args:
+        server (FakeGurunaviServer): 起動済みの模擬サーバー
+        intervals (list): 試すアクセス間隔（秒）。エンジンのcooltimeとして使用（AIMD制御は無効）
+        requests_per_step (int): 1段階あたりの取得店舗数
+        concurrency (int): 同時リクエスト数（2以上ならasyncモード）
+        engine_overrides (dict): エンジンに追加で渡す設定（バックオフ時間など）
+
+    Returns:
+        list: 段階ごとの {'interval', 'target_rps', 'actual_rps', 'outcomes', 'engine', 'stores'}
+    """
+    import shutil
+    import tempfile
+
+    logger = logger or logging.getLogger(__name__)
+    work_dir = tempfile.mkdtemp(prefix='gurunavi_load_test_')
+    results = []
+    try:
+        for interval in intervals:
+            server.reset()
+            config = engine_config(server, dict(engine_overrides or {}, **{
+                'cooltime_min': interval * 0.8,
+                'cooltime_max': interval * 1.2,
+                'adaptive_rate': False,
+                'engine_mode': 'async' if concurrency > 1 else 'sequential',
+                'async_concurrency': concurrency,
+                'listing_concurrency': concurrency
+            }))
+            engine, stores, elapsed = run_engine(server, config, requests_per_step, work_dir, logger=logger)
+            outcomes = dict(server.outcomes)
+            results.append({
+                'interval': interval,
+                'target_rps': 1.0 / interval,
+                'actual_rps': sum(outcomes.values()) / elapsed if elapsed > 0 else 0.0,
+                'outcomes': outcomes,
+                'engine': _engine_counters(engine),
+                'stores': len(stores)
+            })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def run_adaptive_test(server, rate_config, total_requests=200, concurrency=2, logger=None):
+    """
+    AIMDのレート制御を有効にした実際のエンジンで取得し、レートの推移を記録
+
+    Args:
+        server (FakeGurunaviServer): 起動済みの模擬サーバー
+        rate_config (dict): エンジンに渡すレート制御・バックオフの設定
+        total_requests (int): 取得する店舗数
+
+    Returns:
+        dict: {'outcomes', 'actual_rps', 'rates': [(経過秒, レート)], 'final_rps', 'engine', 'stores'}
+    """
+    import shutil
+    import tempfile
+
+    logger = logger or logging.getLogger(__name__)
+    server.reset()
+    config = engine_config(server, dict(
+        rate_config,
+        adaptive_rate=True,
+        engine_mode='async' if concurrency > 1 else 'sequential',
+        async_concurrency=concurrency,
+        listing_concurrency=concurrency
+    ))
+
+    rates = []
+    engines = []
+    started = time.perf_counter()
+
+    def on_progress(_data):
+        # 進捗通知ごとにエンジンの現在レートを記録
+        if engines:
+            rates.append((time.perf_counter() - started, engines[0].politeness_budget.requests_per_second))
+
+    work_dir = tempfile.mkdtemp(prefix='gurunavi_load_test_')
+    try:
+        from prefecture_mapper import PrefectureMapper
+        from scraper_engine import ImprovedScraperEngine
+
+        engine = ImprovedScraperEngine(None, PrefectureMapper(server.base_url), config, callback=on_progress)
+        engines.append(engine)
+        try:
+            store_list = engine.get_store_list('全国', '', total_requests, False)
+            stores = engine.start_processing(store_list, {
+                'prefecture': '全国', 'city': '', 'save_path': work_dir, 'filename': 'adaptive_test'
+            }) or []
+        finally:
+            engine.cleanup()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - started
+
+    outcomes = dict(server.outcomes)
+    return {
+        'outcomes': outcomes,
+        'actual_rps': sum(outcomes.values()) / elapsed if elapsed > 0 else 0.0,
+        'rates': rates,
+        'final_rps': engine.politeness_budget.requests_per_second,
+        'engine': _engine_counters(engine),
+        'stores': len(stores)
+    }
+
+
+def highest_safe_rps(results):
+    """全リクエストがOKだった段階のうち最も速いレート"""
+    safe = [
+        result['actual_rps'] for result in results
+        if set(result['outcomes']) <= {OUTCOME_OK, OUTCOME_NOT_FOUND}
+    ]
+    return max(safe) if safe else None
+
+
+# 負荷試験
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="ぐるなび模擬サーバー")
+    parser.add_argument('--serve', action='store_true', help='サーバーのみ起動')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--window', type=float, default=5.0)
+    parser.add_argument('--rate-limit-rps', type=float, default=2.0)
+    parser.add_argument('--captcha-rps', type=float, default=4.0)
+    parser.add_argument('--block-rps', type=float, default=8.0)
+    parser.add_argument('--intervals', type=float, nargs='+', default=[1.0, 0.6, 0.4, 0.2, 0.1])
+    parser.add_argument('--requests', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--adaptive', action='store_true', help='固定間隔の段階試験ではなくAIMD制御で試験')
+    args = parser.parse_args()
+
+    rate_policy = RatePolicy(
+        window=args.window,
+        rate_limit_rps=args.rate_limit_rps,
+        captcha_rps=args.captcha_rps,
+        block_rps=args.block_rps,
+        block_duration=args.window
+    )
+    fake_server = FakeGurunaviServer(rate_policy, latency=(0.02, 0.05), port=args.port)
+    fake_server.start()
+
+    if args.serve:
+        print(f"配信中: {fake_server.listing_url()} （Ctrl+Cで終了）")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            fake_server.stop()
+    elif args.adaptive:
+        try:
+            result = run_adaptive_test(
+                fake_server,
+                {
+                    # 上限はブロックされるレートまで（rate_max_rps は 1/cooltime_min を超えられない）
+                    'cooltime_min': 1.0 / args.block_rps, 'cooltime_max': 1.5,
+                    'rate_min_rps': 0.2,
+                    'rate_increase_step': 0.05,
+                    'captcha_delay': 2.0, 'ip_limit_delay': 1.0, 'max_backoff_delay': 8.0
+                },
+                total_requests=args.requests * 5,
+                concurrency=args.concurrency
+            )
+            print(f"制限: 429 > {args.rate_limit_rps}件/秒, CAPTCHA > {args.captcha_rps}件/秒, ブロック > {args.block_rps}件/秒")
+            print(f"  応答: {result['outcomes']} / エンジン {result['engine']}")
+            step = max(1, len(result['rates']) // 10)
+            print("  レート推移: " + ', '.join(f"{t:.0f}秒 {rps:.2f}" for t, rps in result['rates'][::step]))
+            print(f"  平均 {result['actual_rps']:.2f}件/秒 / 最終レート {result['final_rps']:.2f}件/秒")
+        finally:
+            fake_server.stop()
+    else:
+        try:
+            steps = run_load_test(
+                fake_server, args.intervals, args.requests, args.concurrency,
+                engine_overrides={'captcha_delay': args.window, 'ip_limit_delay': args.window, 'max_backoff_delay': args.window * 4}
+            )
+            print(f"制限: 429 > {args.rate_limit_rps}件/秒, CAPTCHA > {args.captcha_rps}件/秒, ブロック > {args.block_rps}件/秒")
+            for step in steps:
+                print(
+                    f"  間隔 {step['interval']:.2f}秒 (目標 {step['target_rps']:.1f}件/秒, 実測 {step['actual_rps']:.1f}件/秒): "
+                    f"{step['outcomes']} / エンジン {step['engine']}"
+                )
+            safe_rps = highest_safe_rps(steps)
+            print(f"安全な最大スループット: {safe_rps:.2f}件/秒" if safe_rps else "安全な段階がありません")
+        finally:
+            fake_server.stop()
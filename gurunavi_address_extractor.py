@@ -8,18 +8,27 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 import re
-import time
 import logging
 
+from page_readiness import PageReadinessWaiter, DETAIL_READY_SELECTORS
+from extraction_bundle import run_extraction_bundle, name_from_title
+
 class GurunaviAddressExtractor:
     """住所・郵便番号対応版ぐるなび店舗情報抽出クラス"""
     
-    def __init__(self, driver, logger=None):
+    def __init__(self, driver, logger=None, readiness_waiter=None, page_ready=False):
+        """
+        Args:
+            readiness_waiter (PageReadinessWaiter): 呼び出し元と共有する待機（待機時間の統計を1か所に集計）
+            page_ready (bool): 呼び出し元で読み込み完了を待機済みの場合True（二重に待たない）
+        """
         self.driver = driver
         self.logger = logger or logging.getLogger(__name__)
         if self.driver is None:
             raise ValueError("Driver cannot be None")
         self.wait = WebDriverWait(driver, 15)
+        self.readiness_waiter = readiness_waiter or PageReadinessWaiter(logger=self.logger)
+        self.page_ready = page_ready
     
     def extract_store_data_with_address(self, url):
         """店舗データを抽出（郵便番号含む6項目）"""
@@ -43,17 +52,20 @@ class GurunaviAddressExtractor:
             # ページが完全に読み込まれるのを待つ
             self._ensure_page_loaded()
             
-            # 店舗名を取得
-            detail['店舗名'] = self._extract_shop_name()
-            
-            # 電話番号を取得してクリーニング
-            raw_phone = self._extract_phone_number()
-            detail['電話番号'] = self._clean_phone_number(raw_phone)
-            
-            # 郵便番号と住所を取得
-            postal_and_address = self._extract_postal_and_address()
-            detail['郵便番号'] = postal_and_address['postal_code']
-            detail['住所'] = postal_and_address['address']
+            # 全項目を1回のスクリプト実行で取得
+            bundle = run_extraction_bundle(self.driver, self.logger)
+            if bundle:
+                detail.update(self._extract_fields_from_bundle(bundle))
+            else:
+                # 一括抽出が失敗した場合は項目別に取得
+                detail['店舗名'] = self._extract_shop_name()
+                
+                raw_phone = self._extract_phone_number()
+                detail['電話番号'] = self._clean_phone_number(raw_phone)
+                
+                postal_and_address = self._extract_postal_and_address()
+                detail['郵便番号'] = postal_and_address['postal_code']
+                detail['住所'] = postal_and_address['address']
             
             self.logger.info(f"取得結果: {detail}")
             return detail
@@ -62,6 +74,22 @@ class GurunaviAddressExtractor:
             self.logger.error(f"データ抽出エラー: {e}")
             return self._get_default_detail(url)
     
+    def _extract_fields_from_bundle(self, bundle):
+        """一括抽出結果から店舗名・電話番号・郵便番号・住所を取得"""
+        name = bundle.get('name')
+        if not name or 'ぐるなび' in name:
+            name = name_from_title(bundle.get('title')) or '-'
+        
+        phone = bundle.get('phone') or {}
+        address = bundle.get('address') or {}
+        
+        return {
+            '店舗名': name,
+            '電話番号': self._clean_phone_number(phone.get('value') or '-'),
+            '郵便番号': address.get('postal_code') or '-',
+            '住所': self._clean_address(address.get('address') or '-') or '-'
+        }
+    
     def _ensure_page_loaded(self):
         """ページが完全に読み込まれることを確認"""
         try:
@@ -69,16 +97,9 @@ class GurunaviAddressExtractor:
                 self.logger.error("Driver is None in _ensure_page_loaded")
                 return
             
-            # JavaScriptの読み込み完了を待つ
-            self.driver.execute_script("return document.readyState") == "complete"
-            
-            # スクロールして遅延読み込みをトリガー
-            self.driver.execute_script("window.scrollTo(0, 500);")
-            time.sleep(1)
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
+            # 店舗情報要素の出現まで待つ（出現した時点で終了）
+            if not self.page_ready:
+                self.readiness_waiter.wait_for(self.driver, DETAIL_READY_SELECTORS)
             
         except Exception as e:
             self.logger.warning(f"ページ読み込み確認エラー: {e}")
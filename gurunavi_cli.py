@@ -0,0 +1,317 @@
+"""
+ぐるなび店舗情報取得 バッチ実行（GUIなし）
+ジョブファイルの検索条件を順番または並行に処理し、進捗をJSON Linesで標準出力に出力
+
+使い方:
+    python gurunavi_cli.py jobs.json [--config config.json] [--concurrency 2] [--no-resume]
+
+ジョブファイル（JSON）:
+    {
+      "defaults": {"save_path": "output", "max_count": 100},
+      "jobs": [
+        {"prefecture": "東京都", "city": "渋谷", "max_count": 200},
+        {"prefecture": "大阪府", "unlimited": true, "filename": "osaka_all"}
+      ]
+    }
+    ジョブの配列だけを書いた形式も可
+"""
+
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import multiprocessing
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from app_config import load_config
+from prefecture_mapper import PrefectureMapper
+from chrome_driver_manager import ChromeDriverManager
+from scraper_engine import ImprovedScraperEngine
+from run_checkpoint import RunCheckpoint
+from scrape_flow import run_search, RUN_INTERRUPTED, RUN_NO_CHANGES, RUN_URL_ONLY
+
+JOB_DEFAULTS = {
+    'city': '',
+    'max_count': 100,
+    'unlimited': False,
+    'url_only': False
+}
+
+
+class JobFileError(Exception):
+    """ジョブファイルの形式・内容の誤り"""
+
+
+def load_jobs(job_file, prefecture_mapper, default_save_path='output'):
+    """
+    ジョブファイルを読み込み、検索条件のリストを返す
+
+    Returns:
+        list: GUIの get_search_params() と同じ形式の検索条件
+    """
+    with open(job_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        defaults, entries = {}, data
+    else:
+        defaults, entries = data.get('defaults', {}), data.get('jobs', [])
+    if not entries:
+        raise JobFileError(f"ジョブがありません: {job_file}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    jobs = []
+    for number, entry in enumerate(entries, 1):
+        params = dict(JOB_DEFAULTS, save_path=default_save_path)
+        params.update(defaults)
+        params.update(entry)
+
+        prefecture = params.get('prefecture')
+        if not prefecture_mapper.is_valid_prefecture(prefecture):
+            raise JobFileError(f"ジョブ{number}: 未対応の都道府県: {prefecture}")
+        if params['city'] and not prefecture_mapper.is_valid_city(prefecture, params['city']):
+            raise JobFileError(f"ジョブ{number}: {prefecture} に無いエリア: {params['city']}")
+
+        params['max_count'] = int(params['max_count'])
+        params['unlimited'] = bool(params['unlimited'])
+        params['city'] = params['city'] or ''
+        if not params.get('filename'):
+            # GUIの自動ファイル名と同じ規則（同時刻の重複を避けるためジョブ番号を付与）
+            safe_area = params['city'].replace('・', '_').replace('（', '').replace('）', '').replace(' ', '')
+            area = safe_area or 'stores'
+            params['filename'] = f"{prefecture}_{area}_{timestamp}_{number:02d}"
+        jobs.append(params)
+
+    return jobs
+
+
+class JsonLinesReporter:
+    """進捗をJSON Linesで出力するクラス（複数ジョブから同時に呼ばれる）"""
+
+    def __init__(self, stream=None, stats_interval=10.0):
+        """
+        Args:
+            stream: 出力先（省略時は標準出力）
+            stats_interval (float): 処理統計を含める間隔（秒）。毎件の出力を小さく保つ
+        """
+        self.stream = stream or sys.stdout
+        self.stats_interval = stats_interval
+        self._lock = threading.Lock()
+        self._last_stats = {}
+
+    def emit(self, event, **fields):
+        record = {'time': datetime.now().isoformat(timespec='seconds'), 'event': event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def progress_callback(self, job_index):
+        """エンジンの進捗コールバック"""
+        def callback(data):
+            fields = {key: value for key, value in data.items() if key not in ('stats', 'stats_text')}
+            now = time.monotonic()
+            if 'stats' in data and now - self._last_stats.get(job_index, 0) >= self.stats_interval:
+                self._last_stats[job_index] = now
+                fields['stats'] = data['stats']
+            self.emit('progress', job=job_index, **fields)
+        return callback
+
+
+class BatchRunner:
+    """ジョブを順番または並行に実行するクラス"""
+
+    def __init__(self, config, jobs, concurrency=1, resume=True, reporter=None, logger=None):
+        """
+        Args:
+            config (dict): GUIと同じ設定（config.json）
+            jobs (list): load_jobs() の結果
+            concurrency (int): 同時に実行するジョブ数（アクセス間隔は全ジョブで共有）
+            resume (bool): 中断したジョブのチェックポイントがあれば続きから再開
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.config = config
+        self.jobs = jobs
+        self.concurrency = max(1, int(concurrency))
+        self.resume = resume
+        self.reporter = reporter or JsonLinesReporter()
+        self.prefecture_mapper = PrefectureMapper()
+
+        self.stop_requested = False
+        self._budget = None
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def run(self):
+        """
+        全ジョブを実行
+
+        Returns:
+            list: ジョブごとの結果 {'job', 'status', ...}
+        """
+        started = time.time()
+        self.reporter.emit('batch_start', jobs=len(self.jobs), concurrency=self.concurrency)
+
+        if self.concurrency == 1:
+            results = [self._run_job(index, params) for index, params in enumerate(self.jobs, 1)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = list(executor.map(lambda item: self._run_job(*item), enumerate(self.jobs, 1)))
+
+        counts = {}
+        for result in results:
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+        self.reporter.emit('batch_complete', elapsed_time=round(time.time() - started, 1), results=counts)
+        return results
+
+    def stop(self):
+        """実行中のジョブを止める（取得済みの分はチェックポイントから再開可能）"""
+        self.stop_requested = True
+        with self._lock:
+            engines = list(self._engines.values())
+        for engine in engines:
+            engine.request_stop()
+
+    def _create_engine(self, job_index):
+        with self._lock:
+            engine = ImprovedScraperEngine(
+                chrome_manager=ChromeDriverManager(),
+                prefecture_mapper=self.prefecture_mapper,
+                config=dict(self.config),
+                callback=self.reporter.progress_callback(job_index),
+                budget=self._budget
+            )
+            # 同時実行するジョブ全体でサイトへのリクエスト間隔を共有
+            if self._budget is None:
+                self._budget = engine.politeness_budget
+            self._engines[job_index] = engine
+            return engine
+
+    def _resume_state(self, params):
+        """同じ検索条件のチェックポイントがあれば再開用の状態を返す"""
+        checkpoint = RunCheckpoint.for_output(params['save_path'], params['filename'])
+        state = checkpoint.load()
+        if not state or not checkpoint.matches(state, params):
+            return None
+        if self.resume:
+            return state
+        checkpoint.delete()
+        return None
+
+    def _run_job(self, job_index, params):
+        base = {'job': job_index, 'prefecture': params['prefecture'], 'city': params['city']}
+        if self.stop_requested:
+            self.reporter.emit('job_skipped', **base)
+            return dict(base, status='skipped')
+
+        started = time.time()
+        engine = None
+        try:
+            engine = self._create_engine(job_index)
+            resume_state = self._resume_state(params)
+            self.reporter.emit(
+                'job_start', **base,
+                max_count=None if params['unlimited'] else params['max_count'],
+                filename=params['filename'],
+                resumed=resume_state is not None
+            )
+            result = self._execute(engine, params, resume_state)
+        except Exception as e:
+            self.logger.exception(f"ジョブ{job_index} エラー: {e}")
+            result = {'status': 'error', 'error': str(e)}
+        finally:
+            if engine:
+                engine.cleanup()
+                with self._lock:
+                    self._engines.pop(job_index, None)
+
+        result = dict(base, **result, elapsed_time=round(time.time() - started, 1))
+        self.reporter.emit('job_' + result['status'], **{k: v for k, v in result.items() if k != 'status'})
+        return result
+
+    def _execute(self, engine, params, resume_state):
+        """1ジョブ分の処理（GUIと共通の scrape_flow.run_search）"""
+        outcome = run_search(engine, params, resume_state, should_stop=lambda: self.stop_requested, logger=self.logger)
+
+        if outcome['status'] == RUN_INTERRUPTED:
+            return {'status': 'interrupted', 'stores': outcome['store_count']}
+        if outcome['status'] == RUN_NO_CHANGES:
+            return {'status': 'complete', 'stores': 0, 'diff': outcome['diff']}
+        if outcome['status'] == RUN_URL_ONLY:
+            return {'status': 'complete', 'stores': outcome['store_count'], 'output': outcome['output']}
+        return {
+            'status': 'complete',
+            'stores': outcome['store_count'],
+            'successful': engine.stats['successful_stores'],
+            'failed': engine.stats['failed_stores'],
+            'output': outcome['output'],
+            'stats': engine.get_processing_stats()
+        }
+
+
+def setup_logging(log_file, verbose=False):
+    """ログはファイルと標準エラーへ（標準出力は進捗のJSON Lines専用）"""
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler(sys.stderr)
+        ]
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ぐるなび店舗情報取得（バッチ実行）")
+    parser.add_argument('job_file', help='ジョブファイル（JSON）')
+    parser.add_argument('--config', default='config.json', help='設定ファイル（GUIと共通）')
+    parser.add_argument('--concurrency', type=int, default=1, help='同時に実行するジョブ数')
+    parser.add_argument('--no-resume', action='store_true', help='中断したジョブも最初からやり直す')
+    parser.add_argument('--save-path', help='保存先の既定値（ジョブファイルの指定が優先）')
+    parser.add_argument('--log-file', default='scraper.log')
+    parser.add_argument('--stats-interval', type=float, default=10.0, help='進捗に処理統計を含める間隔（秒）')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    setup_logging(args.log_file, args.verbose)
+    logger = logging.getLogger(__name__)
+    config = load_config(args.config, logger)
+    reporter = JsonLinesReporter(stats_interval=args.stats_interval)
+
+    try:
+        jobs = load_jobs(args.job_file, PrefectureMapper(), args.save_path or config.get('last_save_path', 'output'))
+    except (OSError, ValueError, JobFileError) as e:
+        reporter.emit('batch_error', error=str(e))
+        return 2
+
+    runner = BatchRunner(
+        config, jobs,
+        concurrency=args.concurrency,
+        resume=not args.no_resume,
+        reporter=reporter,
+        logger=logger
+    )
+
+    def handle_signal(signum, frame):
+        logger.warning(f"停止シグナルを受信しました ({signum})")
+        runner.stop()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle_signal)
+
+    results = runner.run()
+    if runner.stop_requested:
+        return 130
+    return 0 if all(result['status'] == 'complete' for result in results) else 1
+
+
+if __name__ == "__main__":
+    # 解析プロセスプール（parse_workers）を凍結した実行ファイルから起動するため最初に呼ぶ
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -8,6 +8,8 @@ from selenium.common.exceptions import NoSuchElementException
 import re
 import logging
 
+from extraction_bundle import run_extraction_bundle, name_from_title
+
 class GurunaviLabelBasedExtractor:
     """ラベルベースでぐるなび店舗情報を抽出するクラス"""
     
@@ -29,12 +31,16 @@ class GurunaviLabelBasedExtractor:
                 '取得日時': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             
-            # 店舗名を取得
-            detail['店舗名'] = self._extract_shop_name()
-            
-            # 電話番号を取得してクリーニング
-            raw_phone = self._extract_phone_by_label()
-            detail['電話番号'] = self._clean_phone_number(raw_phone)
+            # 全項目を1回のスクリプト実行で取得
+            bundle = run_extraction_bundle(self.driver, self.logger)
+            if bundle:
+                detail.update(self._extract_fields_from_bundle(bundle))
+            else:
+                # 一括抽出が失敗した場合は項目別に取得
+                detail['店舗名'] = self._extract_shop_name()
+                
+                raw_phone = self._extract_phone_by_label()
+                detail['電話番号'] = self._clean_phone_number(raw_phone)
             
             return detail
             
@@ -86,6 +92,30 @@ class GurunaviLabelBasedExtractor:
         except:
             return raw_text
     
+    def _extract_fields_from_bundle(self, bundle):
+        """一括抽出結果から店舗名・電話番号（ラベルベース）を取得"""
+        name = None
+        for text in bundle.get('h1_texts') or []:
+            if not any(word in text for word in ['ぐるなび', '検索', 'ログイン']):
+                name = text
+                break
+        if not name:
+            name = name_from_title(bundle.get('title')) or '-'
+        
+        phone = '-'
+        label_phone = bundle.get('label_phone') or {}
+        if self._is_valid_phone_number(label_phone.get('value')):
+            phone = label_phone['value']
+        else:
+            phone_match = re.search(r'(\d{2,4}[-\s]?\d{2,4}[-\s]?\d{3,4})', label_phone.get('raw') or '')
+            if phone_match and self._is_valid_phone_number(phone_match.group(1)):
+                phone = phone_match.group(1)
+        
+        return {
+            '店舗名': name,
+            '電話番号': self._clean_phone_number(phone)
+        }
+    
     def _extract_shop_name(self):
         """店舗名を抽出"""
         try:
@@ -11,16 +11,26 @@ import re
 import time
 import logging
 
+from page_readiness import PageReadinessWaiter, DETAIL_READY_SELECTORS
+from extraction_bundle import run_extraction_bundle, name_from_title
+
 class GurunaviMultiApproachExtractor:
     """改善版ぐるなび店舗情報抽出クラス（ヘッダー対応）"""
     
-    def __init__(self, driver, logger=None):
+    def __init__(self, driver, logger=None, readiness_waiter=None, page_ready=False):
+        """
+        Args:
+            readiness_waiter (PageReadinessWaiter): 呼び出し元と共有する待機（待機時間の統計を1か所に集計）
+            page_ready (bool): 呼び出し元で読み込み完了を待機済みの場合True（二重に待たない）
+        """
         self.driver = driver
         self.logger = logger or logging.getLogger(__name__)
         # driver が None でないことを確認
         if self.driver is None:
             raise ValueError("Driver cannot be None")
         self.wait = WebDriverWait(driver, 15)
+        self.readiness_waiter = readiness_waiter or PageReadinessWaiter(logger=self.logger)
+        self.page_ready = page_ready
     
     def extract_store_data_multi(self, url):
         """店舗データを抽出（4項目のみ）"""
@@ -43,11 +53,16 @@ class GurunaviMultiApproachExtractor:
             # ページが完全に読み込まれるのを待つ
             self._ensure_page_loaded()
             
-            # 店舗名を取得（ヘッダー優先）
-            detail['店舗名'] = self._extract_shop_name_with_header()
-            
-            # 電話番号を取得してクリーニング（ヘッダー優先）
-            raw_phone = self._extract_phone_number_with_header()
+            # 全項目を1回のスクリプト実行で取得
+            bundle = run_extraction_bundle(self.driver, self.logger)
+            if bundle:
+                fields = self._extract_fields_from_bundle(bundle)
+                detail['店舗名'] = fields['店舗名']
+                raw_phone = fields['電話番号']
+            else:
+                # 一括抽出が失敗した場合は項目別に取得（ヘッダー優先）
+                detail['店舗名'] = self._extract_shop_name_with_header()
+                raw_phone = self._extract_phone_number_with_header()
             
             # 生データログ出力
             if raw_phone and raw_phone != '-':
@@ -74,18 +89,11 @@ class GurunaviMultiApproachExtractor:
                 self.logger.error("Driver is None in _ensure_page_loaded")
                 return
                 
-            # 1. JavaScriptの読み込み完了を待つ
-            self.driver.execute_script("return document.readyState") == "complete"
-            
-            # 2. スクロールして遅延読み込みをトリガー
-            self.driver.execute_script("window.scrollTo(0, 500);")
-            time.sleep(1)
-            self.driver.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(1)
-            
-            # 3. アコーディオンが存在する場合は展開を試みる
+            # 1. 店舗情報要素の出現まで待つ（出現した時点で終了）
+            if not self.page_ready:
+                self.readiness_waiter.wait_for(self.driver, DETAIL_READY_SELECTORS)
+            
+            # 2. アコーディオンが存在する場合は展開を試みる
             self._try_expand_accordions()
             
         except Exception as e:
@@ -113,6 +121,25 @@ class GurunaviMultiApproachExtractor:
         except Exception as e:
             self.logger.debug(f"アコーディオン展開試行: {e}")
     
+    def _extract_fields_from_bundle(self, bundle):
+        """一括抽出結果から店舗名・電話番号（クリーニング前）を取得"""
+        name = bundle.get('name')
+        if not name or 'ぐるなび' in name:
+            name = name_from_title(bundle.get('title')) or '-'
+        
+        phone = '-'
+        result = bundle.get('phone') or bundle.get('label_phone')
+        if result:
+            self.logger.info(f"電話番号取得成功 - ソース: {result.get('source', 'unknown')}")
+            value = result.get('value', '')
+            raw = result.get('raw') or value
+            if value and self._is_valid_phone_number(value):
+                phone = value
+            elif raw:
+                phone = self._extract_phone_from_raw(raw) or '-'
+        
+        return {'店舗名': name, '電話番号': phone}
+    
     def _extract_shop_name_with_header(self):
         """店舗名を取得（ヘッダー優先）"""
         try:
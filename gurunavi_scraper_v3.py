@@ -6,18 +6,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import multiprocessing
 import time
 from datetime import datetime
 import logging
 from pathlib import Path
-import json
-import pandas as pd
 
 # カスタムモジュール
 from prefecture_mapper import PrefectureMapper
 from chrome_driver_manager import ChromeDriverManager
 from ui_manager import UIManager
 from scraper_engine import ImprovedScraperEngine
+from run_checkpoint import RunCheckpoint
+from scrape_flow import run_search, RUN_INTERRUPTED, RUN_NO_CHANGES, RUN_URL_ONLY
+from app_config import load_config, save_config
 
 class GurunaviScraperApp:
     """メインアプリケーションクラス"""
@@ -69,44 +71,11 @@ class GurunaviScraperApp:
     
     def load_config(self):
         """設定読み込み"""
-        default_config = {
-            "cooltime_min": 2.0,
-            "cooltime_max": 4.0,
-            "ua_switch_interval": 15,
-            "retry_delay": 5.0,
-            "captcha_delay": 30.0,
-            "ip_limit_delay": 60.0,
-            "last_save_path": str(Path.home() / "Downloads"),
-            "user_agents": [
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-            ],
-            "time_zone_aware": {
-                "peak_hours": {"start": 12, "end": 13, "multiplier": 1.5},
-                "evening_hours": {"start": 18, "end": 20, "multiplier": 1.3},
-                "safe_hours": {"start": 23, "end": 6, "multiplier": 0.8}
-            }
-        }
-        
-        try:
-            if self.config_file.exists():
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-                    default_config.update(loaded_config)
-        except Exception as e:
-            self.logger.error(f"設定読み込みエラー: {e}")
-        
-        return default_config
+        return load_config(self.config_file, self.logger)
     
     def save_config(self):
         """設定保存"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
-            self.logger.info("設定保存完了")
-        except Exception as e:
-            self.logger.error(f"設定保存エラー: {e}")
+        save_config(self.config_file, self.config, self.logger)
     
     def get_estimated_time(self, store_count):
         """処理時間予測"""
@@ -143,6 +112,9 @@ class GurunaviScraperApp:
         if not self.validate_params(search_params):
             return
         
+        # 前回中断した処理の再開確認
+        resume_state = self.ask_resume(search_params)
+        
         # 処理時間の事前確認
         store_count = search_params['max_count'] if not search_params['unlimited'] else 100
         estimated_time = self.get_estimated_time(store_count)
@@ -167,11 +139,32 @@ class GurunaviScraperApp:
         # ワーカースレッド開始
         thread = threading.Thread(
             target=self.scraping_worker,
-            args=(search_params,)
+            args=(search_params, resume_state)
         )
         thread.daemon = True
         thread.start()
     
+    def ask_resume(self, search_params):
+        """同じ検索条件・保存先のチェックポイントがあれば再開するか確認"""
+        checkpoint = RunCheckpoint.for_output(search_params['save_path'], search_params['filename'])
+        state = checkpoint.load()
+        if not state or not checkpoint.matches(state, search_params):
+            return None
+        
+        done = len(state.get('completed_rows', []))
+        total = len(state['store_list'])
+        if messagebox.askyesno(
+            "処理の再開",
+            f"前回中断した処理が見つかりました\n\n"
+            f"保存日時: {state.get('saved_at', '-')}\n"
+            f"進捗: {done}/{total}件\n\n"
+            f"続きから再開しますか？\n（「いいえ」で最初からやり直します）"
+        ):
+            return state
+        
+        checkpoint.delete()
+        return None
+    
     def show_time_zone_warning(self, estimated_time):
         """時間帯警告表示"""
         current_hour = datetime.now().hour
@@ -219,13 +212,13 @@ class GurunaviScraperApp:
         
         return True
     
-    def scraping_worker(self, search_params):
-        """現実的処理時間対応スクレイピングワーカー（店舗一覧保存削除版）"""
+    def scraping_worker(self, search_params, resume_state=None):
+        """現実的処理時間対応スクレイピングワーカー（処理の流れは scrape_flow.run_search と共通）"""
         try:
             self.logger.info(f"スクレイピング開始: {search_params}")
             
             # 現実的なスクレイパーエンジンを使用
-            self.scraper_engine = ImprovedScraperEngine(
+            engine = self.scraper_engine = ImprovedScraperEngine(
                 chrome_manager=self.chrome_manager,
                 prefecture_mapper=self.prefecture_mapper,
                 config=self.config,
@@ -239,144 +232,83 @@ class GurunaviScraperApp:
                 'progress': 0
             })
             
-            # 店舗一覧取得
-            store_list = self.scraper_engine.get_store_list(
-                prefecture=search_params['prefecture'],
-                city=search_params['city'],
-                max_count=search_params['max_count'],
-                unlimited=search_params['unlimited']
+            def on_details_start(total_stores):
+                # フェーズ2: 現実的な処理時間での店舗詳細取得
+                estimated_time = self.get_estimated_time(total_stores)
+                self.update_progress({
+                    'phase': 'detail',
+                    'message': f'店舗詳細取得開始 (予想時間: {estimated_time:.0f}分)',
+                    'progress': 50,
+                    'estimated_completion': estimated_time
+                })
+            
+            outcome = run_search(
+                engine, search_params, resume_state,
+                should_stop=lambda: not self.is_running,
+                on_details_start=on_details_start,
+                logger=self.logger
             )
+            self.scraped_stores = outcome['results']
+            elapsed_time = time.time() - self.start_time
             
-            if not store_list:
-                raise Exception("店舗一覧の取得に失敗しました")
+            if outcome['status'] == RUN_INTERRUPTED:
+                self.handle_interruption(search_params)
             
-            self.logger.info(f"店舗一覧取得完了: {len(store_list)}件")
+            elif outcome['status'] == RUN_NO_CHANGES:
+                self.update_progress({
+                    'phase': 'complete',
+                    'message': f"差分なし: {outcome['diff']}",
+                    'progress': 100,
+                    'elapsed_time': elapsed_time
+                })
+                messagebox.showinfo(
+                    "完了",
+                    f"前回から追加・変更された店舗はありません\n\n"
+                    f"{outcome['diff']}\n"
+                    f"結果ファイル: {search_params['filename']}.xlsx"
+                )
             
-            # URL取得のみオプション
-            if search_params.get('url_only', False):
-                # URL取得のみの場合も6項目形式で保存
-                url_data = []
-                for store in store_list:
-                    url_data.append({
-                        'URL': store['url'],
-                        '店舗名': store['name'],
-                        '電話番号': '-',
-                        '郵便番号': '-',
-                        '住所': '-',
-                        '取得日時': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                
-                # 保存
-                save_dir = Path(search_params['save_path'])
-                save_dir.mkdir(parents=True, exist_ok=True)
-                filename = search_params['filename']
-                if not filename.endswith('.xlsx'):
-                    filename += '.xlsx'
-                full_path = save_dir / filename
-                
-                df = pd.DataFrame(url_data)
-                with pd.ExcelWriter(full_path, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='店舗情報', index=False)
-                    
-                    # 列幅調整
-                    worksheet = writer.sheets['店舗情報']
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-                
+            elif outcome['status'] == RUN_URL_ONLY:
                 self.update_progress({
                     'phase': 'complete',
-                    'message': f'URL取得完了: {len(store_list)}件',
+                    'message': f"URL取得完了: {outcome['store_count']}件",
                     'progress': 100,
-                    'elapsed_time': time.time() - self.start_time
+                    'elapsed_time': elapsed_time
                 })
-                
                 messagebox.showinfo(
                     "完了",
                     f"店舗URL取得が完了しました\n\n"
-                    f"取得件数: {len(store_list)}件\n"
-                    f"処理時間: {(time.time() - self.start_time):.1f}秒\n"
-                    f"保存ファイル: {filename}"
+                    f"取得件数: {outcome['store_count']}件\n"
+                    f"処理時間: {elapsed_time:.1f}秒\n"
+                    f"保存ファイル: {Path(outcome['output']).name}"
                 )
-                return
-            
-            # フェーズ2: 現実的な処理時間での店舗詳細取得
-            total_stores = len(store_list)
-            estimated_time = self.get_estimated_time(total_stores)
-            
-            # 詳細処理開始のメッセージ
-            self.update_progress({
-                'phase': 'detail',
-                'message': f'店舗詳細取得開始 (予想時間: {estimated_time:.0f}分)',
-                'progress': 50,
-                'estimated_completion': estimated_time
-            })
             
-            try:
-                # 現実的なスクレイパーで処理開始
-                self.scraped_stores = self.scraper_engine.start_processing(
-                    store_list, search_params
-                )
+            else:
+                # 完了統計
+                stats = engine.get_processing_stats()
+                success_count = engine.stats['successful_stores']
                 
-                # 処理完了
-                if self.scraped_stores and self.is_running:
-                    self.update_progress({
-                        'phase': 'saving',
-                        'message': '最終結果を保存中...',
-                        'progress': 100
-                    })
-                    
-                    # 最終保存
-                    self.scraper_engine.save_results(
-                        self.scraped_stores,
-                        search_params['save_path'],
-                        search_params['filename']
-                    )
-                    
-                    # 完了統計
-                    elapsed_time = time.time() - self.start_time
-                    stats = self.scraper_engine.get_processing_stats()
-                    success_count = self.scraper_engine.stats['successful_stores']
-                    
-                    self.update_progress({
-                        'phase': 'complete',
-                        'message': f'完了: {len(self.scraped_stores)}件取得',
-                        'progress': 100,
-                        'elapsed_time': elapsed_time,
-                        'final_stats': stats
-                    })
-                    
-                    if self.is_running:
-                        # 詳細な完了メッセージ
-                        completion_msg = (
-                            f"スクレイピングが完了しました\n\n"
-                            f"=== 処理結果 ===\n"
-                            f"取得件数: {len(self.scraped_stores)}件\n"
-                            f"成功件数: {success_count}件\n"
-                            f"失敗件数: {len(self.scraped_stores) - success_count}件\n"
-                            f"処理時間: {elapsed_time/60:.1f}分\n"
-                            f"平均時間/店舗: {elapsed_time/len(self.scraped_stores) if self.scraped_stores else 0:.1f}秒\n\n"
-                            f"結果ファイル: {search_params['filename']}.xlsx"
-                        )
-                        
-                        messagebox.showinfo("完了", completion_msg)
+                self.update_progress({
+                    'phase': 'complete',
+                    'message': f'完了: {len(self.scraped_stores)}件取得',
+                    'progress': 100,
+                    'elapsed_time': elapsed_time,
+                    'final_stats': stats
+                })
                 
-                elif not self.is_running:
-                    # 中断処理
-                    self.handle_interruption(search_params)
-            
-            except Exception as processing_error:
-                self.logger.error(f"詳細処理エラー: {processing_error}")
-                # エラー時でも取得済みデータを保存
-                self.handle_processing_error(processing_error, search_params)
+                # 詳細な完了メッセージ
+                completion_msg = (
+                    f"スクレイピングが完了しました\n\n"
+                    f"=== 処理結果 ===\n"
+                    f"取得件数: {len(self.scraped_stores)}件\n"
+                    f"成功件数: {success_count}件\n"
+                    f"失敗件数: {len(self.scraped_stores) - success_count}件\n"
+                    f"処理時間: {elapsed_time/60:.1f}分\n"
+                    f"平均時間/店舗: {elapsed_time/len(self.scraped_stores) if self.scraped_stores else 0:.1f}秒\n\n"
+                    f"結果ファイル: {search_params['filename']}.xlsx"
+                )
+                
+                messagebox.showinfo("完了", completion_msg)
             
         except Exception as e:
             self.logger.error(f"スクレイピングエラー: {e}")
@@ -420,30 +352,13 @@ class GurunaviScraperApp:
                     "中断",
                     f"処理が中断されました\n\n"
                     f"取得済み件数: {partial_count}件\n"
-                    f"結果ファイル: {filename}.xlsx"
+                    f"結果ファイル: {filename}.xlsx\n\n"
+                    f"同じ条件で再度開始すると続きから再開できます"
                 )
             
         except Exception as e:
             self.logger.error(f"中断処理エラー: {e}")
     
-    def handle_processing_error(self, error, search_params):
-        """処理エラー時の対応"""
-        try:
-            if hasattr(self, 'scraped_stores') and self.scraped_stores:
-                self.save_error_results(search_params)
-                error_msg = (
-                    f"処理中にエラーが発生しました:\n{str(error)}\n\n"
-                    f"取得済みデータ: {len(self.scraped_stores)}件\n"
-                    f"エラーファイル: {search_params['filename']}_error.xlsx に保存されました"
-                )
-            else:
-                error_msg = f"処理中にエラーが発生しました:\n{str(error)}"
-            
-            messagebox.showerror("処理エラー", error_msg)
-            
-        except Exception as e:
-            self.logger.error(f"エラー処理中の例外: {e}")
-    
     def save_error_results(self, search_params):
         """エラー時結果保存"""
         try:
@@ -522,4 +437,6 @@ def main():
         messagebox.showerror("起動エラー", f"アプリケーション起動失敗:\n{e}")
 
 if __name__ == "__main__":
+    # 解析プロセスプール（parse_workers）を凍結した実行ファイルから起動するため最初に呼ぶ
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""
+HTTP版ぐるなび店舗詳細取得
+Chromeを使わずにサーバーレンダリング済みHTMLから6項目を取得
+"""
+
+import re
+import logging
+from datetime import datetime
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+from gurunavi_address_extractor import GurunaviAddressExtractor
+
+HTTP_FETCH_AVAILABLE = REQUESTS_AVAILABLE and LXML_AVAILABLE
+
+# innerText相当の改行を入れるブロック要素
+BLOCK_TAGS = {'p', 'div', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'dt', 'dd', 'dl', 'table', 'h1', 'h2', 'h3', 'h4', 'section'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+
+PHONE_LIKE_PATTERN = re.compile(r'\d{2,4}[-\s]?\d{2,4}[-\s]?\d{3,4}')
+POSTAL_PATTERN = re.compile(r'〒(\d{3}-\d{4})')
+POSTAL_STRIP_PATTERN = re.compile(r'〒\d{3}-\d{4}\s*')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _class_xpath(class_name):
+    """class属性に指定クラスを含む要素のXPath条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def inner_text(element):
+    """lxml要素からブラウザのinnerTextに近いテキストを取得"""
+    parts = []
+
+    def walk(el):
+        tag = el.tag if isinstance(el.tag, str) else ''
+        if tag in SKIP_TAGS:
+            return
+        if tag in BLOCK_TAGS or tag == 'br':
+            parts.append('\n')
+        if el.text and tag:
+            parts.append(WHITESPACE_PATTERN.sub(' ', el.text))
+        for child in el:
+            walk(child)
+            if child.tail:
+                parts.append(WHITESPACE_PATTERN.sub(' ', child.tail))
+        if tag in BLOCK_TAGS:
+            parts.append('\n')
+
+    walk(element)
+    lines = [line.strip() for line in ''.join(parts).split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+class GurunaviHtmlParser:
+    """店舗詳細HTMLの解析クラス（GurunaviAddressExtractorと同じ6項目を返す）"""
+
+    # 住所・電話番号の正規化はSelenium版と同一ロジックを使用
+    _clean_address = GurunaviAddressExtractor._clean_address
+    _clean_phone_number = GurunaviAddressExtractor._clean_phone_number
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+
+    def parse(self, html_text, url):
+        """
+        HTMLから店舗データを抽出
+
+        Returns:
+            dict: 6項目の店舗データ（主要項目が取れない場合はNone）
+        """
+        if not LXML_AVAILABLE:
+            raise ImportError("lxml をインストールしてください: pip install lxml")
+
+        try:
+            doc = lxml_html.fromstring(html_text)
+        except Exception as e:
+            self.logger.warning(f"HTML解析エラー: {url} - {e}")
+            return None
+
+        shop_name = self._extract_shop_name(doc)
+        phone = self._clean_phone_number(self._extract_phone_number(doc))
+        postal_and_address = self._extract_postal_and_address(doc)
+
+        # 店舗名も住所も取れない場合は解析失敗扱い（Seleniumにフォールバック）
+        if shop_name == '-' and postal_and_address['address'] == '-':
+            return None
+
+        return {
+            'URL': url,
+            '店舗名': shop_name,
+            '電話番号': phone,
+            '郵便番号': postal_and_address['postal_code'],
+            '住所': postal_and_address['address'],
+            '取得日時': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def _extract_shop_name(self, doc):
+        """店舗名を取得（ヘッダー → h1 → title）"""
+        for xpath in ("//*[@id='header-main-name']//a", "//h1"):
+            elements = doc.xpath(xpath)
+            if elements:
+                name = inner_text(elements[0])
+                if name and 'ぐるなび' not in name:
+                    return name
+                break
+
+        titles = doc.xpath('//title')
+        if titles:
+            title = (titles[0].text_content() or '').strip()
+            name = title.split(' - ')[0].split('｜')[0].strip()
+            if name and name != 'ぐるなび':
+                return name
+
+        return '-'
+
+    def _extract_phone_number(self, doc):
+        """電話番号を取得（ヘッダー → 青文字 → 電話番号らしい要素）"""
+        header_phone = doc.xpath(f"//*[@id='header-main-phone']//*[{_class_xpath('number')}]")
+        if header_phone:
+            return inner_text(header_phone[0])
+
+        candidates = [
+            f"//*[{_class_xpath('commonAccordion_content_item_desc')} and {_class_xpath('-blue')}] | //p[{_class_xpath('-blue')}]",
+            f"//*[contains(@class, 'phone') or contains(@class, 'tel') or {_class_xpath('number')}]"
+        ]
+        for xpath in candidates:
+            for element in doc.xpath(xpath):
+                text = inner_text(element)
+                if text and PHONE_LIKE_PATTERN.search(text):
+                    return text
+
+        return '-'
+
+    def _extract_postal_and_address(self, doc):
+        """郵便番号と住所を取得（テーブル → アコーディオン → addressクラス）"""
+        full_text = None
+
+        # 方法1: テーブル構造（旧レイアウト、#info-table等）
+        for th in doc.xpath('//th'):
+            if '住所' in inner_text(th):
+                td = th.getnext()
+                if td is not None:
+                    full_text = inner_text(td)
+                    break
+
+        # 方法2: commonAccordion構造（新レイアウト）
+        if full_text is None:
+            for item in doc.xpath(f"//*[{_class_xpath('commonAccordion_content_item')}]"):
+                title = item.xpath(f".//*[{_class_xpath('commonAccordion_content_item_title')}]")
+                if title and '住所' in inner_text(title[0]):
+                    desc = item.xpath(f".//*[{_class_xpath('commonAccordion_content_item_desc')}]")
+                    if desc:
+                        full_text = inner_text(desc[0]).replace('地図アプリで見る', '')
+                        break
+
+        # 方法3: addressクラス
+        if full_text is None:
+            for element in doc.xpath(f"//*[{_class_xpath('address')} or {_class_xpath('adr')} or contains(@class, 'address')]"):
+                text = inner_text(element)
+                if text and 'メール' not in text and 'URL' not in text:
+                    address = POSTAL_STRIP_PATTERN.sub('', text).split('\n')[0].strip()
+                    if len(address) > 5:
+                        full_text = text
+                        break
+
+        if full_text is None:
+            return {'postal_code': '-', 'address': '-'}
+
+        postal_match = POSTAL_PATTERN.search(full_text)
+        postal_code = postal_match.group(1) if postal_match else '-'
+        address = POSTAL_STRIP_PATTERN.sub('', full_text).split('\n')[0].strip()
+
+        return {'postal_code': postal_code, 'address': self._clean_address(address) or '-'}
+
+
+class GurunaviHttpDetailFetcher:
+    """requests.Sessionで店舗詳細ページを取得するクラス（keep-alive接続プール）"""
+
+    def __init__(self, user_agent=None, timeout=15, pool_size=4, logger=None):
+        if not HTTP_FETCH_AVAILABLE:
+            raise ImportError("requests と lxml をインストールしてください: pip install requests lxml")
+
+        self.logger = logger or logging.getLogger(__name__)
+        self.timeout = timeout
+        self.parser = GurunaviHtmlParser(self.logger)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'ja,en-US;q=0.8,en;q=0.6',
+            'Connection': 'keep-alive'
+        })
+        if user_agent:
+            self.set_user_agent(user_agent)
+
+    def set_user_agent(self, user_agent):
+        """User-Agentを切り替え（接続は維持）"""
+        self.session.headers['User-Agent'] = user_agent
+
+    def fetch_html(self, url):
+        """
+        ページHTMLを取得
+
+        Returns:
+            tuple: (ステータスコード, HTML文字列)
+        """
+        response = self.session.get(url, timeout=self.timeout)
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding
+        return response.status_code, response.text
+
+    def fetch_store_detail(self, url):
+        """
+        店舗詳細をHTTPで取得
+
+        Returns:
+            dict: 6項目の店舗データ（取得・解析失敗時はNone）
+        """
+        try:
+            status_code, html_text = self.fetch_html(url)
+        except requests.RequestException as e:
+            self.logger.warning(f"HTTP取得エラー: {url} - {e}")
+            return None
+
+        if status_code != 200:
+            self.logger.warning(f"HTTPステータス異常: {url} - {status_code}")
+            return None
+
+        return self.parser.parse(html_text, url)
+
+    def close(self):
+        """セッションを閉じる"""
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+
+# 使用例
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    fetcher = GurunaviHttpDetailFetcher()
+    for store_url in sys.argv[1:]:
+        print(fetcher.fetch_store_detail(store_url))
+    fetcher.close()
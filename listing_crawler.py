@@ -0,0 +1,248 @@
+"""
+店舗一覧ページの並列取得
+一覧ページをHTTPで先読みしつつ取得し、ページ順に店舗URLを返す
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from store_url_classifier import filter_store_urls
+from response_guard import RESPONSE_OK
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+LISTING_CRAWL_AVAILABLE = REQUESTS_AVAILABLE and LXML_AVAILABLE
+
+# 検索結果件数の表記（「検索結果 1,234件」「該当店舗数 1,234件」「1,234件中 1～30件」など）
+# 埋め込みJSONは検索結果の件数を表すキーのみ（"total" などの汎用キーは他のデータにも現れるため使わない）
+HIT_COUNT_PATTERNS = [
+    re.compile(r'(?:検索結果|該当(?:店舗)?(?:数)?|ヒット)\s*[:：]?\s*([\d,]+)\s*件'),
+    re.compile(r'([\d,]+)\s*件中'),
+    re.compile(r'"(?:totalCount|total_count|hitCount)"\s*:\s*(\d+)')
+]
+# 表示中の範囲（「1,234件中 1～30件」）。1ページ目の範囲の終わりが1ページあたりの件数
+PAGE_RANGE_PATTERN = re.compile(r'([\d,]+)\s*件中\s*([\d,]+)\s*[～〜~\-－]\s*([\d,]+)\s*件')
+# ページネーションのリンク（?p=N / &p=N）
+PAGE_PARAM_PATTERN = re.compile(r'[?&](?:amp;)?p=(\d+)')
+
+
+def parse_listing_summary(html_text, per_page=None):
+    """
+    一覧1ページ目のHTMLから検索結果件数と最終ページを取得
+
+    lxml不要（ブラウザのpage_sourceにも使用）
+
+    Args:
+        html_text (str): 一覧ページのHTML
+        per_page (int): サイトの1ページあたりの店舗数（件数からページ数を算出する場合に使用。
+            ページに表示範囲があればそちらを優先）
+
+    Returns:
+        dict: {'total_hits': 件数 or None, 'last_page': 最終ページ or None, 'per_page': 1ページあたりの件数}
+    """
+    total_hits = None
+    for pattern in HIT_COUNT_PATTERNS:
+        match = pattern.search(html_text)
+        if match:
+            total_hits = int(match.group(1).replace(',', ''))
+            break
+
+    # ページ内の店舗リンク数はPR枠なども含むため、1ページあたりの件数は表示範囲から読む
+    range_match = PAGE_RANGE_PATTERN.search(html_text)
+    if range_match:
+        total, first, last = (int(value.replace(',', '')) for value in range_match.groups())
+        if first == 1 and last < total:
+            per_page = last
+
+    pages = [int(page) for page in PAGE_PARAM_PATTERN.findall(html_text)]
+    last_page = max(pages) if pages else None
+
+    if total_hits is not None and per_page:
+        pages_by_count = max(1, math.ceil(total_hits / per_page))
+        # ページネーションは「…」で省略されることがあるため件数からの算出を優先
+        if last_page is None or pages_by_count > last_page:
+            last_page = pages_by_count
+    elif total_hits == 0:
+        last_page = 1
+
+    return {'total_hits': total_hits, 'last_page': last_page, 'per_page': per_page}
+
+
+class ListingPage:
+    """一覧ページ1ページ分の取得結果"""
+
+    def __init__(self, page_num, url, store_urls=None, html_text=None, error=None):
+        self.page_num = page_num
+        self.url = url
+        self.store_urls = store_urls or []
+        self.html_text = html_text
+        self.error = error
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+
+class GurunaviListingCrawler:
+    """一覧ページの並列取得クラス（アクセス間隔は全体で共有）"""
+
+    def __init__(self, budget, url_filter, user_agent=None, concurrency=3, timeout=15, guard=None, logger=None):
+        """
+        Args:
+            budget (PolitenessBudget): 全体で共有するアクセス間隔
+            url_filter (callable): url_filter(url) -> 店舗URLならTrue
+            user_agent (str): User-Agent
+            concurrency (int): 先読みするページ数
+            timeout (float): 1リクエストのタイムアウト（秒）
+            guard (ResponseGuard): CAPTCHA・IP制限の検出とバックオフ（省略時は判定しない）
+        """
+        if not LISTING_CRAWL_AVAILABLE:
+            raise ImportError("requests と lxml をインストールしてください: pip install requests lxml")
+
+        self.logger = logger or logging.getLogger(__name__)
+        self.budget = budget
+        self.url_filter = url_filter
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self.guard = guard
+        self.stop_requested = False
+
+        self._session_local = threading.local()
+        self._headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'ja,en-US;q=0.8,en;q=0.6',
+            'Connection': 'keep-alive'
+        }
+        if user_agent:
+            self._headers['User-Agent'] = user_agent
+        self._sessions = []
+
+    def _session(self):
+        """スレッドごとのkeep-aliveセッション"""
+        session = getattr(self._session_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+            session.headers.update(self._headers)
+            self._session_local.session = session
+            self._sessions.append(session)
+        return session
+
+    def fetch_page(self, page_num, url, cancelled=None):
+        """
+        一覧ページを1ページ取得して店舗URLを抽出
+
+        Returns:
+            ListingPage: 取得結果（通信エラー・ステータス異常時は error を設定）
+        """
+        while True:
+            if self.stop_requested:
+                return ListingPage(page_num, url, error='stopped')
+
+            self.budget.wait()
+            # 待機中に早期終了した場合はリクエストを送らない
+            if self.stop_requested or (cancelled is not None and cancelled.is_set()):
+                return ListingPage(page_num, url, error='stopped')
+
+            started = time.monotonic()
+            try:
+                response = self._session().get(url, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.logger.warning(f"一覧ページ取得エラー: {url} - {e}")
+                self.budget.record_error()
+                return ListingPage(page_num, url, error=str(e))
+
+            if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+                response.encoding = response.apparent_encoding
+            html_text = response.text
+
+            if self.guard is not None:
+                outcome, retry = self.guard.inspect(
+                    url, response.status_code, html_text, elapsed=time.monotonic() - started
+                )
+                if retry:
+                    continue
+                if outcome != RESPONSE_OK:
+                    return ListingPage(page_num, url, error=outcome)
+
+            if response.status_code != 200:
+                self.logger.warning(f"一覧ページのHTTPステータス異常: {url} - {response.status_code}")
+                return ListingPage(page_num, url, error=f"HTTP {response.status_code}")
+
+            return ListingPage(page_num, url, self.extract_store_urls(html_text, url), html_text)
+
+    def extract_store_urls(self, html_text, base_url):
+        """HTMLから店舗URLを抽出（ページ内の重複は除去、出現順を維持）"""
+        try:
+            doc = lxml_html.fromstring(html_text)
+        except Exception as e:
+            self.logger.warning(f"一覧ページ解析エラー: {base_url} - {e}")
+            return []
+
+        hrefs = (urljoin(base_url, href.strip()) for href in doc.xpath('//a/@href'))
+        return filter_store_urls(hrefs, self.url_filter)
+
+    def iter_pages(self, url_for_page, max_pages, first_page=1):
+        """
+        一覧ページを先読みしながらページ順に返す
+
+        呼び出し側がループを抜ける（目標件数到達・最終ページ検出）と未着手のページは取得しない。
+
+        Args:
+            url_for_page (callable): url_for_page(ページ番号) -> URL
+            max_pages (int): 最大ページ番号
+            first_page (int): 開始ページ番号
+
+        Yields:
+            ListingPage: ページ順の取得結果
+        """
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        cancelled = threading.Event()
+        futures = {}
+        next_submit = first_page
+
+        try:
+            for page_num in range(first_page, max_pages + 1):
+                while next_submit <= max_pages and next_submit < page_num + self.concurrency and not self.stop_requested:
+                    futures[next_submit] = executor.submit(
+                        self.fetch_page, next_submit, url_for_page(next_submit), cancelled
+                    )
+                    next_submit += 1
+
+                future = futures.pop(page_num, None)
+                if future is None:
+                    return
+                yield future.result()
+        finally:
+            cancelled.set()
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def stop(self):
+        """未着手のページ取得を中止"""
+        self.stop_requested = True
+
+    def close(self):
+        for session in self._sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        self._sessions = []
@@ -0,0 +1,114 @@
+"""
+一覧ページの店舗リンク抽出スクリプト
+店舗URLの判定とベースURL化をブラウザ内で行い、重複を除いた店舗URLだけをPythonに返す
+"""
+
+import json
+import logging
+
+from store_url_classifier import STORE_HOST, STORE_PATH_PATTERN
+
+# 判定パターンは store_url_classifier と共通（arguments[0] に渡す）
+STORE_LINK_SCRIPT = """
+const pattern = new RegExp(arguments[0], 'i');
+const host = arguments[1];
+const seen = new Set();
+const result = [];
+for (const link of document.querySelectorAll('a[href]')) {
+    if (!link.host || link.host.toLowerCase() !== host || link.username || link.password) {
+        continue;
+    }
+    const path = link.pathname.replace(/\\/+$/, '');
+    if (!pattern.test(path)) {
+        continue;
+    }
+    const baseUrl = link.protocol + '//' + host + '/' + path.split('/')[1];
+    if (!seen.has(baseUrl)) {
+        seen.add(baseUrl);
+        result.push(baseUrl);
+    }
+}
+return result;
+"""
+
+# 旧方式（全リンクをテキスト・タイトル付きで返す）
+ALL_LINKS_SCRIPT = """
+const links = Array.from(document.querySelectorAll('a[href]'));
+return links.map(link => ({
+    href: link.href,
+    text: link.textContent.trim(),
+    title: link.getAttribute('title') || ''
+}));
+"""
+
+
+def extract_store_base_urls(driver, store_host=STORE_HOST):
+    """
+    現在ページの店舗ベースURLをブラウザ内で抽出
+
+    Args:
+        store_host (str): 店舗ページのホスト名（ポート番号を含む場合はそれも一致させる）
+
+    Returns:
+        list: 重複を除いた店舗ベースURL（出現順）
+    """
+    return driver.execute_script(STORE_LINK_SCRIPT, STORE_PATH_PATTERN.pattern, store_host)
+
+
+def payload_bytes(value):
+    """WebDriverが返すJSONのおおよそのサイズ（バイト）"""
+    return len(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+
+def benchmark_payload(driver, urls, logger=None):
+    """
+    一覧1ページあたりのWebDriver応答サイズを旧方式と比較
+
+    Returns:
+        list: ページごとの {'url', 'before_bytes', 'after_bytes', 'links', 'stores'}
+    """
+    logger = logger or logging.getLogger(__name__)
+    results = []
+    for url in urls:
+        driver.get(url)
+        all_links = driver.execute_script(ALL_LINKS_SCRIPT)
+        store_urls = extract_store_base_urls(driver)
+        results.append({
+            'url': url,
+            'before_bytes': payload_bytes(all_links),
+            'after_bytes': payload_bytes(store_urls),
+            'links': len(all_links),
+            'stores': len(store_urls)
+        })
+        logger.debug(f"応答サイズ: {url} {results[-1]}")
+    return results
+
+
+# ベンチマーク
+if __name__ == "__main__":
+    import sys
+    from chrome_driver_manager import ChromeDriverManager
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if len(sys.argv) < 2:
+        print("使い方: python listing_link_script.py <一覧ページURL> [<一覧ページURL> ...]")
+        sys.exit(1)
+
+    manager = ChromeDriverManager()
+    bench_driver = manager.create_optimized_driver(headless=True)
+    try:
+        pages = benchmark_payload(bench_driver, sys.argv[1:])
+        print("一覧1ページあたりのWebDriver応答サイズ（旧方式 → ブラウザ内抽出）:")
+        for page in pages:
+            print(
+                f"  {page['url']}\n"
+                f"    {page['before_bytes']:,}バイト ({page['links']}リンク) → "
+                f"{page['after_bytes']:,}バイト ({page['stores']}店舗)"
+            )
+        if pages:
+            before = sum(page['before_bytes'] for page in pages) / len(pages)
+            after = sum(page['after_bytes'] for page in pages) / len(pages)
+            print(f"  平均: {before:,.0f}バイト → {after:,.0f}バイト")
+    finally:
+        manager.cleanup_driver(bench_driver)
@@ -0,0 +1,309 @@
+"""
+取得ページのアーカイブ
+取得した店舗詳細・一覧ページのHTMLを内容のハッシュで重複排除して圧縮保存し、
+抽出ロジックの修正後にサイトへアクセスせずアーカイブから再抽出する
+
+保存されるHTMLは取得経路によって異なる:
+    HTTP取得（http_detail_fetcher・一覧クローラー）: サーバーの応答そのもの
+    Selenium取得: JavaScript実行後の driver.page_source（DOMを直列化したもの。応答そのものではない）
+再抽出は GurunaviHtmlParser（HTTP取得と同じ解析）のみで行い、
+Seleniumの抽出（店舗名・電話番号・住所の各抽出器）は実行しない
+
+使い方:
+    python page_archive.py stats page_archive
+    python page_archive.py reextract page_archive output/reextract.xlsx [--workers 4] [--since 2026-10-01]
+"""
+
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import deque
+from urllib.parse import urlparse
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from result_journal import write_results_excel
+
+KIND_STORE = 'store'
+KIND_LISTING = 'listing'
+
+COMPRESSION_SUFFIXES = {'zstd': '.zst', 'gzip': '.gz'}
+
+
+def _compress(data, compression):
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def read_blob(path):
+    """圧縮済みHTMLを読み込み（圧縮形式は拡張子で判定）"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if str(path).endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstandard をインストールしてください: pip install zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        data = gzip.decompress(data)
+    return data.decode('utf-8', errors='replace')
+
+
+def store_id_from_url(url):
+    """店舗URLの店舗ID（https://r.gnavi.co.jp/abc1234/ → abc1234）"""
+    parts = urlparse(url).path.strip('/').split('/')
+    return parts[0] if parts and parts[0] else None
+
+
+class PageArchive:
+    """内容アドレス方式（SHA-256）の圧縮ページアーカイブクラス"""
+
+    def __init__(self, archive_dir, compression='zstd', logger=None):
+        """
+        Args:
+            archive_dir (str): 保存先（objects/ に本体、index.db に取得履歴）
+            compression (str): 'zstd'（未インストールの場合はgzip）または 'gzip'
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.archive_dir = Path(archive_dir)
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            compression = 'gzip'
+        self.compression = compression
+        self.stored = 0
+        self.deduplicated = 0
+
+        self._lock = threading.Lock()
+        (self.archive_dir / 'objects').mkdir(parents=True, exist_ok=True)
+        # 取得経路（ワーカースレッド・asyncio）から呼ばれるため共有接続をロックで保護
+        self.conn = sqlite3.connect(str(self.archive_dir / 'index.db'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                store_id TEXT,
+                kind TEXT NOT NULL,
+                status INTEGER,
+                content_hash TEXT NOT NULL,
+                blob TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_store ON pages (store_id, fetched_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_kind ON pages (kind, fetched_at)")
+        self.conn.commit()
+
+    def put(self, url, html_text, kind=KIND_STORE, status_code=None):
+        """
+        取得したページを保存（同じ内容の本体は1つだけ保存し、取得履歴は毎回記録）
+
+        Returns:
+            str: 内容のハッシュ（保存に失敗した場合はNone）
+        """
+        if not html_text:
+            return None
+
+        data = html_text.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        blob = f"objects/{content_hash[:2]}/{content_hash}.html{COMPRESSION_SUFFIXES[self.compression]}"
+        try:
+            written = self._write_blob(self.archive_dir / blob, data)
+            with self._lock:
+                if written:
+                    self.stored += 1
+                else:
+                    self.deduplicated += 1
+                self.conn.execute(
+                    "INSERT INTO pages (url, store_id, kind, status, content_hash, blob, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, store_id_from_url(url) if kind == KIND_STORE else None, kind, status_code,
+                     content_hash, blob, time.time())
+                )
+                self.conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            self.logger.warning(f"ページアーカイブ保存エラー: {url} - {e}")
+            return None
+        return content_hash
+
+    def _write_blob(self, path, data):
+        """本体を保存（既にある場合は書かない）"""
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_compress(data, self.compression))
+        os.replace(tmp_path, path)
+        return True
+
+    def read(self, blob):
+        """保存済みページのHTML"""
+        return read_blob(self.archive_dir / blob)
+
+    def latest_pages(self, kind=KIND_STORE, since=None):
+        """
+        店舗ID（一覧ページはURL）ごとに最後に取得したページ
+
+        Args:
+            since (float): この時刻（UNIX時間）以降に取得したページのみ
+
+        Returns:
+            list: {'url', 'store_id', 'blob', 'fetched_at'} のリスト（初回取得順）
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT url, store_id, blob, fetched_at, first_id FROM pages JOIN ("
+                "  SELECT MAX(id) AS last_id, MIN(id) AS first_id FROM pages"
+                "  WHERE kind = ? AND fetched_at >= ? GROUP BY COALESCE(store_id, url)"
+                ") ON id = last_id ORDER BY first_id",
+                (kind, since or 0)
+            ).fetchall()
+        return [{'url': url, 'store_id': store_id, 'blob': blob, 'fetched_at': fetched_at}
+                for url, store_id, blob, fetched_at, _ in rows]
+
+    def history(self, store_id):
+        """店舗の取得履歴（内容が変わったかはハッシュで比較できる）"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT url, content_hash, blob, fetched_at FROM pages WHERE store_id = ? ORDER BY fetched_at",
+                (store_id,)
+            ).fetchall()
+        return [{'url': url, 'content_hash': content_hash, 'blob': blob, 'fetched_at': fetched_at}
+                for url, content_hash, blob, fetched_at in rows]
+
+    def summary(self):
+        """保存件数と容量"""
+        with self._lock:
+            counts = dict(self.conn.execute("SELECT kind, COUNT(*) FROM pages GROUP BY kind").fetchall())
+            unique = self.conn.execute("SELECT COUNT(DISTINCT content_hash) FROM pages").fetchone()[0]
+        blob_bytes = sum(path.stat().st_size for path in (self.archive_dir / 'objects').rglob('*.html.*'))
+        return {'pages': counts, 'unique_contents': unique, 'compressed_mb': round(blob_bytes / 1024 / 1024, 2)}
+
+    def close(self):
+        with self._lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
+
+
+def _reextract_row(page, detail):
+    """再抽出結果の行（取得日時はページを取得した時点のもの）"""
+    fetched = datetime.fromtimestamp(page['fetched_at']).strftime('%Y-%m-%d %H:%M:%S')
+    if detail is None:
+        return {'URL': page['url'], '店舗名': '取得失敗', '電話番号': '-', '郵便番号': '-', '住所': '-', '取得日時': fetched}
+    detail['取得日時'] = fetched
+    return detail
+
+
+def _collect_reextracted(page, future):
+    """プールの解析結果を行にする"""
+    try:
+        detail = future.result() if future else None
+    except Exception:
+        detail = None
+    return _reextract_row(page, detail)
+
+
+def reextract(archive, workers=1, since=None, logger=None):
+    """
+    アーカイブの店舗ページを現在の抽出ロジックで再抽出（ネットワークにはアクセスしない）
+
+    解析は GurunaviHtmlParser のみ。Seleniumの抽出器はブラウザ上のDOMを操作するため実行せず、
+    Selenium取得で保存したページ（JavaScript実行後のHTML）もHTTP取得と同じ解析で再抽出する。
+    Seleniumの抽出器にしかない補完（住所の表示待ち・別要素からの電話番号など）は反映されない
+
+    Args:
+        archive (PageArchive): ページアーカイブ
+        workers (int): 解析プロセス数（1なら同一プロセス、2以上は parse_pool.ParsePool）
+        since (float): この時刻以降に取得したページのみ
+
+    Returns:
+        list: 出力カラムの辞書のリスト（URLごとに最新のページ）
+    """
+    from parse_pool import ParsePool
+    from http_detail_fetcher import GurunaviHtmlParser
+
+    logger = logger or logging.getLogger(__name__)
+    pages = archive.latest_pages(KIND_STORE, since)
+
+    def read_page(page):
+        try:
+            return archive.read(page['blob'])
+        except (OSError, ImportError) as e:
+            logger.warning(f"アーカイブ読み込みエラー: {page['url']} - {e}")
+            return None
+
+    started = time.perf_counter()
+    results = []
+    if workers > 1 and len(pages) > 1:
+        # 展開は本プロセス、解析はプール。展開済みHTMLを抱えすぎないよう投入数を絞る
+        with ParsePool(workers, logger=logger) as pool:
+            in_flight = deque()
+            for page in pages:
+                html_text = read_page(page)
+                in_flight.append((page, pool.submit(page['url'], html_text) if html_text else None))
+                while len(in_flight) > pool.workers * 8:
+                    results.append(_collect_reextracted(*in_flight.popleft()))
+            while in_flight:
+                results.append(_collect_reextracted(*in_flight.popleft()))
+    else:
+        parser = GurunaviHtmlParser(logger)
+        for page in pages:
+            html_text = read_page(page)
+            try:
+                detail = parser.parse(html_text, page['url']) if html_text else None
+            except Exception:
+                detail = None
+            results.append(_reextract_row(page, detail))
+
+    elapsed = time.perf_counter() - started
+    failed = sum(1 for row in results if row['店舗名'] == '取得失敗')
+    logger.info(
+        f"再抽出完了: {len(results)}件 (失敗 {failed}件) {elapsed:.1f}秒"
+        + (f" / {len(results) / elapsed:.0f}件/秒" if elapsed > 0 else "")
+    )
+    return results
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="取得ページのアーカイブ")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    stats_parser = subparsers.add_parser('stats', help='保存件数と容量を表示')
+    stats_parser.add_argument('archive_dir')
+    reextract_parser = subparsers.add_parser('reextract', help='アーカイブから店舗詳細を再抽出してExcelに保存')
+    reextract_parser.add_argument('archive_dir')
+    reextract_parser.add_argument('output', help='出力ファイル（.xlsx）')
+    reextract_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    reextract_parser.add_argument('--since', help='この日付以降に取得したページのみ（YYYY-MM-DD）')
+    args = parser.parse_args()
+
+    page_archive = PageArchive(args.archive_dir)
+    try:
+        if args.command == 'stats':
+            print(json.dumps(page_archive.summary(), ensure_ascii=False, indent=2))
+
+        elif args.command == 'reextract':
+            since = datetime.strptime(args.since, '%Y-%m-%d').timestamp() if args.since else None
+            rows = reextract(page_archive, args.workers, since)
+            write_results_excel(rows, args.output)
+            print(f"保存しました: {args.output} ({len(rows)}件)")
+    finally:
+        page_archive.close()
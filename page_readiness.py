@@ -0,0 +1,169 @@
+"""
+ページ読み込み完了待機
+固定スリープではなく、対象要素が出現した時点で待機を終了する
+"""
+
+import time
+import logging
+import threading
+
+# 店舗詳細ページで情報が揃ったと判断する要素
+DETAIL_READY_SELECTORS = [
+    '#info-table',
+    '.basic-table',
+    '.commonAccordion_content_item',
+    '#info-name'
+]
+
+# MutationObserverで対象要素の出現を待つ（execute_async_script用）
+READY_SCRIPT = """
+const selectors = arguments[0];
+const timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+const started = performance.now();
+let finished = false;
+let observer = null;
+
+function match() {
+    if (document.readyState === 'loading') {
+        return null;
+    }
+    for (const selector of selectors) {
+        if (document.querySelector(selector)) {
+            return selector;
+        }
+    }
+    return null;
+}
+
+function finish(selector) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    done({selector: selector, waited_ms: performance.now() - started});
+}
+
+const first = match();
+if (first) {
+    finish(first);
+} else {
+    observer = new MutationObserver(() => {
+        const selector = match();
+        if (selector) {
+            finish(selector);
+        }
+    });
+    observer.observe(document.documentElement || document, {childList: true, subtree: true});
+    document.addEventListener('DOMContentLoaded', () => {
+        const selector = match();
+        if (selector) {
+            finish(selector);
+        }
+    });
+    // 遅延読み込みを誘発
+    window.scrollTo(0, Math.floor(document.body ? document.body.scrollHeight / 2 : 1000));
+    setTimeout(() => finish(null), timeoutMs);
+}
+"""
+
+POLL_SCRIPT = """
+const selectors = arguments[0];
+if (document.readyState === 'loading') {
+    return null;
+}
+for (const selector of selectors) {
+    if (document.querySelector(selector)) {
+        return selector;
+    }
+}
+return null;
+"""
+
+
+class PageReadinessWaiter:
+    """対象要素の出現を待つクラス（待機時間の統計付き）"""
+
+    def __init__(self, timeout=10.0, poll_interval=0.1, logger=None):
+        """
+        Args:
+            timeout (float): 最大待機時間（秒）
+            poll_interval (float): execute_async_scriptが使えない場合のポーリング間隔（秒）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # プールモードでは複数のワーカースレッドから共有される
+        self._lock = threading.Lock()
+        self.stats = {
+            'pages': 0,
+            'total_wait': 0.0,
+            'max_wait': 0.0,
+            'last_wait': 0.0,
+            'timeouts': 0
+        }
+
+    def wait_for(self, driver, selectors=None):
+        """
+        対象要素のいずれかが出現するまで待機
+
+        Returns:
+            str: 一致したセレクタ（タイムアウト時はNone）
+        """
+        selectors = list(selectors or DETAIL_READY_SELECTORS)
+        started = time.perf_counter()
+
+        try:
+            result = driver.execute_async_script(READY_SCRIPT, selectors, int(self.timeout * 1000))
+            matched = result.get('selector') if result else None
+        except Exception as e:
+            self.logger.debug(f"非同期待機スクリプト失敗、ポーリングで待機: {e}")
+            matched = self._poll(driver, selectors, started)
+
+        if matched:
+            # 遅延読み込み誘発のスクロールを戻す
+            try:
+                driver.execute_script("window.scrollTo(0, 0);")
+            except Exception:
+                pass
+
+        waited = time.perf_counter() - started
+        self._record(waited, matched)
+        return matched
+
+    def _poll(self, driver, selectors, started):
+        """readyStateとセレクタをポーリング"""
+        while time.perf_counter() - started < self.timeout:
+            try:
+                matched = driver.execute_script(POLL_SCRIPT, selectors)
+                if matched:
+                    return matched
+            except Exception as e:
+                self.logger.debug(f"読み込み待機ポーリングエラー: {e}")
+            time.sleep(self.poll_interval)
+        return None
+
+    def _record(self, waited, matched):
+        with self._lock:
+            self.stats['pages'] += 1
+            self.stats['total_wait'] += waited
+            self.stats['last_wait'] = waited
+            self.stats['max_wait'] = max(self.stats['max_wait'], waited)
+            if not matched:
+                self.stats['timeouts'] += 1
+
+        if matched:
+            self.logger.debug(f"ページ準備完了: {matched} ({waited:.2f}秒)")
+        else:
+            self.logger.warning(f"ページ準備待機タイムアウト ({waited:.1f}秒)")
+
+    @property
+    def average_wait(self):
+        """1ページあたりの平均待機時間（秒）"""
+        with self._lock:
+            if self.stats['pages'] == 0:
+                return 0.0
+            return self.stats['total_wait'] / self.stats['pages']
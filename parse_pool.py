@@ -0,0 +1,211 @@
+"""
+プロセスプールによる店舗詳細HTMLの解析
+取得（I/O）と解析（lxml・正規表現・住所/電話番号の正規化）を分離し、
+解析をGILの外の別プロセスで行う。取得したHTMLは文字列のままワーカーに渡す
+（一時ファイル経由で渡す方式との比較はベンチマークの pool-file）。
+
+ベンチマーク:
+    python parse_pool.py bench [corpus_dir] [--workers 1 2 4] [--pages 400]
+"""
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+import itertools
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from http_detail_fetcher import GurunaviHtmlParser, LXML_AVAILABLE
+
+PARSE_POOL_AVAILABLE = LXML_AVAILABLE
+
+# ワーカープロセスごとに1つだけ作成するパーサー
+_worker_parser = None
+
+
+def _init_worker():
+    global _worker_parser
+    _worker_parser = GurunaviHtmlParser(logging.getLogger(__name__))
+
+
+def parse_html(html_text, url):
+    """
+    取得したHTMLを解析（ワーカープロセスで実行）
+
+    Returns:
+        dict: 店舗データ（解析失敗時はNone）
+    """
+    parser = _worker_parser or GurunaviHtmlParser(logging.getLogger(__name__))
+    return parser.parse(html_text, url)
+
+
+def parse_file(path, url):
+    """
+    保存済みHTMLを解析（ワーカープロセスで実行）
+
+    Args:
+        path (str): HTMLファイルのパス
+        url (str): 店舗URL
+
+    Returns:
+        dict: 店舗データ（解析失敗時はNone）
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        html_text = f.read()
+    return parse_html(html_text, url)
+
+
+def _parse_file_item(item):
+    path, url = item
+    return parse_file(path, url)
+
+
+class ParsePool:
+    """店舗詳細HTMLの解析を別プロセスで行うクラス"""
+
+    def __init__(self, workers=None, logger=None):
+        """
+        Args:
+            workers (int): 解析プロセス数（省略時はCPUコア数）
+        """
+        if not PARSE_POOL_AVAILABLE:
+            raise ImportError("lxml をインストールしてください: pip install lxml")
+
+        self.logger = logger or logging.getLogger(__name__)
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        self.submitted = 0
+
+    def submit(self, url, html_text):
+        """
+        取得したHTMLの解析を依頼
+
+        Returns:
+            concurrent.futures.Future: 店舗データ（解析失敗時はNone）
+        """
+        self.submitted += 1
+        return self.executor.submit(parse_html, html_text, url)
+
+    def parse_files(self, items, chunksize=16):
+        """
+        保存済みHTMLをまとめて解析（記録済みページの再解析・ベンチマーク用）
+
+        Args:
+            items (list): (HTMLファイルのパス, 店舗URL) のリスト
+            chunksize (int): 1回にワーカーへ渡す件数
+
+        Returns:
+            iterator: 入力と同じ順の店舗データ
+        """
+        return self.executor.map(_parse_file_item, [(str(path), url) for path, url in items], chunksize=chunksize)
+
+    def close(self, cancel=False):
+        """プールを終了（cancel=Trueで未着手の解析を取り消す）"""
+        self.executor.shutdown(wait=True, cancel_futures=cancel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _benchmark_pages(corpus_dir, page_count, page_kb, work_dir):
+    """ベンチマーク用のページ（記録済みページ集、無ければ模擬サーバーのページを実サイト程度の大きさに水増し）"""
+    if corpus_dir:
+        from replay_server import FixtureCorpus
+
+        corpus = FixtureCorpus(corpus_dir)
+        pages = [(corpus.corpus_dir / page['file'], page['url']) for page in corpus.store_pages()]
+        return list(itertools.islice(itertools.cycle(pages), page_count)) if pages else []
+
+    from fake_gurunavi_server import FakeGurunaviServer
+
+    fake_server = FakeGurunaviServer(stores_per_area=page_count, latency=(0, 0))
+    filler = ''.join(
+        f'<div class="menu-item"><p>おすすめメニュー {i}</p><span class="price">{i * 10}円</span></div>'
+        for i in range(page_kb * 1024 // 90)
+    )
+    pages = []
+    for store_id in fake_server._store_ids('bench')[:page_count]:
+        path = Path(work_dir) / f"{store_id}.html"
+        path.write_text(fake_server.render_store(store_id).replace('</body>', filler + '</body>'), encoding='utf-8')
+        pages.append((path, f"https://r.gnavi.co.jp/{store_id}/"))
+    return pages
+
+
+def benchmark_parse(pages, worker_counts):
+    """
+    同じページ集を同一プロセス・プロセスプール（ワーカー数別）で解析して速度を比較
+
+    pool はエンジンと同じく取得済みのHTML文字列を submit() で渡し、
+    pool-file は同じHTMLを一時ファイルに書いてパスだけを渡す（ファイル書き込みも計測に含める）
+
+    Returns:
+        list: {'mode', 'workers', 'pages', 'pages_per_sec', 'speedup'}
+    """
+    results = []
+    html_pages = [(Path(path).read_text(encoding='utf-8'), url) for path, url in pages]
+    inline_parser = GurunaviHtmlParser()
+    started = time.perf_counter()
+    for html_text, url in html_pages:
+        inline_parser.parse(html_text, url)
+    inline_rate = len(pages) / (time.perf_counter() - started)
+    results.append({'mode': 'inline', 'workers': 1, 'pages': len(pages), 'pages_per_sec': inline_rate, 'speedup': 1.0})
+
+    spool_dir = Path(tempfile.mkdtemp(prefix='gurunavi_parse_spool_'))
+    try:
+        for workers in worker_counts:
+            with ParsePool(workers) as pool:
+                # プロセス起動は計測に含めない
+                list(pool.parse_files(pages[:workers], chunksize=1))
+                for mode in ('pool', 'pool-file'):
+                    started = time.perf_counter()
+                    if mode == 'pool':
+                        futures = [pool.submit(url, html_text) for html_text, url in html_pages]
+                    else:
+                        futures = []
+                        for i, (html_text, url) in enumerate(html_pages):
+                            path = spool_dir / f"{i}.html"
+                            path.write_text(html_text, encoding='utf-8')
+                            futures.append(pool.executor.submit(parse_file, str(path), url))
+                    parsed = [future.result() for future in futures]
+                    rate = len(parsed) / (time.perf_counter() - started)
+                    results.append({
+                        'mode': mode, 'workers': workers, 'pages': len(parsed),
+                        'pages_per_sec': rate, 'speedup': rate / inline_rate if inline_rate else 0.0
+                    })
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="プロセスプールによるHTML解析")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help='解析速度をワーカー数別に計測')
+    bench_parser.add_argument('corpus_dir', nargs='?', help='記録済みページ集（省略時は模擬ページ）')
+    bench_parser.add_argument('--workers', type=int, nargs='+', help='計測するワーカー数（省略時は 1, 2, 4 … CPUコア数）')
+    bench_parser.add_argument('--pages', type=int, default=400)
+    bench_parser.add_argument('--page-kb', type=int, default=200, help='模擬ページの大きさ（KB）')
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({min(2 ** i, cpu_count) for i in range(cpu_count.bit_length() + 1)})
+    work_dir = tempfile.mkdtemp(prefix='gurunavi_parse_bench_')
+    try:
+        pages = _benchmark_pages(args.corpus_dir, args.pages, args.page_kb, work_dir)
+        print(f"{len(pages)}ページ / CPU {cpu_count}コア")
+        for result in benchmark_parse(pages, worker_counts):
+            print(
+                f"{result['mode']:9} ワーカー{result['workers']:2}: "
+                f"{result['pages_per_sec']:.1f}ページ/秒 (同一プロセス比 {result['speedup']:.2f}倍)"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
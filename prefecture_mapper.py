@@ -9,8 +9,12 @@ from urllib.parse import urlencode
 class PrefectureMapper:
     """都道府県・おすすめエリアマッピングクラス"""
     
-    def __init__(self):
-        self.base_url = "https://r.gnavi.co.jp"
+    def __init__(self, base_url="https://r.gnavi.co.jp"):
+        """
+        Args:
+            base_url (str): 検索URLのベース（模擬サーバーで試験する場合はそのURL）
+        """
+        self.base_url = base_url.rstrip('/')
         
         # 都道府県コードマッピング（全国を追加）
         self.prefecture_codes = {
@@ -0,0 +1,182 @@
+"""
+アクセス間隔管理
+全ての取得経路で共有するグローバルなリクエスト間隔（礼儀正しさの予算）と、
+応答に合わせてリクエストレートを増減するAIMD制御
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+
+
+class AimdRateController:
+    """
+    加算増加・乗算減少（AIMD）によるリクエストレート制御クラス
+
+    正常応答ごとにレートを少しずつ上げ、エラー・応答遅延・CAPTCHA/IP制限で
+    レートを割合で下げる。レートは rate_min_rps ～ rate_max_rps の範囲に収める。
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): cooltime_min / cooltime_max と、任意で以下の設定
+                rate_min_rps / rate_max_rps: レートの下限・上限（件/秒）。
+                    上限は 1/cooltime_min を超えない（省略時は 1/cooltime_min と 1/(cooltime_max*5)）
+                rate_increase_step: 正常応答1件ごとに加えるレート（件/秒）
+                rate_decrease_factor: CAPTCHA・IP制限時にレートへ掛ける係数
+                rate_error_decrease_factor: 通信エラー・応答遅延時にレートへ掛ける係数
+                slow_response_seconds: これより遅い応答は減速の対象
+        """
+        self.logger = logging.getLogger(__name__)
+        cooltime_min = config['cooltime_min']
+        cooltime_max = config['cooltime_max']
+
+        # 最短のクールタイムより速くはアクセスしない
+        cooltime_max_rps = 1.0 / cooltime_min if cooltime_min > 0 else 1.0
+        self.max_rps = min(config.get('rate_max_rps', cooltime_max_rps), cooltime_max_rps)
+        if config.get('rate_max_rps', 0) > cooltime_max_rps:
+            self.logger.warning(
+                f"rate_max_rps ({config['rate_max_rps']}件/秒) が最短クールタイムを超えるため "
+                f"{cooltime_max_rps:.2f}件/秒に制限します"
+            )
+        self.min_rps = min(config.get('rate_min_rps', 1.0 / (cooltime_max * 5) if cooltime_max > 0 else 0.1), self.max_rps)
+        self.increase_step = config.get('rate_increase_step', 0.01)
+        self.decrease_factor = config.get('rate_decrease_factor', 0.5)
+        self.error_decrease_factor = config.get('rate_error_decrease_factor', 0.8)
+        self.slow_response_seconds = config.get('slow_response_seconds', 5.0)
+
+        # 従来のクールタイムの平均から開始
+        mean_cooltime = (cooltime_min + cooltime_max) / 2
+        initial_rps = 1.0 / mean_cooltime if mean_cooltime > 0 else self.max_rps
+        self.rate = min(max(initial_rps, self.min_rps), self.max_rps)
+
+        self._lock = threading.Lock()
+        self._holdoff_until = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    def interval(self):
+        """現在のレートでのリクエスト間隔（秒）"""
+        with self._lock:
+            return 1.0 / self.rate
+
+    def record_success(self, elapsed=None):
+        """正常応答（elapsed が遅い場合は減速）"""
+        if elapsed is not None and elapsed > self.slow_response_seconds:
+            self._decrease(self.error_decrease_factor, f"応答遅延 {elapsed:.1f}秒")
+            return
+
+        with self._lock:
+            self.rate = min(self.rate + self.increase_step, self.max_rps)
+            self.increases += 1
+
+    def record_error(self, reason='通信エラー'):
+        """通信エラー・解析失敗"""
+        self._decrease(self.error_decrease_factor, reason)
+
+    def record_block(self, reason='アクセス制限'):
+        """CAPTCHA・レート制限・ブロック"""
+        self._decrease(self.decrease_factor, reason)
+
+    def _decrease(self, factor, reason):
+        with self._lock:
+            now = time.monotonic()
+            # 同時に処理中だったリクエストの失敗で何度も下げないよう、減速後しばらくは据え置く
+            if now < self._holdoff_until:
+                return
+            old_rate = self.rate
+            self.rate = max(self.rate * factor, self.min_rps)
+            self._holdoff_until = now + 2.0 / self.rate
+            self.decreases += 1
+
+        self.logger.info(f"アクセスレートを減速: {old_rate:.2f} → {self.rate:.2f}件/秒 ({reason})")
+
+
+class PolitenessBudget:
+    """全取得経路で共有するリクエスト間隔管理クラス"""
+
+    def __init__(self, config, time_multiplier=1.0):
+        """
+        Args:
+            config (dict): cooltime_min / cooltime_max を含む設定
+                （adaptive_rate が False の場合はクールタイムの範囲で固定）
+            time_multiplier (float): 時間帯別の倍率（time_zone_aware）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.time_multiplier = time_multiplier
+        self.controller = AimdRateController(config) if config.get('adaptive_rate', True) else None
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.total_requests = 0
+        self.total_wait = 0.0
+
+    def next_interval(self):
+        """次のリクエストまでの間隔（秒）"""
+        if self.controller is None:
+            interval = random.uniform(self.config['cooltime_min'], self.config['cooltime_max'])
+        else:
+            # 一定間隔にならないよう ±20% の揺らぎを加える（上限レートでもクールタイムの下限は守る）
+            interval = max(self.controller.interval() * random.uniform(0.8, 1.2), self.config['cooltime_min'])
+        return interval * self.time_multiplier
+
+    def reserve(self):
+        """
+        次のリクエスト枠を予約
+
+        Returns:
+            float: 予約した枠まで待つべき秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.next_interval()
+            self.total_requests += 1
+            delay = slot - now
+            self.total_wait += delay
+            return delay
+
+    def pause(self, seconds):
+        """以降のリクエスト枠を指定秒数後まで後ろ倒し（CAPTCHA・IP制限時のバックオフ）"""
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+    def wait(self):
+        """次のリクエスト枠まで待機（スレッド用）"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def async_wait(self):
+        """次のリクエスト枠まで待機（asyncio用）"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def record_success(self, elapsed=None):
+        """正常応答をレート制御に反映"""
+        if self.controller:
+            self.controller.record_success(elapsed)
+
+    def record_error(self, reason='通信エラー'):
+        """通信エラーをレート制御に反映"""
+        if self.controller:
+            self.controller.record_error(reason)
+
+    def record_block(self, reason='アクセス制限'):
+        """CAPTCHA・IP制限をレート制御に反映"""
+        if self.controller:
+            self.controller.record_block(reason)
+
+    @property
+    def requests_per_second(self):
+        """平均リクエストレート上限"""
+        if self.controller is not None:
+            return self.controller.rate / self.time_multiplier
+        mean_interval = (self.config['cooltime_min'] + self.config['cooltime_max']) / 2 * self.time_multiplier
+        return 1.0 / mean_interval if mean_interval > 0 else float('inf')
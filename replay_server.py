@@ -0,0 +1,394 @@
+"""
+オフライン再生サーバー
+記録した店舗・一覧ページをローカルHTTPサーバーから遅延付きで配信し、
+実サイトにアクセスせずに各extractorの速度・精度を計測する
+
+fixtures/replay_corpus に期待値を手作業で確認した小さなページ集を同梱
+（python replay_server.py bench で計測）
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 精度比較の対象項目
+COMPARED_FIELDS = ['店舗名', '電話番号', '郵便番号', '住所']
+
+
+def page_key(url):
+    """再生時の照合キー（パス + クエリ、末尾の / は無視）"""
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/') or '/'
+    return f"{path}?{parsed.query}" if parsed.query else path
+
+
+class FixtureCorpus:
+    """記録済みページ集（manifest.json + pages/*.html）"""
+
+    def __init__(self, corpus_dir):
+        self.corpus_dir = Path(corpus_dir)
+        self.manifest_path = self.corpus_dir / 'manifest.json'
+        self.pages = []
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f).get('pages', [])
+
+    def add_page(self, url, html_text, kind='store', expected=None):
+        """ページを追加（同じURLは上書き）"""
+        file_name = f"pages/{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.html"
+        file_path = self.corpus_dir / file_name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(html_text)
+
+        self.pages = [page for page in self.pages if page['url'] != url]
+        self.pages.append({'url': url, 'kind': kind, 'file': file_name, 'expected': expected})
+
+    def save(self):
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        state = {'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'pages': self.pages}
+        tmp_path = self.manifest_path.with_name('manifest.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def read_html(self, page):
+        with open(self.corpus_dir / page['file'], 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def store_pages(self):
+        return [page for page in self.pages if page['kind'] == 'store']
+
+    def listing_pages(self):
+        return [page for page in self.pages if page['kind'] == 'listing']
+
+
+class ReplayServer:
+    """記録済みページを配信するローカルHTTPサーバー"""
+
+    def __init__(self, corpus, latency=(0.0, 0.0), host='127.0.0.1', port=0, logger=None):
+        """
+        Args:
+            corpus (FixtureCorpus): 配信するページ集
+            latency (tuple): 応答前の待機時間の範囲（秒）。実サイトの応答時間を再現
+            port (int): 待ち受けポート（0なら空きポート）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.corpus = corpus
+        self.latency = latency
+        self.requests = 0
+        self._pages = {page_key(page['url']): page for page in corpus.pages}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, url):
+        """実サイトのURLを再生サーバーのURLに変換"""
+        parsed = urlparse(url)
+        return f"{self.base_url}{parsed.path}" + (f"?{parsed.query}" if parsed.query else '')
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                low, high = server.latency
+                if high > 0:
+                    time.sleep(random.uniform(low, high))
+
+                page = server._pages.get(page_key(self.path))
+                if page is None:
+                    self._send(404, '<html><head><title>404 Not Found</title></head><body>見つかりません</body></html>')
+                    return
+                self._send(200, server.corpus.read_html(page))
+
+            def _send(self, status, html_text):
+                body = html_text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug(f"再生サーバー: {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"再生サーバー起動: {self.base_url} ({len(self._pages)}ページ)")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record_corpus(corpus_dir, urls, user_agent=None, interval=3.0, expected_from='selenium', logger=None):
+    """
+    実サイトのページを記録
+
+    期待値はHTTP版パーサーとは別の、Selenium版extractor（GurunaviAddressExtractor）で
+    記録したページを再生して取得する。Chromeが無い場合は空のまま保存するので、
+    manifest.json の expected を手作業で確認して記入する（expected_source: "hand"）。
+
+    Args:
+        urls (list): 記録するURL（/rs/ を含むものは一覧ページとして扱う）
+        interval (float): アクセス間隔（秒）
+        expected_from (str): 'selenium' または None（期待値を記録しない）
+    """
+    from http_detail_fetcher import GurunaviHttpDetailFetcher
+
+    logger = logger or logging.getLogger(__name__)
+    corpus = FixtureCorpus(corpus_dir)
+    fetcher = GurunaviHttpDetailFetcher(user_agent=user_agent, logger=logger)
+    try:
+        for i, url in enumerate(urls):
+            if i:
+                time.sleep(interval)
+            status_code, html_text = fetcher.fetch_html(url)
+            if status_code != 200:
+                logger.warning(f"記録スキップ: {url} - HTTP {status_code}")
+                continue
+
+            kind = 'listing' if '/rs' in urlparse(url).path else 'store'
+            corpus.add_page(url, html_text, kind)
+            logger.info(f"記録: {url} ({kind})")
+    finally:
+        fetcher.close()
+        corpus.save()
+
+    if expected_from == 'selenium':
+        fill_expected_with_selenium(corpus, logger=logger)
+    return corpus
+
+
+def fill_expected_with_selenium(corpus, overwrite=False, logger=None):
+    """
+    記録済みの店舗ページを再生サーバーから開き、Selenium版extractorの結果を期待値にする
+
+    手作業で確認した期待値（expected_source: "hand"）は上書きしない
+
+    Returns:
+        int: 期待値を設定したページ数
+    """
+    from chrome_driver_manager import ChromeDriverManager
+    from page_readiness import PageReadinessWaiter, DETAIL_READY_SELECTORS
+    from gurunavi_address_extractor import GurunaviAddressExtractor
+
+    logger = logger or logging.getLogger(__name__)
+    targets = [
+        page for page in corpus.store_pages()
+        if page.get('expected_source') != 'hand' and (overwrite or not page.get('expected'))
+    ]
+    if not targets:
+        return 0
+
+    try:
+        manager = ChromeDriverManager()
+        driver = manager.create_optimized_driver(headless=True)
+    except Exception as e:
+        logger.warning(f"Chromeを起動できないため期待値は未設定です（manifest.jsonに手作業で記入してください）: {e}")
+        return 0
+
+    filled = 0
+    waiter = PageReadinessWaiter(logger=logger)
+    try:
+        with ReplayServer(corpus, logger=logger) as server:
+            for page in targets:
+                try:
+                    driver.get(server.url_for(page['url']))
+                    waiter.wait_for(driver, DETAIL_READY_SELECTORS)
+                    detail = GurunaviAddressExtractor(
+                        driver, logger, readiness_waiter=waiter, page_ready=True
+                    ).extract_store_data_with_address(page['url'])
+                except Exception as e:
+                    logger.warning(f"期待値の取得失敗: {page['url']} - {e}")
+                    continue
+                if detail and detail.get('店舗名') not in ('取得失敗', '-'):
+                    page['expected'] = {field: detail.get(field, '-') for field in COMPARED_FIELDS}
+                    page['expected_source'] = 'selenium'
+                    filled += 1
+    finally:
+        manager.cleanup_driver(driver)
+        corpus.save()
+
+    logger.info(f"Selenium版extractorで期待値を設定: {filled}/{len(targets)}ページ")
+    return filled
+
+
+def _accuracy(detail, expected):
+    """期待値と一致した項目数"""
+    if not detail or not expected:
+        return 0, 0
+    matched = sum(1 for field in COMPARED_FIELDS if detail.get(field) == expected.get(field))
+    return matched, len(COMPARED_FIELDS)
+
+
+def _summarize(name, latencies, matched, compared, elapsed):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'extractor': name,
+        'pages': count,
+        'pages_per_sec': count / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': latencies[count // 2] * 1000 if count else 0.0,
+        'p95_ms': latencies[min(count - 1, int(count * 0.95))] * 1000 if count else 0.0,
+        'accuracy': matched / compared if compared else None
+    }
+
+
+def benchmark_extractors(corpus, latency=(0.0, 0.0), use_chrome=False, logger=None):
+    """
+    再生サーバーに対して各extractorの速度・精度を計測
+
+    Args:
+        corpus (FixtureCorpus): 記録済みページ集
+        latency (tuple): 再生サーバーの応答遅延（秒）
+        use_chrome (bool): ヘッドレスChromeで3種類のextractorも計測
+
+    Returns:
+        list: extractorごとの {'extractor', 'pages', 'pages_per_sec', 'p50_ms', 'p95_ms', 'accuracy'}
+    """
+    from http_detail_fetcher import GurunaviHttpDetailFetcher
+
+    logger = logger or logging.getLogger(__name__)
+    pages = corpus.store_pages()
+    results = []
+
+    with ReplayServer(corpus, latency=latency, logger=logger) as server:
+        fetcher = GurunaviHttpDetailFetcher(logger=logger)
+        latencies, matched, compared = [], 0, 0
+        started = time.perf_counter()
+        for page in pages:
+            page_started = time.perf_counter()
+            status_code, html_text = fetcher.fetch_html(server.url_for(page['url']))
+            detail = fetcher.parser.parse(html_text, page['url']) if status_code == 200 else None
+            latencies.append(time.perf_counter() - page_started)
+            hit, total = _accuracy(detail, page.get('expected'))
+            matched += hit
+            compared += total
+        results.append(_summarize('http', latencies, matched, compared, time.perf_counter() - started))
+        fetcher.close()
+
+        if use_chrome:
+            results.extend(_benchmark_selenium_extractors(server, pages, logger))
+
+    return results
+
+
+def _benchmark_selenium_extractors(server, pages, logger):
+    from chrome_driver_manager import ChromeDriverManager
+    from page_readiness import PageReadinessWaiter, DETAIL_READY_SELECTORS
+    from gurunavi_address_extractor import GurunaviAddressExtractor
+    from gurunavi_label_based_extractor import GurunaviLabelBasedExtractor
+    from gurunavi_multi_approach_extractor import GurunaviMultiApproachExtractor
+
+    extractors = [
+        ('address', lambda driver, waiter: GurunaviAddressExtractor(driver, logger, waiter).extract_store_data_with_address),
+        ('label', lambda driver, waiter: GurunaviLabelBasedExtractor(driver, logger).extract_store_data_modified),
+        ('multi', lambda driver, waiter: GurunaviMultiApproachExtractor(driver, logger, waiter).extract_store_data_multi)
+    ]
+
+    manager = ChromeDriverManager()
+    driver = manager.create_optimized_driver(headless=True)
+    waiter = PageReadinessWaiter(logger=logger)
+    results = []
+    try:
+        for name, make_extract in extractors:
+            extract = make_extract(driver, waiter)
+            latencies, matched, compared = [], 0, 0
+            started = time.perf_counter()
+            for page in pages:
+                # 期待値を作ったextractor自身は、そのページの精度を計測しない
+                graded = not (name == 'address' and page.get('expected_source') == 'selenium')
+                page_started = time.perf_counter()
+                try:
+                    driver.get(server.url_for(page['url']))
+                    waiter.wait_for(driver, DETAIL_READY_SELECTORS)
+                    detail = extract(page['url'])
+                except Exception as e:
+                    logger.warning(f"{name}: 抽出エラー {page['url']} - {e}")
+                    detail = None
+                latencies.append(time.perf_counter() - page_started)
+                hit, total = _accuracy(detail, page.get('expected') if graded else None)
+                matched += hit
+                compared += total
+            results.append(_summarize(name, latencies, matched, compared, time.perf_counter() - started))
+    finally:
+        manager.cleanup_driver(driver)
+    return results
+
+
+# 使用例
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="オフライン再生サーバー")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='実サイトのページを記録')
+    record_parser.add_argument('corpus_dir')
+    record_parser.add_argument('urls', nargs='+')
+    record_parser.add_argument('--interval', type=float, default=3.0)
+    record_parser.add_argument('--no-expected', action='store_true', help='期待値を記録しない（手作業で記入する場合）')
+
+    serve_parser = subparsers.add_parser('serve', help='記録済みページを配信')
+    serve_parser.add_argument('corpus_dir')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--latency', type=float, nargs=2, default=[0.0, 0.0], metavar=('MIN', 'MAX'))
+
+    bench_parser = subparsers.add_parser('bench', help='extractorの速度・精度を計測')
+    bench_parser.add_argument('corpus_dir', nargs='?', default=str(Path(__file__).parent / 'fixtures' / 'replay_corpus'))
+    bench_parser.add_argument('--latency', type=float, nargs=2, default=[0.0, 0.0], metavar=('MIN', 'MAX'))
+    bench_parser.add_argument('--chrome', action='store_true', help='Selenium版extractorも計測')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_corpus(args.corpus_dir, args.urls, interval=args.interval,
+                      expected_from=None if args.no_expected else 'selenium')
+
+    elif args.command == 'serve':
+        replay = ReplayServer(FixtureCorpus(args.corpus_dir), latency=tuple(args.latency), port=args.port)
+        replay.start()
+        print(f"配信中: {replay.base_url} （Ctrl+Cで終了）")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            replay.stop()
+
+    elif args.command == 'bench':
+        for result in benchmark_extractors(FixtureCorpus(args.corpus_dir), tuple(args.latency), args.chrome):
+            accuracy = f"{result['accuracy']:.1%}" if result['accuracy'] is not None else '-'
+            print(
+                f"{result['extractor']:8}: {result['pages']}ページ {result['pages_per_sec']:.1f}ページ/秒 "
+                f"p50 {result['p50_ms']:.0f}ms p95 {result['p95_ms']:.0f}ms 精度 {accuracy}"
+            )
@@ -0,0 +1,245 @@
+"""
+応答の分類とバックオフ
+取得した全ページを 正常 / 404 / CAPTCHA / レート制限 / ブロック / サーバーエラー に分類し、
+CAPTCHA・IP制限・サーバーエラーを検出したら全取得経路のアクセスを一時停止して同じURLを再取得させる
+"""
+
+import re
+import logging
+import threading
+
+RESPONSE_OK = 'ok'
+RESPONSE_NOT_FOUND = 'not_found'
+RESPONSE_CAPTCHA = 'captcha'
+RESPONSE_RATE_LIMITED = 'rate_limited'
+RESPONSE_BLOCKED = 'blocked'
+RESPONSE_SERVER_ERROR = 'server_error'
+
+# アクセス過多が原因の応答
+THROTTLED_RESPONSES = (RESPONSE_CAPTCHA, RESPONSE_RATE_LIMITED, RESPONSE_BLOCKED)
+# 待機後に再取得する応答（サーバー側の一時的な障害を含む）
+RETRY_RESPONSES = THROTTLED_RESPONSES + (RESPONSE_SERVER_ERROR,)
+
+TITLE_PATTERN = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+CAPTCHA_PATTERN = re.compile(
+    r'class="[^"]*\b(?:g-recaptcha|h-captcha|cf-turnstile)\b|/recaptcha/api/challenge|'
+    r'ロボットではない|画像認証|認証文字|captcha-container',
+    re.IGNORECASE
+)
+BLOCK_PATTERN = re.compile(
+    r'access denied|request blocked|アクセスが制限|アクセスを制限|不正なアクセス|アクセスできません',
+    re.IGNORECASE
+)
+RATE_LIMIT_PATTERN = re.compile(r'too many requests|アクセスが集中', re.IGNORECASE)
+# ぐるなびのエラーページの見出し（タイトルは店名を含むため判定に使わない）
+ERROR_PAGE_PATTERN = re.compile(
+    r'<h1[^>]*>\s*(?:お探しのページは見つかりません|ページが見つかりません|指定されたページは存在しません)'
+)
+
+# 本文の判定は先頭部分だけ（店舗ページ全体を走査しない）
+BODY_SCAN_LIMIT = 20000
+
+
+def classify_response(status_code, html_text, title=None):
+    """
+    応答を分類
+
+    Args:
+        status_code (int): HTTPステータス（Seleniumなど不明な場合はNone）
+        html_text (str): ページHTML
+        title (str): ページタイトル（省略時はHTMLから取得）
+
+    Returns:
+        str: RESPONSE_* のいずれか
+    """
+    if status_code == 429:
+        return RESPONSE_RATE_LIMITED
+    if status_code == 403:
+        return RESPONSE_BLOCKED
+    if status_code in (404, 410):
+        return RESPONSE_NOT_FOUND
+
+    head = (html_text or '')[:BODY_SCAN_LIMIT]
+    if title is None:
+        match = TITLE_PATTERN.search(head)
+        title = match.group(1).strip() if match else ''
+
+    if CAPTCHA_PATTERN.search(head):
+        return RESPONSE_CAPTCHA
+    if BLOCK_PATTERN.search(title) or (len(head) < 5000 and BLOCK_PATTERN.search(head)):
+        return RESPONSE_BLOCKED
+    if RATE_LIMIT_PATTERN.search(title):
+        return RESPONSE_RATE_LIMITED
+    if ERROR_PAGE_PATTERN.search(head):
+        return RESPONSE_NOT_FOUND
+    # その他の異常ステータス（5xxは待機して再取得、4xxは再取得しても変わらない）
+    if status_code is not None and status_code >= 500:
+        return RESPONSE_SERVER_ERROR
+    if status_code is not None and status_code >= 400:
+        return RESPONSE_NOT_FOUND
+    return RESPONSE_OK
+
+
+# ページ全体ではなく判定に使う先頭部分だけをWebDriverから受け取る
+PAGE_HEAD_SCRIPT = "return [document.title, document.documentElement.outerHTML.slice(0, arguments[0])];"
+
+
+def classify_driver_page(driver):
+    """Seleniumで表示中のページを分類（ステータスは取得できないため内容で判定）"""
+    try:
+        title, head = driver.execute_script(PAGE_HEAD_SCRIPT, BODY_SCAN_LIMIT)
+        return classify_response(None, head, title)
+    except Exception:
+        return RESPONSE_OK
+
+
+class ResponseGuard:
+    """応答分類の集計とバックオフ制御クラス（全取得経路で共有）"""
+
+    def __init__(self, config, stats, budget=None, logger=None):
+        """
+        Args:
+            config (dict): captcha_delay / ip_limit_delay / server_error_delay / max_blocked_retries / max_backoff_delay
+            stats (dict): captcha_encounters / ip_restrictions / server_errors を加算する統計情報
+            budget (PolitenessBudget): バックオフ中に停止させる共有のアクセス間隔
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.config = config
+        self.stats = stats
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self._terminal = {}
+        self._consecutive = 0
+
+        for key in ('captcha_encounters', 'ip_restrictions', 'server_errors', 'not_found_pages', 'requeued_requests'):
+            self.stats.setdefault(key, 0)
+        self.stats.setdefault('backoff_seconds', 0.0)
+
+    def inspect(self, url, status_code, html_text, title=None, elapsed=None):
+        """
+        応答を分類して集計し、必要ならバックオフする
+
+        Args:
+            elapsed (float): 応答までの秒数（アクセスレート制御に使用）
+
+        Returns:
+            tuple: (分類, 再取得すべきか)
+        """
+        outcome = classify_response(status_code, html_text, title)
+        return outcome, self.record(url, outcome, elapsed)
+
+    def inspect_driver(self, driver, url, elapsed=None):
+        """Seleniumで表示中のページを分類して集計"""
+        outcome = classify_driver_page(driver)
+        return outcome, self.record(url, outcome, elapsed)
+
+    def record(self, url, outcome, elapsed=None):
+        """
+        分類結果を集計し、アクセスレート制御に反映
+
+        Returns:
+            bool: バックオフ後に同じURLを再取得すべきならTrue
+        """
+        if outcome not in RETRY_RESPONSES:
+            # 404もサイトが正常に応答した結果として扱う
+            if self.budget is not None:
+                self.budget.record_success(elapsed)
+
+            with self._lock:
+                if outcome == RESPONSE_NOT_FOUND:
+                    self.stats['not_found_pages'] += 1
+                    self._terminal[url] = outcome
+                else:
+                    self._consecutive = 0
+                    self._attempts.pop(url, None)
+            return False
+
+        with self._lock:
+            if outcome == RESPONSE_CAPTCHA:
+                self.stats['captcha_encounters'] += 1
+                base_delay = self.config.get('captcha_delay', 30.0)
+            elif outcome == RESPONSE_SERVER_ERROR:
+                self.stats['server_errors'] += 1
+                base_delay = self.config.get('server_error_delay', 10.0)
+            else:
+                self.stats['ip_restrictions'] += 1
+                base_delay = self.config.get('ip_limit_delay', 60.0)
+
+            # 連続して検出した場合は待機を倍々に延ばす
+            self._consecutive += 1
+            delay = min(
+                base_delay * (2 ** (self._consecutive - 1)),
+                self.config.get('max_backoff_delay', 600.0)
+            )
+            attempts = self._attempts.get(url, 0) + 1
+            self._attempts[url] = attempts
+            retry = attempts <= self.config.get('max_blocked_retries', 3)
+            if retry:
+                self.stats['requeued_requests'] += 1
+            else:
+                self._terminal[url] = outcome
+
+        self.logger.warning(
+            f"{outcome}を検出: {url} - 全取得を{delay:.0f}秒停止"
+            + (f"して再取得します (試行{attempts}回目)" if retry else "（再取得上限のため取得失敗とします）")
+        )
+        self._backoff(delay, outcome)
+        return retry
+
+    def _backoff(self, delay, outcome):
+        with self._lock:
+            self.stats['backoff_seconds'] += delay
+        if self.budget is not None:
+            # サーバーエラーはアクセス制限ほどレートを下げない
+            if outcome == RESPONSE_SERVER_ERROR:
+                self.budget.record_error(outcome)
+            else:
+                self.budget.record_block(outcome)
+            self.budget.pause(delay)
+
+    def terminal_outcome(self, url):
+        """再取得しない結果で終わったURLの分類（404・再取得上限）"""
+        with self._lock:
+            return self._terminal.get(url)
+
+    def forget(self, url):
+        """URLの再取得回数・確定した分類を消す（キューから取り直した店舗を改めて取得する場合）"""
+        with self._lock:
+            self._attempts.pop(url, None)
+            self._terminal.pop(url, None)
+
+    def reset(self):
+        with self._lock:
+            self._attempts.clear()
+            self._terminal.clear()
+            self._consecutive = 0
+
+
+# 模擬サーバーの各応答で分類を確認
+if __name__ == "__main__":
+    from fake_gurunavi_server import (
+        FakeGurunaviServer, CAPTCHA_PAGE, BLOCK_PAGE, RATE_LIMIT_PAGE, NOT_FOUND_PAGE
+    )
+
+    fake_server = FakeGurunaviServer(latency=(0, 0))
+    cases = [
+        ('店舗ページ', 200, fake_server.render_store('f1234567'), RESPONSE_OK),
+        ('店舗ページ(IDに404)', 200, fake_server.render_store('f94044d8'), RESPONSE_OK),
+        ('一覧ページ', 200, fake_server.render_listing('jp', 1), RESPONSE_OK),
+        ('CAPTCHA', 200, CAPTCHA_PAGE, RESPONSE_CAPTCHA),
+        ('ブロック(403)', 403, BLOCK_PAGE, RESPONSE_BLOCKED),
+        ('ブロック(200)', 200, BLOCK_PAGE, RESPONSE_BLOCKED),
+        ('レート制限', 429, RATE_LIMIT_PAGE, RESPONSE_RATE_LIMITED),
+        ('404', 404, NOT_FOUND_PAGE, RESPONSE_NOT_FOUND),
+        ('404(200)', 200, NOT_FOUND_PAGE, RESPONSE_NOT_FOUND),
+        ('店名に404', 200, fake_server.render_store('f1234567').replace('店舗f1234567', '404 Dining'), RESPONSE_OK),
+        ('店名に見つかりません', 200,
+         fake_server.render_store('f1234567').replace('店舗f1234567', '隠れ家 見つかりません亭'), RESPONSE_OK),
+        ('サーバーエラー', 500, '<html><head><title>500 Internal Server Error</title></head></html>', RESPONSE_SERVER_ERROR),
+        ('メンテナンス', 503, '<html><head><title>Service Unavailable</title></head></html>', RESPONSE_SERVER_ERROR),
+    ]
+    for name, status, page, expected in cases:
+        actual = classify_response(status, page)
+        print(f"  {name}: {actual} {'OK' if actual == expected else 'NG (期待値: ' + expected + ')'}")
+        assert actual == expected
@@ -0,0 +1,205 @@
+"""
+追記専用の結果ジャーナル
+店舗詳細の取得結果をJSONLで追記し、Excelは最後に一括生成する
+"""
+
+import os
+import json
+import time
+import logging
+from pathlib import Path
+
+# 出力カラム（6項目）
+RESULT_COLUMNS = ['URL', '店舗名', '電話番号', '郵便番号', '住所', '取得日時']
+
+
+class ResultJournal:
+    """追記専用の結果ジャーナルクラス（JSONL）"""
+
+    def __init__(self, journal_path, fsync_interval=50):
+        """
+        Args:
+            journal_path (str | Path): ジャーナルファイルのパス
+            fsync_interval (int): 何件ごとにfsyncするか
+        """
+        self.logger = logging.getLogger(__name__)
+        self.journal_path = Path(journal_path)
+        self.fsync_interval = max(1, int(fsync_interval))
+        self._file = None
+        self._pending = 0
+        self.row_count = 0
+
+    def open(self, truncate=False):
+        """ジャーナルを開く（truncate=Trueで新規作成）"""
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'w' if truncate else 'a'
+        self._file = open(self.journal_path, mode, encoding='utf-8')
+        self._pending = 0
+        return self
+
+    def append(self, row_number, detail):
+        """1行分の結果を追記（fsyncはバッチ単位）"""
+        if self._file is None:
+            self.open()
+
+        record = {'row': row_number}
+        for column in RESULT_COLUMNS:
+            record[column] = detail.get(column, '')
+
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._pending += 1
+        self.row_count += 1
+
+        if self._pending >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """未同期の行をディスクに書き出す"""
+        if self._file is None or self._pending == 0:
+            return
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.logger.warning(f"ジャーナルfsyncエラー: {e}")
+        self._pending = 0
+
+    def close(self):
+        """ジャーナルを閉じる"""
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    def read_records(self):
+        """ジャーナルの全レコードを行番号順の辞書で取得（同じ行は後勝ち）"""
+        records = {}
+        if not self.journal_path.exists():
+            return records
+
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    records[int(record['row'])] = record
+                except (ValueError, KeyError) as e:
+                    # クラッシュ時の書きかけ行などは読み飛ばす
+                    self.logger.warning(f"ジャーナル破損行をスキップ ({line_no}行目): {e}")
+
+        return dict(sorted(records.items()))
+
+    def build_rows(self, store_list=None):
+        """
+        ジャーナルから出力行を組み立てる
+
+        Args:
+            store_list (list): 店舗一覧（未処理行を空欄で埋める場合に指定）
+
+        Returns:
+            list: 6項目の辞書のリスト
+        """
+        records = self.read_records()
+
+        if store_list is None:
+            return [
+                {column: record.get(column, '') for column in RESULT_COLUMNS}
+                for record in records.values()
+            ]
+
+        rows = []
+        for idx, store in enumerate(store_list, 1):
+            record = records.get(idx)
+            if record:
+                rows.append({column: record.get(column, '') for column in RESULT_COLUMNS})
+            else:
+                row = {column: '' for column in RESULT_COLUMNS}
+                row['URL'] = store['url']
+                rows.append(row)
+        return rows
+
+    def export_excel(self, excel_path, store_list=None, sheet_name='店舗詳細'):
+        """ジャーナルからExcelを一括生成"""
+        self.sync()
+        rows = self.build_rows(store_list)
+        write_results_excel(rows, excel_path, sheet_name)
+        self.logger.info(f"ジャーナルからExcel生成完了: {excel_path} ({len(rows)}行)")
+        return rows
+
+
+def write_results_excel(rows, excel_path, sheet_name='店舗詳細'):
+    """出力カラムの行をExcelに保存（エンジンを使わずに結果だけを書き出す場合にも使用）"""
+    import pandas as pd
+
+    Path(excel_path).parent.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+        worksheet = writer.sheets[sheet_name]
+        worksheet.column_dimensions['A'].width = 60  # URL
+        worksheet.column_dimensions['B'].width = 30  # 店舗名
+        worksheet.column_dimensions['C'].width = 15  # 電話番号
+        worksheet.column_dimensions['D'].width = 10  # 郵便番号
+        worksheet.column_dimensions['E'].width = 40  # 住所
+        worksheet.column_dimensions['F'].width = 20  # 取得日時
+
+
+def benchmark_append_latency(sizes=(100, 1000, 10000), fsync_interval=50):
+    """行数ごとの1行あたり追記レイテンシを計測"""
+    import tempfile
+
+    detail = {
+        'URL': 'https://r.gnavi.co.jp/abc12345',
+        '店舗名': 'ベンチマーク店舗',
+        '電話番号': '03-1234-5678',
+        '郵便番号': '100-0001',
+        '住所': '東京都千代田区千代田1-1',
+        '取得日時': '2024-01-01 00:00:00'
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            journal = ResultJournal(Path(tmp_dir) / f"bench_{size}.jsonl", fsync_interval)
+            journal.open(truncate=True)
+
+            # 先頭100行と末尾100行の平均レイテンシを比較
+            window = min(100, size)
+            head_time = 0.0
+            tail_time = 0.0
+            start = time.perf_counter()
+            for row in range(1, size + 1):
+                t0 = time.perf_counter()
+                journal.append(row, detail)
+                elapsed = time.perf_counter() - t0
+                if row <= window:
+                    head_time += elapsed
+                if row > size - window:
+                    tail_time += elapsed
+            total = time.perf_counter() - start
+            journal.close()
+
+            results.append({
+                'rows': size,
+                'avg_us': total / size * 1e6,
+                'head_avg_us': head_time / window * 1e6,
+                'tail_avg_us': tail_time / window * 1e6
+            })
+
+    return results
+
+
+# ベンチマーク
+if __name__ == "__main__":
+    print("ResultJournal 1行あたり追記レイテンシ:")
+    for result in benchmark_append_latency():
+        print(
+            f"  {result['rows']:>6}行: 平均 {result['avg_us']:.1f}µs "
+            f"(先頭100行 {result['head_avg_us']:.1f}µs / 末尾100行 {result['tail_avg_us']:.1f}µs)"
+        )
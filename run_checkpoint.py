@@ -0,0 +1,96 @@
+"""
+実行状態のチェックポイント
+検索条件・店舗一覧・完了行・統計（差分モードでは比較に使った一覧全体も）を保存し、中断した処理を再開可能にする
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+# 再開時に同じ処理とみなす検索条件
+MATCH_KEYS = ['prefecture', 'city', 'max_count', 'unlimited']
+
+
+class RunCheckpoint:
+    """実行状態ファイル管理クラス"""
+
+    def __init__(self, checkpoint_path):
+        self.logger = logging.getLogger(__name__)
+        self.checkpoint_path = Path(checkpoint_path)
+
+    @classmethod
+    def for_output(cls, save_path, filename):
+        """出力ファイルに対応するチェックポイントを取得"""
+        stem = filename[:-5] if filename.endswith('.xlsx') else filename
+        return cls(Path(save_path) / f"{stem}.checkpoint.json")
+
+    def exists(self):
+        return self.checkpoint_path.exists()
+
+    def save(self, search_params, store_list, completed_rows, stats, area_listing=None):
+        """
+        実行状態を保存（一時ファイル経由で置き換え）
+
+        Args:
+            area_listing (dict): 差分モードで比較した一覧全体（再開後の完了時にスナップショットとして保存する）
+        """
+        state = {
+            'version': 1,
+            'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'search_params': {key: value for key, value in search_params.items() if self._is_serializable(value)},
+            'store_list': store_list,
+            'completed_rows': sorted(completed_rows),
+            'stats': {key: value for key, value in stats.items() if isinstance(value, (int, float))}
+        }
+        if area_listing:
+            state['area_listing'] = area_listing
+
+        try:
+            self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.checkpoint_path)
+        except Exception as e:
+            self.logger.warning(f"チェックポイント保存エラー: {e}")
+
+    def load(self):
+        """
+        実行状態を読み込み
+
+        Returns:
+            dict: 保存した実行状態（無い・壊れている場合はNone）
+        """
+        if not self.checkpoint_path.exists():
+            return None
+
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if not state.get('store_list'):
+                return None
+            return state
+        except Exception as e:
+            self.logger.warning(f"チェックポイント読み込みエラー: {e}")
+            return None
+
+    def matches(self, state, search_params):
+        """保存済みの実行状態が同じ検索条件のものか"""
+        saved_params = state.get('search_params', {})
+        return all(saved_params.get(key) == search_params.get(key) for key in MATCH_KEYS)
+
+    def delete(self):
+        """チェックポイントを削除（正常完了時）"""
+        try:
+            if self.checkpoint_path.exists():
+                self.checkpoint_path.unlink()
+        except Exception as e:
+            self.logger.warning(f"チェックポイント削除エラー: {e}")
+
+    @staticmethod
+    def _is_serializable(value):
+        return isinstance(value, (str, int, float, bool, type(None)))
@@ -0,0 +1,121 @@
+"""
+1回の検索条件の処理の流れ
+店舗一覧取得 → 差分モードの絞り込み → URL取得のみの保存 / 店舗詳細取得（ストリーミング・再開） → 保存
+GUI（gurunavi_scraper_v3）とバッチ実行（gurunavi_cli）で共通
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+
+RUN_COMPLETE = 'complete'
+RUN_NO_CHANGES = 'no_changes'
+RUN_URL_ONLY = 'url_only'
+RUN_INTERRUPTED = 'interrupted'
+
+
+def use_streaming_mode(config, search_params, resume_state):
+    """ストリーミングモードを使うか（再開・URL取得のみ・差分モードでは一覧を先に確定させる）"""
+    if not config.get('streaming_mode', False):
+        return False
+    return not resume_state and not search_params.get('url_only', False) and not config.get('diff_mode', False)
+
+
+def output_path(search_params, suffix=''):
+    """結果ファイルのパス"""
+    filename = search_params['filename'] + suffix
+    if not filename.endswith('.xlsx'):
+        filename += '.xlsx'
+    return str(Path(search_params['save_path']) / filename)
+
+
+def url_only_rows(store_list):
+    """URL取得のみの場合も6項目形式で保存する行"""
+    fetched_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        {'URL': store['url'], '店舗名': store['name'], '電話番号': '-', '郵便番号': '-', '住所': '-', '取得日時': fetched_at}
+        for store in store_list
+    ]
+
+
+def run_search(engine, search_params, resume_state, should_stop, on_details_start=None, logger=None):
+    """
+    1つの検索条件を最後まで処理して結果を保存
+
+    Args:
+        engine (ImprovedScraperEngine): 作成済みのエンジン（cleanup は呼び出し側で行う）
+        search_params (dict): 検索条件・保存先
+        resume_state (dict): RunCheckpoint.load() の結果（中断した処理を再開する場合、新規はNone）
+        should_stop (callable): Trueを返したら中断扱い（呼び出し側の停止フラグ。エンジンの stop_requested は
+            start_processing 終了時の cleanup でも立つため、正常完了と区別できない）
+        on_details_start (callable): on_details_start(対象店舗数) 詳細取得の開始前に呼ぶ
+
+    Returns:
+        dict: {'status': RUN_*, 'results', 'store_count', 'streaming', 'diff', 'output'}
+              中断時は保存せず、取得済みの結果だけを返す
+    """
+    logger = logger or logging.getLogger(__name__)
+    config = engine.config
+    url_only = search_params.get('url_only', False)
+    streaming = use_streaming_mode(config, search_params, resume_state)
+    outcome = {'results': [], 'store_count': 0, 'streaming': streaming, 'diff': None, 'output': output_path(search_params)}
+
+    # 店舗一覧取得（再開時は保存済みの一覧、ストリーミングでは詳細取得と並行）
+    if streaming:
+        store_list = None
+    elif resume_state:
+        store_list = resume_state['store_list']
+    else:
+        store_list = engine.get_store_list(
+            prefecture=search_params['prefecture'],
+            city=search_params['city'],
+            max_count=search_params['max_count'],
+            unlimited=search_params['unlimited']
+        )
+        if should_stop():
+            return dict(outcome, status=RUN_INTERRUPTED, store_count=len(store_list or []))
+
+    if not streaming:
+        if not store_list:
+            raise Exception("店舗一覧の取得に失敗しました")
+        logger.info(f"店舗一覧取得完了: {len(store_list)}件")
+
+    # 差分モード: 前回から追加・変更された店舗のみ詳細取得
+    if config.get('diff_mode', False) and resume_state and not url_only:
+        # 保存済みの一覧は差分の対象のみ。比較に使った一覧全体から差分を再計算し、完了時にスナップショットを保存する
+        if engine.restore_area_diff(resume_state):
+            outcome['diff'] = engine.area_delta.summary()
+    elif config.get('diff_mode', False) and not url_only:
+        # 件数上限で打ち切った一覧は、上限より後ろの店舗を削除と判定しない
+        complete = search_params['unlimited'] or len(store_list) < search_params['max_count']
+        store_list = engine.apply_area_diff(store_list, search_params['prefecture'], search_params['city'], complete)
+        outcome['diff'] = engine.area_delta.summary()
+        if not store_list:
+            engine.save_results([], search_params['save_path'], search_params['filename'])
+            engine.commit_area_snapshot()
+            return dict(outcome, status=RUN_NO_CHANGES)
+
+    if url_only:
+        rows = url_only_rows(store_list)
+        engine.save_results(rows, search_params['save_path'], search_params['filename'])
+        return dict(outcome, status=RUN_URL_ONLY, results=rows, store_count=len(rows))
+
+    if on_details_start:
+        on_details_start(search_params['max_count'] if streaming else len(store_list))
+
+    if streaming:
+        results = engine.start_streaming_processing(search_params)
+    else:
+        results = engine.start_processing(store_list, search_params, resume_state)
+    results = results or []
+
+    if should_stop():
+        # 取得済みの分は結果ジャーナルとチェックポイントに残っている（再実行で続きから）
+        return dict(outcome, status=RUN_INTERRUPTED, results=results, store_count=len(engine.completed_rows))
+
+    if engine.callback:
+        engine.callback({'phase': 'saving', 'message': '最終結果を保存中...', 'progress': 100})
+    engine.save_results(results, search_params['save_path'], search_params['filename'])
+    # 詳細取得に失敗した店舗はスナップショットに含めず、次回も取得対象にする
+    engine.commit_area_snapshot(results)
+    return dict(outcome, status=RUN_COMPLETE, results=results, store_count=len(results))
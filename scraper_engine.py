@@ -4,9 +4,13 @@
 """
 
 import time
+import queue
 import random
+import threading
 import logging
 import re
+import math
+import itertools
 from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
@@ -16,6 +20,24 @@ from urllib.parse import urlparse
 from gurunavi_address_extractor import GurunaviAddressExtractor
 from gurunavi_label_based_extractor import GurunaviLabelBasedExtractor
 from gurunavi_multi_approach_extractor import GurunaviMultiApproachExtractor
+from result_journal import ResultJournal
+from run_checkpoint import RunCheckpoint
+from store_cache import StoreCache
+from page_archive import PageArchive, KIND_STORE, KIND_LISTING
+from area_diff import AreaSnapshotStore, listing_card_fingerprints, store_key
+from area_shards import plan_area_shards, ShardedListingCollector
+from store_url_classifier import is_store_url, filter_store_urls, store_host_of, SITE_BASE_URL
+from listing_link_script import extract_store_base_urls, ALL_LINKS_SCRIPT
+from url_dedupe import BoundedUrlSet
+from listing_crawler import GurunaviListingCrawler, LISTING_CRAWL_AVAILABLE, parse_listing_summary
+from http_detail_fetcher import GurunaviHttpDetailFetcher, HTTP_FETCH_AVAILABLE
+from async_detail_pipeline import AsyncDetailPipeline, ASYNC_PIPELINE_AVAILABLE
+from parse_pool import ParsePool
+from rate_limiter import PolitenessBudget
+from response_guard import ResponseGuard, RESPONSE_OK
+from driver_pool import DriverPool
+from chrome_driver_manager import BLOCKED_URL_PATTERNS
+from page_readiness import PageReadinessWaiter, DETAIL_READY_SELECTORS
 
 try:
     from selenium import webdriver
@@ -30,20 +52,61 @@ except ImportError:
 class ImprovedScraperEngine:
     """段階的動的生成対応スクレイピングエンジンクラス（住所取得対応版）"""
     
-    def __init__(self, chrome_manager, prefecture_mapper, config, callback=None):
+    def __init__(self, chrome_manager, prefecture_mapper, config, callback=None, budget=None):
         self.logger = logging.getLogger(__name__)
         self.chrome_manager = chrome_manager
         self.prefecture_mapper = prefecture_mapper
         self.config = config
         self.callback = callback
+        # 対象サイト（模擬サーバーで試験する場合は site_base_url にそのURLを指定）
+        self.site_base_url = (self.config.get('site_base_url') or getattr(prefecture_mapper, 'base_url', SITE_BASE_URL)).rstrip('/')
+        self.store_host = store_host_of(self.site_base_url)
+        if self.config.get('site_base_url'):
+            prefecture_mapper.base_url = self.site_base_url
         self.driver = None
         self.ua_index = 0
         self.access_count = 0
-        self.processed_urls = set()
+        # 一覧の重複除去（直近は正確に保持し、古いURLはBloomフィルタでメモリを一定に保つ）
+        self.processed_urls = BoundedUrlSet(
+            max_exact=self.config.get('dedupe_exact_size', 20000),
+            bloom_capacity=self.config.get('dedupe_bloom_capacity', 1000000)
+        )
+        
+        # HTTP取得モード（解析失敗時のみSeleniumにフォールバック）
+        self.detail_fetch_mode = self.config.get('detail_fetch_mode', 'http')
+        self.http_fetcher = None
+        self.async_pipeline = None
+        self.driver_pool = None
+        self.listing_crawler = None
+        self._shard_crawlers = set()
+        self._shard_lock = threading.Lock()
+        self.listing_plan = None
+        self.shard_collector = None
+        self._on_new_store_urls = None
+        self.stop_requested = False
         
         # Excel保存用の変数
         self.excel_file_path = None
         self.current_results = []
+        self.result_journal = None
+        self.store_list = []
+        
+        # 中断再開用のチェックポイント
+        self.checkpoint = None
+        self.search_params = None
+        self.completed_rows = set()
+        
+        # 実行をまたいだ店舗詳細キャッシュ
+        self.store_cache = self._open_store_cache()
+        
+        # 取得ページのアーカイブ（抽出ロジック修正後の再抽出用）
+        self.page_archive = self._open_page_archive()
+        
+        # エリア差分モード（前回の店舗一覧との比較）
+        self.snapshot_store = AreaSnapshotStore(self.config.get('area_snapshot_dir', 'area_snapshots'), self.logger)
+        self.area_delta = None
+        self.listing_fingerprints = {}
+        self._area_listing = None
         
         # 並列保存用の設定
         self.save_queue = None
@@ -63,23 +126,46 @@ class ImprovedScraperEngine:
             'successful_stores': 0,
             'failed_stores': 0,
             'ua_switches': 0,
+            'ua_switch_restarts': 0,
+            'ua_switch_seconds': 0.0,
+            'ua_switch_saved_seconds': 0.0,
+            'driver_start_seconds': 0.0,
             'captcha_encounters': 0,
             'ip_restrictions': 0,
+            'server_errors': 0,
             'estimated_completion': None,
             'phone_extraction_failures': 0,
             'address_extraction_failures': 0,  # 住所取得失敗カウント追加
+            'http_fetches': 0,
+            'selenium_fallbacks': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'not_found_pages': 0,
+            'requeued_requests': 0,
+            'backoff_seconds': 0.0,
             'success_rate': 1.0
         }
         
         # 時間帯別速度調整
         self.time_multiplier = self._get_time_multiplier()
         
+        # 対象要素の出現で待機を終えるページ準備待機
+        self.readiness_waiter = PageReadinessWaiter(
+            timeout=self.config.get('page_ready_timeout', 10.0),
+            logger=self.logger
+        )
+        
+        # 全取得経路で共有するアクセス間隔（複数ジョブの同時実行時は外部から共有）
+        self.politeness_budget = budget or PolitenessBudget(self.config, self.time_multiplier)
+        
+        # CAPTCHA・IP制限の検出（検出時は共有のアクセス間隔を止めて同じURLを再取得）
+        self.response_guard = ResponseGuard(self.config, self.stats, self.politeness_budget, self.logger)
+        
         # プロセス優先度設定
         self._set_process_priority()
     
     def _setup_async_save(self):
         """非同期保存の設定"""
-        import queue
         from concurrent.futures import ThreadPoolExecutor
         
         self.save_queue = queue.Queue()
@@ -144,6 +230,7 @@ class ImprovedScraperEngine:
     def initialize_driver(self):
         """ドライバー初期化（最適化オプション付き）"""
         try:
+            started = time.time()
             user_agent = self.config['user_agents'][self.ua_index]
             
             if hasattr(self.chrome_manager, 'create_optimized_driver'):
@@ -169,6 +256,7 @@ class ImprovedScraperEngine:
             self.driver.implicitly_wait(8)
             self.driver.set_script_timeout(20)
             
+            self.stats['driver_start_seconds'] = time.time() - started
             self.logger.info(f"ドライバー初期化完了 (UA: {self.ua_index}) - 最適化版")
             return True
         except Exception as e:
@@ -182,29 +270,67 @@ class ImprovedScraperEngine:
         try:
             if self.driver:
                 self.driver.execute_cdp_cmd('Network.setBlockedURLs', {
-                    'urls': [
-                        '*googletagmanager*', 
-                        '*google-analytics*',
-                        '*doubleclick*', 
-                        '*facebook*',
-                        '*twitter.com/widgets*',
-                        '*platform.twitter*',
-                        '*amazon-adsystem*',
-                        '*googleapis.com/maps*',
-                        '*hotjar*',
-                        '*newrelic*',
-                        '*clarity.ms*'
-                    ]
+                    'urls': BLOCKED_URL_PATTERNS
                 })
                 self.logger.debug("広告・アナリティクスのブロック設定完了")
         except Exception as e:
             self.logger.debug(f"リソースブロック設定エラー: {e}")
     
-    def cleanup(self):
-        """クリーンアップ"""
+    def _get_http_fetcher(self):
+        """HTTP取得クラスを取得（未作成なら作成）"""
+        if self.detail_fetch_mode != 'http' or not HTTP_FETCH_AVAILABLE:
+            return None
+        
+        if self.http_fetcher is None:
+            self.http_fetcher = GurunaviHttpDetailFetcher(
+                user_agent=self.config['user_agents'][self.ua_index],
+                timeout=self.config.get('http_timeout', 15),
+                logger=self.logger
+            )
+            self.logger.info("HTTP取得モードを使用します（解析失敗時のみSelenium）")
+        return self.http_fetcher
+    
+    def _cleanup_driver(self):
+        """ドライバーのみ終了"""
         if self.driver:
             self.chrome_manager.cleanup_driver(self.driver)
             self.driver = None
+    
+    def request_stop(self):
+        """処理中の取得を止める（リソースの解放は処理側の cleanup で行う）"""
+        self.stop_requested = True
+        if self.shard_collector:
+            self.shard_collector.stop()
+        if self.listing_crawler:
+            self.listing_crawler.stop()
+        with self._shard_lock:
+            for crawler in self._shard_crawlers:
+                crawler.stop()
+        if self.async_pipeline:
+            self.async_pipeline.stop()
+        if self.driver_pool:
+            self.driver_pool.stop()
+    
+    def cleanup(self):
+        """クリーンアップ"""
+        self.request_stop()
+        
+        self._cleanup_driver()
+        
+        if self.http_fetcher:
+            self.http_fetcher.close()
+            self.http_fetcher = None
+        
+        if self.result_journal:
+            self.result_journal.close()
+        
+        if self.store_cache:
+            self.store_cache.close()
+            self.store_cache = None
+        
+        if self.page_archive:
+            self.page_archive.close()
+            self.page_archive = None
         
         if self.save_queue:
             self.save_queue.put(None)
@@ -212,125 +338,96 @@ class ImprovedScraperEngine:
             self.save_executor.shutdown(wait=True)
     
     def switch_user_agent(self):
-        """User-Agent切り替え（改善版）"""
+        """User-Agent切り替え（CDPで起動中のドライバーに適用、失敗時のみ再起動）"""
+        started = time.time()
+        old_ua = self.ua_index
+        self.ua_index = (self.ua_index + 1) % len(self.config['user_agents'])
+        self.stats['ua_switches'] += 1
+        user_agent = self.config['user_agents'][self.ua_index]
+        
+        self.logger.info(f"=== UA切り替え開始 (切り替え回数: {self.stats['ua_switches']}) ===")
+        
+        if self.http_fetcher:
+            self.http_fetcher.set_user_agent(user_agent)
+        
+        # ブラウザ未起動（HTTP取得のみ）の場合は再起動不要
+        if self.driver is None:
+            self.logger.info(f"UA切り替え完了（HTTPのみ）: {old_ua} → {self.ua_index}")
+            return
+        
         try:
-            old_ua = self.ua_index
-            self.ua_index = (self.ua_index + 1) % len(self.config['user_agents'])
-            self.stats['ua_switches'] += 1
-            
-            self.logger.info(f"=== UA切り替え開始 (切り替え回数: {self.stats['ua_switches']}) ===")
-            
-            wait_time = random.uniform(8, 12)
-            self.logger.info(f"UA切り替え前の休憩: {wait_time:.1f}秒")
-            time.sleep(wait_time)
-            
-            cookies = None
-            try:
-                cookies = self.driver.get_cookies()
-                self.logger.debug(f"Cookie保存: {len(cookies)}個")
-            except:
-                pass
-            
-            self.cleanup()
-            if not self.initialize_driver():
-                raise Exception("ドライバー再初期化失敗")
-            
-            self.logger.info("信頼性構築のためトップページアクセス")
-            self.driver.get("https://r.gnavi.co.jp")
-            time.sleep(random.uniform(3, 5))
-            
-            if cookies:
-                try:
-                    for cookie in cookies:
-                        if 'expiry' in cookie:
-                            del cookie['expiry']
-                        self.driver.add_cookie(cookie)
-                    self.logger.debug("Cookie復元完了")
-                except Exception as e:
-                    self.logger.warning(f"Cookie復元失敗: {e}")
-            
-            additional_wait = random.uniform(5, 8)
-            self.logger.info(f"UA切り替え完了: {old_ua} → {self.ua_index}、追加待機: {additional_wait:.1f}秒")
-            time.sleep(additional_wait)
-            
-            if self.stats['processed_stores'] % 60 == 0:
-                self.logger.warning("=== 60件処理完了 - 追加の安全対策実行 ===")
-                extra_wait = random.uniform(15, 20)
-                self.logger.info(f"60件境界での特別待機: {extra_wait:.1f}秒")
-                time.sleep(extra_wait)
-            
+            self.chrome_manager.set_user_agent(self.driver, user_agent)
+            elapsed = time.time() - started
+            self.logger.info(f"UA切り替え完了（CDP）: {old_ua} → {self.ua_index} ({elapsed:.2f}秒)")
         except Exception as e:
-            self.logger.error(f"User-Agent切り替えエラー: {e}")
-            raise
+            self.logger.warning(f"CDPでのUA切り替え失敗、ドライバー再起動で復旧: {e}")
+            self._restart_driver_for_user_agent(old_ua)
+            self.stats['ua_switch_restarts'] += 1
+            elapsed = time.time() - started
+        
+        self.stats['ua_switch_seconds'] += elapsed
+        self.stats['ua_switch_saved_seconds'] += max(0.0, self._estimate_restart_switch_cost() - elapsed)
     
-    def wait_with_cooltime(self):
-        """安全なクールタイム待機（動的調整付き）"""
-        base_min = self.config['cooltime_min']
-        base_max = self.config['cooltime_max']
+    def _estimate_restart_switch_cost(self):
+        """再起動方式でのUA切り替えにかかる時間の見積もり（待機時間の期待値 + ドライバー起動時間）"""
+        expected_sleep = 10.0 + 4.0 + 6.5  # 8-12秒 / 3-5秒 / 5-8秒 の中央値
+        if self.stats['processed_stores'] % 60 == 0:
+            expected_sleep += 17.5  # 60件境界の15-20秒
+        return expected_sleep + self.stats['driver_start_seconds']
+    
+    def _restart_driver_for_user_agent(self, old_ua):
+        """ドライバー再起動によるUA切り替え（復旧用）"""
+        wait_time = random.uniform(8, 12)
+        self.logger.info(f"UA切り替え前の休憩: {wait_time:.1f}秒")
+        time.sleep(wait_time)
         
-        adjusted_min = base_min * self.time_multiplier
-        adjusted_max = base_max * self.time_multiplier
+        cookies = None
+        try:
+            cookies = self.driver.get_cookies()
+            self.logger.debug(f"Cookie保存: {len(cookies)}個")
+        except:
+            pass
+        
+        self._cleanup_driver()
+        if not self.initialize_driver():
+            raise Exception("ドライバー再初期化失敗")
         
-        if self.stats['processed_stores'] > 10:
-            success_rate = self.stats['successful_stores'] / self.stats['processed_stores']
-            if success_rate > 0.9:
-                adjusted_min *= 0.8
-                adjusted_max *= 0.8
-            elif success_rate < 0.5:
-                adjusted_min *= 1.2
-                adjusted_max *= 1.2
+        self.logger.info("信頼性構築のためトップページアクセス")
+        self.driver.get(self.site_base_url)
+        time.sleep(random.uniform(3, 5))
         
-        if 58 <= self.stats['processed_stores'] <= 65:
-            adjusted_min *= 1.5
-            adjusted_max *= 1.5
-            self.logger.debug(f"60件境界付近のため待機時間を1.5倍に調整")
+        if cookies:
+            try:
+                for cookie in cookies:
+                    if 'expiry' in cookie:
+                        del cookie['expiry']
+                    self.driver.add_cookie(cookie)
+                self.logger.debug("Cookie復元完了")
+            except Exception as e:
+                self.logger.warning(f"Cookie復元失敗: {e}")
         
-        cooltime = random.uniform(adjusted_min, adjusted_max)
+        additional_wait = random.uniform(5, 8)
+        self.logger.info(f"UA切り替え完了（再起動）: {old_ua} → {self.ua_index}、追加待機: {additional_wait:.1f}秒")
+        time.sleep(additional_wait)
         
-        self.logger.debug(f"クールタイム待機: {cooltime:.1f}秒 (倍率: {self.time_multiplier})")
-        time.sleep(cooltime)
+        if self.stats['processed_stores'] % 60 == 0:
+            self.logger.warning("=== 60件処理完了 - 追加の安全対策実行 ===")
+            extra_wait = random.uniform(15, 20)
+            self.logger.info(f"60件境界での特別待機: {extra_wait:.1f}秒")
+            time.sleep(extra_wait)
     
     def _wait_for_stepwise_content_load(self):
-        """段階的コンテンツ読み込み完了待機"""
+        """店舗情報要素の出現まで待機（固定スリープなし）"""
         try:
             if self._is_list_page():
-                self.logger.debug("一覧ページのため段階的読み込みをスキップ")
+                self.logger.debug("一覧ページのため読み込み待機をスキップ")
                 return True
             
-            self.logger.debug("段階的コンテンツ読み込み待機開始（詳細ページ）")
-            
-            # スクロールで読み込み誘発
-            scroll_positions = [0, 200, 500, 800, 1100, 1400, 800, 400, 0]
-            for i, position in enumerate(scroll_positions):
-                self.logger.debug(f"スクロール {i+1}/{len(scroll_positions)}: {position}px")
-                self.driver.execute_script(f"window.scrollTo(0, {position});")
-                time.sleep(0.8)
-                
-                if i == 4:
-                    try:
-                        elements_found = len(self.driver.find_elements(By.CSS_SELECTOR, "#info-table, .basic-table"))
-                        if elements_found > 0:
-                            self.logger.debug("中間チェック: 主要要素検出済み")
-                            break
-                    except:
-                        pass
-            
-            # 店舗情報エリアにフォーカス
-            try:
-                info_elements = self.driver.find_elements(By.CSS_SELECTOR, "#info-table, .basic-table, #info-name")
-                if info_elements:
-                    self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", info_elements[0])
-                    time.sleep(1.5)
-                    self.logger.debug("店舗情報エリアにフォーカス完了")
-            except Exception as e:
-                self.logger.debug(f"店舗情報エリアフォーカス失敗: {e}")
-            
-            time.sleep(1.5)
-            
-            return True
+            matched = self.readiness_waiter.wait_for(self.driver, DETAIL_READY_SELECTORS)
+            return matched is not None
             
         except Exception as e:
-            self.logger.error(f"段階的コンテンツ読み込み待機エラー: {e}")
+            self.logger.error(f"コンテンツ読み込み待機エラー: {e}")
             return False
     
     def _is_list_page(self):
@@ -342,67 +439,15 @@ class ImprovedScraperEngine:
             return False
     
     def is_valid_store_url(self, url):
-        """店舗URLの有効性チェック"""
-        if not url or not isinstance(url, str):
-            return False
-        
-        try:
-            parsed = urlparse(url.strip())
-            
-            if parsed.netloc.lower() != 'r.gnavi.co.jp':
-                return False
-            
-            path = parsed.path.rstrip('/')
-            
-            invalid_patterns = [
-                r'/rs/?$',
-                r'/area/',
-                r'/city/',
-                r'/campaign/',
-                r'/lottery/',
-                r'/kanjirank',
-                r'/mycoupon',
-                r'/guide/',
-                r'/help/',
-                r'/search',
-                r'/special/',
-                r'/feature/',
-                r'/category/',
-                r'/genre/',
-                r'/apps',
-                r'/api/',
-                r'/static/',
-                r'/css/',
-                r'/js/',
-                r'/img/',
-                r'^/(hokkaido|aomori|iwate|miyagi|akita|yamagata|fukushima|ibaraki|tochigi|gunma|saitama|chiba|tokyo|kanagawa|niigata|toyama|ishikawa|fukui|yamanashi|nagano|gifu|shizuoka|aichi|mie|shiga|kyoto|osaka|hyogo|nara|wakayama|tottori|shimane|okayama|hiroshima|yamaguchi|tokushima|kagawa|ehime|kochi|fukuoka|saga|nagasaki|kumamoto|oita|miyazaki|kagoshima|okinawa)/?$',
-            ]
-            
-            for pattern in invalid_patterns:
-                if re.search(pattern, path, re.IGNORECASE):
-                    return False
-            
-            valid_patterns = [
-                r'^/[a-zA-Z0-9]{3,20}/?$',
-                r'^/[a-zA-Z0-9]{3,20}/(menu|course|map|coupon|photo|plan)/?$'
-            ]
-            
-            for pattern in valid_patterns:
-                if re.match(pattern, path, re.IGNORECASE):
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            self.logger.warning(f"URL検証エラー: {url} - {e}")
-            return False
+        """店舗URLの有効性チェック（事前コンパイル済みの判定を使用）"""
+        return is_store_url(url, self.store_host)
     
     def get_base_store_url(self, url):
         """店舗URLのベースURL取得"""
         try:
             parsed = urlparse(url)
             
-            if parsed.netloc.lower() != 'r.gnavi.co.jp':
+            if parsed.netloc.lower() != self.store_host:
                 return None
             
             path_parts = parsed.path.strip('/').split('/')
@@ -416,112 +461,430 @@ class ImprovedScraperEngine:
         except Exception:
             return None
     
-    def get_store_list(self, prefecture, city, max_count, unlimited):
-        """店舗一覧取得"""
+    def get_store_list(self, prefecture, city, max_count, unlimited, on_store=None, sharding=True):
+        """
+        店舗一覧取得（HTTPで並列取得、取得できない場合はブラウザで1ページずつ）
+        
+        Args:
+            on_store (callable): on_store(店舗) を新しい店舗が見つかるたびに呼び出す（ストリーミングモード用）
+            sharding (bool): False ならエリア分割の設定に関わらず1本の一覧で取得
+        """
+        if sharding and not city and self.config.get('area_sharding', False):
+            return self.get_store_list_sharded(prefecture, max_count, unlimited, on_store)
+        
         try:
-            if not self.initialize_driver():
-                raise Exception("ドライバー初期化失敗")
-            
-            search_url = self.prefecture_mapper.generate_search_url(prefecture, city, page=1)
-            self.logger.info(f"検索URL: {search_url}")
             self.logger.info(f"検索エリア: {self.prefecture_mapper.get_area_display_name(prefecture, city)}")
+            self.processed_urls.clear()
+            self.listing_fingerprints = {}
+            self.listing_plan = None
             
-            self.driver.get(search_url)
-            self._wait_for_list_page_load()
+            # HTTP取得では一覧ページごとに店舗を通知
+            self._on_new_store_urls = None
+            if on_store:
+                self._on_new_store_urls = lambda urls, offset: [
+                    on_store(self._make_store_entry(url, offset + i)) for i, url in enumerate(urls, 1)
+                ]
             
-            current_url = self.driver.current_url
-            page_title = self.driver.title
-            self.logger.info(f"ページ読み込み完了 - URL: {current_url}")
-            self.logger.info(f"ページタイトル: {page_title}")
+            all_store_urls = self._collect_store_urls_via_http(prefecture, city, max_count, unlimited)
+            self._on_new_store_urls = None
+            browser_listing = all_store_urls is None
+            if browser_listing:
+                all_store_urls = self._collect_store_urls_via_browser(prefecture, city, max_count, unlimited)
             
-            if "404" in page_title or "エラー" in page_title or "見つかりません" in page_title:
-                raise Exception(f"エラーページが表示されました: {page_title}")
+            store_list = [self._make_store_entry(url, i) for i, url in enumerate(all_store_urls, 1)]
             
-            all_store_urls = []
-            page_num = 1
-            self.processed_urls.clear()
-            consecutive_empty_pages = 0
-            max_pages = 50 if unlimited else min(20, (max_count // 30) + 5)
-            
-            while len(all_store_urls) < (float('inf') if unlimited else max_count):
-                if self.callback:
-                    self.callback({
-                        'phase': 'listing',
-                        'message': f'ページ {page_num} の店舗URL取得中...',
-                        'progress': min((len(all_store_urls) / max_count) * 50, 50) if not unlimited else 0,
-                        'current': len(all_store_urls),
-                        'target': max_count if not unlimited else '無制限'
-                    })
-                
-                self.logger.info(f"ページ {page_num} の店舗URL取得中...")
-                page_store_urls = self._extract_store_urls_from_page()
+            # ブラウザ取得はメインのドライバーを使うため、詳細取得と競合しないよう全件取得後に通知
+            if on_store and browser_listing:
+                for store in store_list:
+                    on_store(store)
+            
+            self.logger.info(f"店舗一覧取得完了: {len(store_list)}件")
+            return store_list
+            
+        except Exception as e:
+            self.logger.error(f"店舗一覧取得エラー: {e}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+            raise
+    
+    def get_store_list_sharded(self, prefecture, max_count, unlimited, on_store=None):
+        """
+        都道府県・全国の店舗一覧をおすすめエリアごとに分割して取得
+        
+        1本の長い一覧はページ数の上限で打ち切られるため、エリア単位の短い一覧を
+        共有のアクセス間隔の範囲で並行取得し、エリア間で重複する店舗を除いて統合する
+        """
+        shards = plan_area_shards(
+            self.prefecture_mapper, prefecture,
+            catch_all=self.config.get('shard_catch_all', True)
+        )
+        concurrency = self.config.get('shard_concurrency', 2)
+        self.logger.info(
+            f"エリア分割取得: {self.prefecture_mapper.get_area_display_name(prefecture)} → "
+            f"{len(shards)}エリア (同時{concurrency}エリア)"
+        )
+        
+        # エリア単位の一覧はHTTPの軽量な取得で行う（ブラウザでは並行取得できないため分割しない）
+        if self.config.get('listing_fetch_mode', 'http') != 'http' or not LISTING_CRAWL_AVAILABLE:
+            self.logger.warning("エリア分割取得にはHTTPでの一覧取得が必要なため、分割せずに取得します")
+            return self.get_store_list(prefecture, '', max_count, unlimited, on_store, sharding=False)
+        
+        self.listing_plan = None
+        self.listing_fingerprints = {}
+        collector = self.shard_collector = ShardedListingCollector(
+            self._collect_shard_store_list, shards, concurrency=concurrency, callback=self.callback, logger=self.logger
+        )
+        try:
+            store_list = collector.collect(max_count, unlimited, on_store)
+        finally:
+            self.shard_collector = None
+        
+        self.processed_urls.clear()
+        for store in store_list:
+            self.processed_urls.add(store['url'])
+        self.stats['shard_duplicates'] = collector.duplicates
+        return store_list
+    
+    def _make_store_entry(self, url, index):
+        """一覧の店舗エントリ（店舗名は詳細取得で確定）"""
+        try:
+            parsed = urlparse(url)
+            store_id = parsed.path.strip('/').split('/')[0]
+            name = f"店舗ID: {store_id}"
+        except:
+            name = f"店舗 {index}"
+        
+        entry = {
+            'name': name,
+            'url': url
+        }
+        fingerprint = self.listing_fingerprints.get(store_key(url))
+        if fingerprint:
+            entry['fingerprint'] = fingerprint
+        return entry
+    
+    def _record_listing_cards(self, html_text, page_url):
+        """差分モード用に一覧ページの店舗カードの内容ハッシュを記録"""
+        if self.config.get('diff_mode', False) and html_text:
+            self.listing_fingerprints.update(listing_card_fingerprints(html_text, page_url, self.is_valid_store_url))
+    
+    def _get_max_pages(self, max_count, unlimited):
+        """取得する最大ページ数"""
+        return 50 if unlimited else min(20, (max_count // 30) + 5)
+    
+    def _count_listing_pages(self, html_text, max_count, unlimited):
+        """
+        1ページ目の検索結果件数・最終ページから取得するページ数を算出
+        
+        1ページあたりの件数はサイトの表示件数（listing_per_page、ページに表示範囲があればそちら）。
+        ページ内の店舗リンク数はPR枠なども含み多めになるため使わない
+        
+        Returns:
+            tuple: (ページ数, parse_listing_summary() の結果)
+        """
+        summary = parse_listing_summary(html_text or '', self.config.get('listing_per_page', 30))
+        per_page = summary['per_page']
+        planned_pages = self._get_max_pages(max_count, unlimited)
+        if summary['last_page']:
+            planned_pages = min(planned_pages, summary['last_page'])
+        if summary['total_hits'] is not None and not unlimited and per_page:
+            # 目標件数に必要なページ数（ページ間の重複に備えて1ページ余分に）
+            planned_pages = min(planned_pages, math.ceil(max_count / per_page) + 1)
+        return max(1, planned_pages), summary
+    
+    def _plan_listing_crawl(self, html_text, max_count, unlimited):
+        """
+        1ページ目の検索結果件数・最終ページから取得ページ数を決定
+        
+        Returns:
+            int: 取得するページ数（件数が読めない場合は従来の上限）
+        """
+        planned_pages, summary = self._count_listing_pages(html_text, max_count, unlimited)
+        total_hits = summary['total_hits']
+        last_page = summary['last_page']
+        
+        if total_hits is not None:
+            expected_stores = total_hits if unlimited else min(max_count, total_hits)
+        else:
+            expected_stores = None if unlimited else max_count
+        
+        self.listing_plan = {
+            'total_hits': total_hits,
+            'last_page': last_page,
+            'per_page': summary['per_page'],
+            'planned_pages': planned_pages,
+            'expected_stores': expected_stores,
+            'pages_done': 1,
+            'started': time.time()
+        }
+        
+        self.logger.info(
+            f"検索結果: {total_hits if total_hits is not None else '不明'}件 / "
+            f"最終ページ: {last_page or '不明'} → {planned_pages}ページ取得予定"
+        )
+        return planned_pages
+    
+    def _notify_listing_progress(self, page_num, collected, max_count, unlimited):
+        if self.listing_plan:
+            self.listing_plan['pages_done'] = max(self.listing_plan['pages_done'], page_num)
+            self._update_estimated_completion()
+        
+        if self.callback:
+            progress_data = {
+                'phase': 'listing',
+                'message': f'ページ {page_num} の店舗URL取得中...',
+                'progress': min((collected / max_count) * 50, 50) if not unlimited else 0,
+                'current': collected,
+                'target': max_count if not unlimited else '無制限'
+            }
+            if self.listing_plan:
+                planned_pages = self.listing_plan['planned_pages']
+                progress_data['message'] = f'ページ {page_num}/{planned_pages} の店舗URL取得中...'
+                if unlimited:
+                    progress_data['progress'] = min((page_num / planned_pages) * 50, 50)
+                progress_data['stats'] = self.get_processing_stats()
+            self.callback(progress_data)
+    
+    def _add_page_store_urls(self, page_num, page_store_urls, all_store_urls, max_count, unlimited):
+        """ページ内の店舗URLを重複除去して追加"""
+        new_urls = []
+        for url in page_store_urls:
+            base_url = self.get_base_store_url(url)
+            if self.processed_urls.add(base_url):
+                new_urls.append(base_url)
+        
+        if not unlimited:
+            remaining = max_count - len(all_store_urls)
+            new_urls = new_urls[:remaining]
+        
+        offset = len(all_store_urls)
+        all_store_urls.extend(new_urls)
+        self.logger.info(f"ページ {page_num}: {len(new_urls)}件取得 (累計: {len(all_store_urls)}件)")
+        
+        if self._on_new_store_urls and new_urls:
+            self._on_new_store_urls(new_urls, offset)
+        return new_urls
+    
+    def _collect_store_urls_via_http(self, prefecture, city, max_count, unlimited):
+        """
+        一覧ページをHTTPで先読みしながら取得
+        
+        Returns:
+            list: 店舗URL（1ページ目から取得できない場合はNoneを返しブラウザで取得）
+        """
+        if self.config.get('listing_fetch_mode', 'http') != 'http' or not LISTING_CRAWL_AVAILABLE:
+            return None
+        
+        crawler = self.listing_crawler = GurunaviListingCrawler(
+            budget=self.politeness_budget,
+            url_filter=self.is_valid_store_url,
+            user_agent=self.config['user_agents'][self.ua_index],
+            concurrency=self.config.get('listing_concurrency', 3),
+            timeout=self.config.get('http_timeout', 15),
+            guard=self.response_guard,
+            logger=self.logger
+        )
+        
+        all_store_urls = []
+        consecutive_failures = 0
+        url_for_page = lambda page: self.prefecture_mapper.generate_search_url(prefecture, city, page=page)
+        self.logger.info(f"検索URL: {url_for_page(1)} (HTTP並列取得: 先読み{crawler.concurrency}ページ)")
+        
+        try:
+            # 1ページ目で検索結果件数を読み、取得ページ数を決めてから先読み
+            first_page = crawler.fetch_page(1, url_for_page(1))
+            if first_page.failed or not first_page.store_urls:
+                self.logger.warning("1ページ目の店舗URLをHTTPで取得できないためブラウザで取得します")
+                return None
+            self._archive_page(first_page.url, first_page.html_text, KIND_LISTING)
+            self._record_listing_cards(first_page.html_text, first_page.url)
+            
+            max_pages = self._plan_listing_crawl(first_page.html_text, max_count, unlimited)
+            self._notify_listing_progress(1, 0, max_count, unlimited)
+            self._add_page_store_urls(1, first_page.store_urls, all_store_urls, max_count, unlimited)
+            if not unlimited and len(all_store_urls) >= max_count:
+                self.logger.info(f"目標件数に到達しました: {len(all_store_urls)}件")
+                return all_store_urls
+            
+            for page in crawler.iter_pages(url_for_page, max_pages, first_page=2):
+                self._notify_listing_progress(page.page_num, len(all_store_urls), max_count, unlimited)
                 
-                if not page_store_urls:
-                    consecutive_empty_pages += 1
-                    self.logger.warning(f"ページ {page_num} で店舗URLが見つかりません（連続{consecutive_empty_pages}回目）")
-                    
-                    if consecutive_empty_pages >= 3:
-                        self.logger.warning("3ページ連続で店舗が見つからないため終了します")
+                if page.failed or not page.store_urls:
+                    if not page.failed:
+                        # 店舗の無いページ = 最終ページを超えた
+                        self.logger.info(f"ページ {page.page_num} に店舗が無いため終了します")
                         break
-                else:
-                    consecutive_empty_pages = 0
-                    
-                    new_urls = []
-                    for url in page_store_urls:
-                        base_url = self.get_base_store_url(url)
-                        if base_url not in self.processed_urls:
-                            new_urls.append(base_url)
-                            self.processed_urls.add(base_url)
-                    
-                    if not unlimited:
-                        remaining = max_count - len(all_store_urls)
-                        new_urls = new_urls[:remaining]
-                    
-                    all_store_urls.extend(new_urls)
-                    self.logger.info(f"ページ {page_num}: {len(new_urls)}件取得 (累計: {len(all_store_urls)}件)")
+                    consecutive_failures += 1
+                    if consecutive_failures >= 3:
+                        self.logger.warning("3ページ連続で取得に失敗したため終了します")
+                        break
+                    continue
+                
+                consecutive_failures = 0
+                self._archive_page(page.url, page.html_text, KIND_LISTING)
+                self._record_listing_cards(page.html_text, page.url)
+                self._add_page_store_urls(page.page_num, page.store_urls, all_store_urls, max_count, unlimited)
                 
                 if not unlimited and len(all_store_urls) >= max_count:
                     self.logger.info(f"目標件数に到達しました: {len(all_store_urls)}件")
                     break
-                
-                if page_num >= max_pages:
-                    self.logger.warning(f"最大ページ数({max_pages})に到達しました")
+            else:
+                self.logger.info(f"予定ページ数({max_pages})の取得を完了しました")
+        finally:
+            crawler.close()
+            self.listing_crawler = None
+        
+        return all_store_urls
+    
+    def _collect_shard_store_list(self, shard, max_count, unlimited):
+        """
+        エリア分割取得の1エリア分の一覧をHTTPで取得
+        
+        並行する全エリアでこのエンジンのアクセス間隔・応答判定・アーカイブを共有し、
+        ブラウザ・保存スレッドなどは持たない一覧専用の取得器だけを作る。
+        
+        Returns:
+            list: 店舗一覧（エリア内の重複は除去済み、エリア間の重複は呼び出し側で除去）
+        """
+        crawler = GurunaviListingCrawler(
+            budget=self.politeness_budget,
+            url_filter=self.is_valid_store_url,
+            user_agent=self.config['user_agents'][self.ua_index],
+            concurrency=self.config.get('listing_concurrency', 3),
+            timeout=self.config.get('http_timeout', 15),
+            guard=self.response_guard,
+            logger=self.logger
+        )
+        with self._shard_lock:
+            self._shard_crawlers.add(crawler)
+        if self.stop_requested:
+            crawler.stop()
+        
+        url_for_page = lambda page: self.prefecture_mapper.generate_search_url(shard.prefecture, shard.city, page=page)
+        store_urls = []
+        seen = set()
+        consecutive_failures = 0
+        try:
+            first_page = crawler.fetch_page(1, url_for_page(1))
+            if first_page.failed:
+                raise Exception(f"1ページ目を取得できません ({first_page.error})")
+            max_pages, _ = self._count_listing_pages(first_page.html_text, max_count, unlimited)
+            
+            for page in itertools.chain([first_page], crawler.iter_pages(url_for_page, max_pages, first_page=2)):
+                if page.failed:
+                    consecutive_failures += 1
+                    if consecutive_failures >= 3:
+                        self.logger.warning(f"{shard.label}: 3ページ連続で取得に失敗したため終了します")
+                        break
+                    continue
+                if not page.store_urls:
                     break
                 
-                if page_num % 10 == 0:
-                    self._perform_memory_cleanup_light(page_num)
-                
-                page_num += 1
-                next_url = self.prefecture_mapper.generate_search_url(prefecture, city, page=page_num)
-                
-                self.logger.info(f"次ページへ移動: {next_url}")
-                self.driver.get(next_url)
-                
-                self._wait_for_list_page_load()
-                self.wait_with_cooltime()
+                consecutive_failures = 0
+                self._archive_page(page.url, page.html_text, KIND_LISTING)
+                self._record_listing_cards(page.html_text, page.url)
+                for url in page.store_urls:
+                    base_url = self.get_base_store_url(url)
+                    if base_url and base_url not in seen:
+                        seen.add(base_url)
+                        store_urls.append(base_url)
+                if not unlimited and len(store_urls) >= max_count:
+                    break
+        finally:
+            crawler.close()
+            with self._shard_lock:
+                self._shard_crawlers.discard(crawler)
+        
+        if not unlimited:
+            store_urls = store_urls[:max_count]
+        return [self._make_store_entry(url, i) for i, url in enumerate(store_urls, 1)]
+    
+    def _collect_store_urls_via_browser(self, prefecture, city, max_count, unlimited):
+        """ブラウザで一覧ページを1ページずつ取得"""
+        if not self.initialize_driver():
+            raise Exception("ドライバー初期化失敗")
+        
+        search_url = self.prefecture_mapper.generate_search_url(prefecture, city, page=1)
+        self.logger.info(f"検索URL: {search_url}")
+        
+        outcome = self._load_listing_page(search_url)
+        
+        current_url = self.driver.current_url
+        page_title = self.driver.title
+        self.logger.info(f"ページ読み込み完了 - URL: {current_url}")
+        self.logger.info(f"ページタイトル: {page_title}")
+        
+        if outcome != RESPONSE_OK or "エラー" in page_title:
+            raise Exception(f"エラーページが表示されました ({outcome}): {page_title}")
+        
+        all_store_urls = []
+        page_num = 1
+        consecutive_empty_pages = 0
+        max_pages = None
+        
+        while len(all_store_urls) < (float('inf') if unlimited else max_count):
+            self._notify_listing_progress(page_num, len(all_store_urls), max_count, unlimited)
+            
+            self.logger.info(f"ページ {page_num} の店舗URL取得中...")
+            page_store_urls = self._extract_store_urls_from_page()
             
-            store_list = []
-            for i, url in enumerate(all_store_urls, 1):
+            if max_pages is None:
                 try:
-                    parsed = urlparse(url)
-                    store_id = parsed.path.strip('/').split('/')[0]
-                    name = f"店舗ID: {store_id}"
-                except:
-                    name = f"店舗 {i}"
+                    page_source = self.driver.page_source
+                except Exception:
+                    page_source = ''
+                max_pages = self._plan_listing_crawl(page_source, max_count, unlimited)
+            
+            if not page_store_urls:
+                consecutive_empty_pages += 1
+                self.logger.warning(f"ページ {page_num} で店舗URLが見つかりません（連続{consecutive_empty_pages}回目）")
                 
-                store_list.append({
-                    'name': name,
-                    'url': url
-                })
+                if consecutive_empty_pages >= 3:
+                    self.logger.warning("3ページ連続で店舗が見つからないため終了します")
+                    break
+            else:
+                consecutive_empty_pages = 0
+                if self.config.get('diff_mode', False):
+                    try:
+                        self._record_listing_cards(self.driver.page_source, self.driver.current_url)
+                    except Exception as e:
+                        self.logger.debug(f"店舗カードの取得失敗: {e}")
+                self._add_page_store_urls(page_num, page_store_urls, all_store_urls, max_count, unlimited)
             
-            self.logger.info(f"店舗一覧取得完了: {len(store_list)}件")
-            return store_list
+            if not unlimited and len(all_store_urls) >= max_count:
+                self.logger.info(f"目標件数に到達しました: {len(all_store_urls)}件")
+                break
             
-        except Exception as e:
-            self.logger.error(f"店舗一覧取得エラー: {e}")
-            import traceback
-            self.logger.error(traceback.format_exc())
-            raise
+            if page_num >= max_pages:
+                self.logger.info(f"予定ページ数({max_pages})に到達しました")
+                break
+            
+            if page_num % 10 == 0:
+                self._perform_memory_cleanup_light(page_num)
+            
+            page_num += 1
+            next_url = self.prefecture_mapper.generate_search_url(prefecture, city, page=page_num)
+            
+            self.logger.info(f"次ページへ移動: {next_url}")
+            self._load_listing_page(next_url)
+        
+        return all_store_urls
+    
+    def _load_listing_page(self, url):
+        """
+        一覧ページをブラウザで開く（CAPTCHA・IP制限時はバックオフして開き直す）
+        
+        Returns:
+            str: 応答の分類
+        """
+        while True:
+            self.politeness_budget.wait()
+            started = time.monotonic()
+            self.driver.get(url)
+            self._wait_for_list_page_load()
+            outcome, retry = self.response_guard.inspect_driver(self.driver, url, time.monotonic() - started)
+            if not retry:
+                return outcome
     
     def _wait_for_list_page_load(self):
         """一覧ページ専用の軽量な読み込み待機"""
@@ -538,7 +901,7 @@ class ImprovedScraperEngine:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             time.sleep(0.5)
             
-            links = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='/r.gnavi.co.jp/']")
+            links = self.driver.find_elements(By.CSS_SELECTOR, f"a[href*='//{self.store_host}/']")
             
             if links:
                 self.logger.debug(f"一覧ページ読み込み完了: {len(links)}個のリンク検出")
@@ -559,10 +922,11 @@ class ImprovedScraperEngine:
             
             import gc
             
-            if len(self.processed_urls) > 500:
-                urls_list = list(self.processed_urls)
-                self.processed_urls = set(urls_list[-500:])
-                self.logger.debug(f"processed_urls制限: {len(urls_list)}件 → 500件")
+            # processed_urlsは自身で上限を保つため、ここでは間引かない（間引くと重複が再流入する）
+            self.logger.debug(
+                f"processed_urls: 正確保持 {self.processed_urls.exact_count}件 / "
+                f"Bloom {self.processed_urls.evicted_count}件"
+            )
             
             gc.collect()
             
@@ -574,30 +938,17 @@ class ImprovedScraperEngine:
             self.logger.warning(f"軽量メモリ解放エラー: {e}")
     
     def _extract_store_urls_from_page(self):
-        """現在ページから店舗URL抽出"""
+        """現在ページから店舗URL抽出（判定・ベースURL化はブラウザ内で実行）"""
         try:
             time.sleep(1)
             
-            all_links = self.driver.execute_script("""
-                const links = Array.from(document.querySelectorAll('a[href]'));
-                return links.map(link => ({
-                    href: link.href,
-                    text: link.textContent.trim(),
-                    title: link.getAttribute('title') || ''
-                }));
-            """)
-            
-            store_urls = []
-            for link_data in all_links:
-                url = link_data['href']
-                
-                if self.is_valid_store_url(url):
-                    normalized_url = url.split('?')[0].rstrip('/')
-                    store_urls.append(normalized_url)
-            
-            unique_urls = list(set(store_urls))
+            try:
+                return extract_store_base_urls(self.driver, self.store_host)
+            except Exception as e:
+                self.logger.debug(f"ブラウザ内での店舗URL抽出失敗、全リンクを取得: {e}")
             
-            return unique_urls
+            all_links = self.driver.execute_script(ALL_LINKS_SCRIPT)
+            return filter_store_urls((link_data['href'] for link_data in all_links), self.is_valid_store_url)
             
         except Exception as e:
             self.logger.error(f"店舗URL抽出エラー: {e}")
@@ -606,57 +957,245 @@ class ImprovedScraperEngine:
     def get_store_detail(self, url):
         """店舗詳細取得()"""
         try:
-            if self.driver is None:
-                self.logger.error("Driver is None before creating extractor")
+            cached = self._get_cached_detail(url)
+            if cached:
+                return cached
+            
+            # HTTP取得（サーバーレンダリング済みHTMLを直接解析）
+            store_data = self._get_store_detail_via_http(url)
+            if store_data:
+                self._count_extraction_failures(store_data)
+                self._cache_detail(store_data)
+                return store_data
+            
+            # 404・再取得上限のURLはブラウザで開き直さない
+            if self.response_guard.terminal_outcome(url):
                 return self._get_default_detail(url)
             
-            if self._quick_error_check():
-                self.logger.warning(f"エラーページ検出: {url}")
+            store_data = self._get_store_detail_via_selenium(url)
+            self._cache_detail(store_data)
+            return store_data
+            
+        except Exception as e:
+            self.logger.error(f"店舗詳細取得エラー: {e}")
+            return self._get_default_detail(url)
+    
+    def apply_area_diff(self, store_list, prefecture, city, complete=True):
+        """
+        前回実行時の店舗一覧と比較し、新規・変更された店舗だけを返す
+        
+        Args:
+            complete (bool): エリアの全店舗を取得した一覧か（件数上限で打ち切った場合はFalse）
+        
+        Returns:
+            list: 詳細取得の対象とする店舗
+        """
+        self.area_delta = self.snapshot_store.diff(prefecture, city, store_list, complete)
+        # 再開時も保存できるよう、一覧全体をチェックポイントに含める
+        self._area_listing = {'prefecture': prefecture, 'city': city, 'stores': store_list, 'complete': complete}
+        
+        previous = self.area_delta.previous_run or 'なし'
+        self.logger.info(
+            f"差分モード (前回: {previous}): {self.area_delta.summary()}"
+            + ("" if complete else " ※件数上限で打ち切った一覧のため削除は判定しません")
+        )
+        return self.area_delta.targets
+    
+    def restore_area_diff(self, resume_state):
+        """
+        チェックポイントに保存した一覧から差分を再計算（再開時）
+        
+        Returns:
+            bool: 差分モードの一覧が保存されていた場合True
+        """
+        area_listing = resume_state.get('area_listing')
+        if not area_listing:
+            return False
+        self.apply_area_diff(
+            area_listing['stores'], area_listing['prefecture'], area_listing['city'], area_listing.get('complete', True)
+        )
+        return True
+    
+    def commit_area_snapshot(self, results=()):
+        """
+        今回の店舗一覧を次回の差分比較用に保存（正常完了時）
+        
+        Args:
+            results (list): 詳細取得の結果（取得失敗の店舗は次回も取得対象にする）
+        """
+        if not self._area_listing:
+            return
+        failed = {store_key(row['URL']) for row in results if row.get('店舗名') in ('取得失敗', '-')}
+        self.snapshot_store.save(
+            self._area_listing['prefecture'], self._area_listing['city'], self._area_listing['stores'],
+            complete=self._area_listing['complete'], exclude=failed
+        )
+        self._area_listing = None
+    
+    def _open_store_cache(self):
+        """店舗詳細キャッシュを開く（無効化・失敗時はNone）"""
+        if not self.config.get('store_cache_enabled', True):
+            return None
+        try:
+            return StoreCache(
+                self.config.get('store_cache_path', 'store_cache.db'),
+                ttl_hours=self.config.get('store_cache_ttl_hours', 72),
+                logger=self.logger
+            )
+        except Exception as e:
+            self.logger.warning(f"店舗キャッシュを開けないため無効化します: {e}")
+            return None
+    
+    def _open_page_archive(self):
+        """ページアーカイブを開く（無効化・失敗時はNone）"""
+        if not self.config.get('page_archive_enabled', False):
+            return None
+        try:
+            return PageArchive(
+                self.config.get('page_archive_path', 'page_archive'),
+                compression=self.config.get('page_archive_compression', 'zstd'),
+                logger=self.logger
+            )
+        except Exception as e:
+            self.logger.warning(f"ページアーカイブを開けないため無効化します: {e}")
+            return None
+    
+    def _archive_page(self, url, html_text, kind=KIND_STORE, status_code=None):
+        """
+        取得したページをアーカイブに保存（無効時は何もしない）
+        Seleniumの経路では応答そのものではなく、JavaScript実行後の driver.page_source を渡す
+        """
+        if self.page_archive:
+            self.page_archive.put(url, html_text, kind, status_code)
+    
+    def _get_cached_detail(self, url):
+        """有効期限内のキャッシュがあれば店舗データを返す"""
+        if not self.store_cache:
+            return None
+        
+        cached = self.store_cache.get(self.get_base_store_url(url))
+        if cached is None:
+            self.stats['cache_misses'] += 1
+            return None
+        
+        self.stats['cache_hits'] += 1
+        self.logger.debug(f"キャッシュから取得: {url}")
+        return dict(cached, URL=url)
+    
+    def _cache_detail(self, detail):
+        """取得した店舗データをキャッシュに保存"""
+        if self.store_cache and detail:
+            self.store_cache.put(self.get_base_store_url(detail['URL']), detail)
+    
+    def _serve_from_cache(self, store_list):
+        """並行取得の前にキャッシュ済みの店舗を記録"""
+        if not self.store_cache:
+            return
+        
+        for row_number, url in self._pending_items(store_list):
+            cached = self._get_cached_detail(url)
+            if cached:
+                self._record_detail(row_number, cached)
+                self._notify_detail_progress(row_number, cached, len(store_list))
+    
+    def _get_store_detail_via_selenium(self, url):
+        """Seleniumで店舗詳細取得"""
+        try:
+            if self.driver is None and not self.initialize_driver():
+                self.logger.error("Driver is None before creating extractor")
                 return self._get_default_detail(url)
             
-            if 58 <= self.stats['processed_stores'] <= 62:
-                extra_wait = random.uniform(3, 5)
-                self.logger.warning(f"60件境界付近での追加待機: {extra_wait:.1f}秒")
-                time.sleep(extra_wait)
+            while True:
+                self.politeness_budget.wait()
+                started = time.monotonic()
+                success = self._get_with_retry(url)
+                if not success:
+                    self.politeness_budget.record_error("ページ読み込み失敗")
+                    return self._get_default_detail(url)
+                
+                outcome, retry = self.response_guard.inspect_driver(self.driver, url, time.monotonic() - started)
+                if not retry:
+                    break
             
-            success = self._get_with_retry(url)
-            if not success:
+            if outcome != RESPONSE_OK:
+                self.logger.warning(f"エラーページ検出 ({outcome}): {url}")
                 return self._get_default_detail(url)
             
             self._wait_for_stepwise_content_load()
+            if self.page_archive:
+                # 応答そのものではなくJavaScript実行後のDOM
+                self._archive_page(url, self.driver.page_source)
             
             # GurunaviAddressExtractorを使用
             from gurunavi_address_extractor import GurunaviAddressExtractor
-            extractor = GurunaviAddressExtractor(self.driver, self.logger)
+            extractor = GurunaviAddressExtractor(
+                self.driver, self.logger, readiness_waiter=self.readiness_waiter, page_ready=True
+            )
             store_data = extractor.extract_store_data_with_address(url)
             
             if store_data:
-                # 統計更新
-                if store_data['電話番号'] == '-':
-                    self.stats['phone_extraction_failures'] += 1
-                    self.logger.warning(f"電話番号取得失敗 (累計: {self.stats['phone_extraction_failures']}件)")
-                
-                if store_data['郵便番号'] == '-':
-                    if 'postal_extraction_failures' not in self.stats:
-                        self.stats['postal_extraction_failures'] = 0
-                    self.stats['postal_extraction_failures'] += 1
-                    self.logger.warning(f"郵便番号取得失敗 (累計: {self.stats['postal_extraction_failures']}件)")
-                
-                if store_data['住所'] == '-':
-                    self.stats['address_extraction_failures'] += 1
-                    self.logger.warning(f"住所取得失敗 (累計: {self.stats['address_extraction_failures']}件)")
-                
-                self.wait_with_cooltime()
+                self._count_extraction_failures(store_data)
                 return store_data
             
             # フォールバック
-            self.wait_with_cooltime()
             return self._get_default_detail(url)
             
         except Exception as e:
             self.logger.error(f"店舗詳細取得エラー: {e}")
             return self._get_default_detail(url)
     
+    def _get_store_detail_via_http(self, url):
+        """HTTPで店舗詳細取得（失敗時はNoneを返しSeleniumにフォールバック）"""
+        fetcher = self._get_http_fetcher()
+        if fetcher is None:
+            return None
+        
+        while True:
+            self.politeness_budget.wait()
+            started = time.monotonic()
+            try:
+                status_code, html_text = fetcher.fetch_html(url)
+            except Exception as e:
+                self.logger.warning(f"HTTP取得エラー: {url} - {e}")
+                self.politeness_budget.record_error()
+                break
+            
+            outcome, retry = self.response_guard.inspect(
+                url, status_code, html_text, elapsed=time.monotonic() - started
+            )
+            if retry:
+                continue
+            if outcome != RESPONSE_OK:
+                self.logger.warning(f"取得できないページ ({outcome}): {url}")
+                return None
+            
+            self._archive_page(url, html_text, KIND_STORE, status_code)
+            store_data = fetcher.parser.parse(html_text, url)
+            if store_data:
+                self.stats['http_fetches'] += 1
+                return store_data
+            break
+        
+        self.stats['selenium_fallbacks'] += 1
+        self.logger.info(f"HTTP解析失敗のためSeleniumで再取得: {url}")
+        return None
+    
+    def _count_extraction_failures(self, store_data):
+        """項目別の取得失敗を集計"""
+        if store_data['電話番号'] == '-':
+            self.stats['phone_extraction_failures'] += 1
+            self.logger.warning(f"電話番号取得失敗 (累計: {self.stats['phone_extraction_failures']}件)")
+        
+        if store_data['郵便番号'] == '-':
+            if 'postal_extraction_failures' not in self.stats:
+                self.stats['postal_extraction_failures'] = 0
+            self.stats['postal_extraction_failures'] += 1
+            self.logger.warning(f"郵便番号取得失敗 (累計: {self.stats['postal_extraction_failures']}件)")
+        
+        if store_data['住所'] == '-':
+            self.stats['address_extraction_failures'] += 1
+            self.logger.warning(f"住所取得失敗 (累計: {self.stats['address_extraction_failures']}件)")
+    
     def _get_with_retry(self, url, max_retries=2):
         """リトライ機能付きページアクセス"""
         for i in range(max_retries):
@@ -681,16 +1220,6 @@ class ImprovedScraperEngine:
                 return False
         return False
     
-    def _quick_error_check(self):
-        """軽量なエラーチェック"""
-        try:
-            title = self.driver.title
-            if any(word in title.lower() for word in ['404', 'error', 'not found', '見つかりません']):
-                return True
-        except:
-            pass
-        return False
-    
     def _get_default_detail(self, url):
         """デフォルトの店舗データ（住所対応版）"""
         from datetime import datetime
@@ -705,6 +1234,10 @@ class ImprovedScraperEngine:
     
     def _update_estimated_completion(self):
         """完了予想時間の更新"""
+        if not self.stats['start_time'] and self.listing_plan:
+            self._update_listing_estimated_completion()
+            return
+        
         if not self.stats['start_time'] or self.stats['total_stores'] == 0:
             return
         
@@ -716,13 +1249,27 @@ class ImprovedScraperEngine:
             
             self.stats['estimated_completion'] = datetime.now() + timedelta(seconds=estimated_remaining)
     
+    def _update_listing_estimated_completion(self):
+        """一覧取得中の完了予想（残りページ + 予定店舗数の詳細取得）"""
+        plan = self.listing_plan
+        if plan['expected_stores'] is None:
+            return
+        
+        elapsed = time.time() - plan['started']
+        pages_done = max(plan['pages_done'], 1)
+        remaining_pages = max(plan['planned_pages'] - pages_done, 0)
+        listing_remaining = remaining_pages * elapsed / pages_done
+        detail_estimate = plan['expected_stores'] * 8 * self.time_multiplier
+        
+        self.stats['estimated_completion'] = datetime.now() + timedelta(seconds=listing_remaining + detail_estimate)
+    
     def get_processing_stats(self):
         """処理統計情報取得（住所対応版）"""
         elapsed = 0
         if self.stats['start_time']:
             elapsed = time.time() - self.stats['start_time']
         
-        return {
+        stats = {
             '経過時間': f"{elapsed/60:.1f}分",
             '処理済み店舗数': self.stats['processed_stores'],
             '成功店舗数': self.stats['successful_stores'],
@@ -730,19 +1277,51 @@ class ImprovedScraperEngine:
             '電話番号取得失敗': self.stats['phone_extraction_failures'],
             '郵便番号取得失敗': self.stats.get('postal_extraction_failures', 0),
             '住所取得失敗': self.stats['address_extraction_failures'],
+            'HTTP取得件数': self.stats['http_fetches'],
+            'Seleniumフォールバック件数': self.stats['selenium_fallbacks'],
+            'キャッシュヒット件数': self.stats['cache_hits'],
+            'キャッシュミス件数': self.stats['cache_misses'],
             'UA切り替え回数': self.stats['ua_switches'],
+            'UA切り替え再起動回数': self.stats['ua_switch_restarts'],
+            'UA切り替え所要時間': f"{self.stats['ua_switch_seconds']:.1f}秒",
+            'UA切り替え短縮時間（推定）': f"{self.stats['ua_switch_saved_seconds']/60:.1f}分",
             'CAPTCHA遭遇回数': self.stats['captcha_encounters'],
             'IP制限遭遇回数': self.stats['ip_restrictions'],
+            'サーバーエラー回数': self.stats['server_errors'],
+            '現在のアクセスレート': f"{self.politeness_budget.requests_per_second:.2f}件/秒",
+            'ページ無し件数': self.stats['not_found_pages'],
+            '制限検出後の再取得件数': self.stats['requeued_requests'],
+            'バックオフ待機時間': f"{self.stats['backoff_seconds']/60:.1f}分",
+            '平均ページ待機時間': f"{self.readiness_waiter.average_wait:.2f}秒",
+            '最大ページ待機時間': f"{self.readiness_waiter.stats['max_wait']:.2f}秒",
+            'ページ待機タイムアウト': self.readiness_waiter.stats['timeouts'],
             '平均処理時間/店舗': f"{elapsed/max(self.stats['processed_stores'], 1):.1f}秒",
             '完了予想時刻': self.stats['estimated_completion'].strftime('%H:%M:%S') if self.stats['estimated_completion'] else 'N/A',
             '現在時間帯倍率': f"{self.time_multiplier}x"
         }
+        
+        if self.listing_plan:
+            total_hits = self.listing_plan['total_hits']
+            stats['検索結果件数'] = total_hits if total_hits is not None else '不明'
+            stats['一覧取得ページ数（予定）'] = self.listing_plan['planned_pages']
+        
+        return stats
     
-    def start_processing(self, store_list, search_params):
-        """メイン処理開始（住所対応版）"""
+    def start_processing(self, store_list, search_params, resume_state=None):
+        """
+        メイン処理開始（住所対応版）
+        
+        Args:
+            store_list (list): 店舗一覧
+            search_params (dict): 検索条件・保存先
+            resume_state (dict): RunCheckpoint.load() の結果（中断した処理を再開する場合）
+        """
         self.stats['start_time'] = time.time()
         self.stats['total_stores'] = len(store_list)
         self.current_results = []
+        self.store_list = store_list
+        self.search_params = search_params
+        self.completed_rows = set()
         
         self.logger.info(f"=== 処理開始 (住所取得対応版) ===")
         self.logger.info(f"対象店舗数: {len(store_list)}")
@@ -750,231 +1329,440 @@ class ImprovedScraperEngine:
         self.logger.info(f"UA切り替え間隔: {self.config['ua_switch_interval']}件")
         self.logger.info(f"予想処理時間: {len(store_list) * 8 * self.time_multiplier / 60:.1f}分")
         
-        save_dir = Path(search_params['save_path'])
-        save_dir.mkdir(parents=True, exist_ok=True)
-        filename = search_params['filename']
-        if not filename.endswith('.xlsx'):
-            filename += '.xlsx'
-        self.excel_file_path = save_dir / filename
-        
-        # 住所カラムを含めてExcel初期化
-        self._initialize_excel_with_urls(store_list)
+        self._prepare_output(search_params, resume_state)
         
-        self._init_memory_monitoring()
+        engine_mode = self.config.get('engine_mode', 'sequential')
         
-        if not self.initialize_driver():
+        # HTTP取得モード・プールモードではメインのブラウザは必要になった時点で起動
+        if engine_mode != 'pool' and self._get_http_fetcher() is None and not self.initialize_driver():
             raise Exception("ドライバー初期化失敗")
         
         try:
-            for idx, store in enumerate(store_list, 1):
-                if self.callback:
-                    progress_data = {
-                        'phase': 'detail',
-                        'message': f'店舗詳細取得中 ({idx}/{len(store_list)}): {store["name"]}',
-                        'progress': (idx / len(store_list)) * 100,
-                        'current': idx,
-                        'total': len(store_list),
-                        'stats': self.get_processing_stats()
-                    }
-                    self.callback(progress_data)
-                
-                detail = self.get_store_detail(store['url'])
-                
-                self._update_excel_row(idx, detail)
-                
-                self.stats['processed_stores'] = idx
-                if detail['店舗名'] != '取得失敗' and detail['店舗名'] != '-':
-                    self.stats['successful_stores'] += 1
-                else:
-                    self.stats['failed_stores'] += 1
-                
-                self.stats['success_rate'] = self.stats['successful_stores'] / self.stats['processed_stores']
-                
-                self._update_estimated_completion()
+            if engine_mode == 'pool':
+                self._process_stores_with_pool(store_list)
+            elif self._use_async_pipeline():
+                self._process_stores_async(store_list)
+            else:
+                self._process_stores_sequential(store_list)
+            
+            return self._finish_processing(store_list)
+            
+        finally:
+            self.cleanup()
+    
+    def start_streaming_processing(self, search_params):
+        """
+        一覧取得と詳細取得を並行実行（ストリーミングモード）
+        
+        一覧ページで見つかった店舗を上限付きキューに入れ、詳細取得側は一覧取得の完了を待たずに順次処理する。
+        
+        Args:
+            search_params (dict): 検索条件・保存先
+        
+        Returns:
+            list: 取得結果
+        """
+        self.stats['start_time'] = time.time()
+        self.current_results = []
+        store_list = self.store_list = []
+        self.search_params = search_params
+        self.completed_rows = set()
+        
+        self.logger.info(f"=== 処理開始 (ストリーミングモード) ===")
+        self._prepare_output(search_params)
+        
+        stream = queue.Queue(maxsize=self.config.get('stream_queue_size', 50))
+        end_of_stream = object()
+        listing_errors = []
+        
+        def enqueue(store):
+            # 詳細取得側が止まった場合に一覧取得側が詰まらないよう待機を区切る
+            while not self.stop_requested:
+                try:
+                    stream.put(store, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+        
+        def produce():
+            try:
+                self.get_store_list(
+                    search_params['prefecture'],
+                    search_params['city'],
+                    search_params['max_count'],
+                    search_params['unlimited'],
+                    on_store=enqueue
+                )
+            except Exception as e:
+                listing_errors.append(e)
+            finally:
+                enqueue(end_of_stream)
+        
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        
+        try:
+            seen_base_urls = set()
+            while not self.stop_requested:
+                try:
+                    store = stream.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if store is end_of_stream:
+                    break
                 
-                if idx % 50 == 0:
-                    self._check_memory_usage()
+                base_url = self.get_base_store_url(store['url']) or store['url']
+                if base_url in seen_base_urls:
+                    continue
+                seen_base_urls.add(base_url)
                 
-                ua_interval = self.config.get('ua_switch_interval', 30)
+                store_list.append(store)
+                row_number = len(store_list)
+                self.stats['total_stores'] = self._expected_store_count(row_number)
                 
-                if idx == 60:
-                    self.logger.warning("=== 60件処理完了 - 特別なUA切り替え実行 ===")
-                    try:
-                        self.switch_user_agent()
-                    except Exception as e:
-                        self.logger.error(f"60件境界でのUA切り替えエラー: {e}")
-                        time.sleep(10)
+                if row_number == 1:
+                    self.logger.info(f"最初の店舗の詳細取得開始: 開始から{time.time() - self.stats['start_time']:.1f}秒")
                 
-                elif idx % ua_interval == 0 and idx < len(store_list) and idx != 60:
-                    self.logger.info(f"定期UA切り替え実行 ({idx}件処理完了)")
-                    try:
-                        self.switch_user_agent()
-                    except Exception as e:
-                        self.logger.error(f"UA切り替えエラー: {e}")
-                        break
-            
-            final_stats = self.get_processing_stats()
-            self.logger.info("=== 処理完了統計 ===")
-            for key, value in final_stats.items():
-                self.logger.info(f"{key}: {value}")
-            
-            self._save_stats_to_excel()
+                detail = self.get_store_detail(store['url'])
+                self._record_detail(row_number, detail)
+                self._notify_detail_progress(row_number, detail, self.stats['total_stores'])
             
-            df = pd.read_excel(self.excel_file_path, sheet_name='店舗詳細')
-            self.current_results = df.to_dict('records')
+            producer.join(timeout=5)
+            if listing_errors and not store_list:
+                raise listing_errors[0]
             
-            return self.current_results
+            self.stats['total_stores'] = len(store_list)
+            return self._finish_processing(store_list)
             
         finally:
             self.cleanup()
     
-    def _initialize_excel_with_urls(self, store_list):
-        """ExcelファイルをURL一覧で初期化"""
-        try:
-            self.logger.info(f"ExcelファイルをURL一覧で初期化: {self.excel_file_path}")
-            
-            # 郵便番号カラムを追加
-            data = []
-            for store in store_list:
-                data.append({
-                    'URL': store['url'],
-                    '店舗名': '',
-                    '電話番号': '',
-                    '郵便番号': '',
-                    '住所': '',
-                    '取得日時': ''
-                })
-            
-            df = pd.DataFrame(data)
-            
-            with pd.ExcelWriter(self.excel_file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='店舗詳細', index=False)
-                
-                worksheet = writer.sheets['店舗詳細']
-                worksheet.column_dimensions['A'].width = 60  # URL
-                worksheet.column_dimensions['B'].width = 30  # 店舗名
-                worksheet.column_dimensions['C'].width = 15  # 電話番号
-                worksheet.column_dimensions['D'].width = 10  # 郵便番号
-                worksheet.column_dimensions['E'].width = 40  # 住所
-                worksheet.column_dimensions['F'].width = 20  # 取得日時
-            
-            self.logger.info(f"URL一覧で初期化完了: {len(store_list)}件")
+    def _expected_store_count(self, discovered):
+        """ストリーミング中の全体件数（一覧の検索結果件数が分かればそれを使用）"""
+        if self.listing_plan and self.listing_plan['expected_stores']:
+            return max(self.listing_plan['expected_stores'], discovered)
+        return discovered
+    
+    def _prepare_output(self, search_params, resume_state=None):
+        """出力先・結果ジャーナル・チェックポイントを準備"""
+        save_dir = Path(search_params['save_path'])
+        save_dir.mkdir(parents=True, exist_ok=True)
+        filename = search_params['filename']
+        if not filename.endswith('.xlsx'):
+            filename += '.xlsx'
+        self.excel_file_path = save_dir / filename
+        
+        # 結果は追記専用ジャーナルに記録し、Excelは最後に一括生成
+        self._open_result_journal(resume=resume_state is not None)
+        
+        self.checkpoint = RunCheckpoint.for_output(search_params['save_path'], filename)
+        if resume_state:
+            self._restore_from_checkpoint(resume_state)
+        self._save_checkpoint()
+        
+        self._init_memory_monitoring()
+    
+    def _finish_processing(self, store_list):
+        """
+        完了統計の出力・結果の集約・チェックポイント整理
+        
+        Excelはここでは書かない（save_results が店舗詳細・処理統計・差分シートを1回で書く）
+        """
+        final_stats = self.get_processing_stats()
+        self.logger.info("=== 処理完了統計 ===")
+        for key, value in final_stats.items():
+            self.logger.info(f"{key}: {value}")
+        
+        self.current_results = self.collect_results()
+        
+        if len(self.completed_rows) >= len(store_list):
+            self.checkpoint.delete()
+        else:
+            self._save_checkpoint()
+        
+        return self.current_results
+    
+    def _use_async_pipeline(self):
+        """asyncio並行取得モードを使うかどうか"""
+        if self.config.get('engine_mode', 'sequential') != 'async':
+            return False
+        if not ASYNC_PIPELINE_AVAILABLE:
+            self.logger.warning("aiohttp/lxmlが無いため逐次処理モードで実行します")
+            return False
+        return True
+    
+    def _process_stores_sequential(self, store_list):
+        """1件ずつ店舗詳細を取得"""
+        for idx, store in enumerate(store_list, 1):
+            if self.stop_requested:
+                self.logger.info(f"停止要求により中断します ({idx - 1}/{len(store_list)}件)")
+                break
+            
+            if idx in self.completed_rows:
+                continue
+            
+            if self.callback:
+                progress_data = {
+                    'phase': 'detail',
+                    'message': f'店舗詳細取得中 ({idx}/{len(store_list)}): {store["name"]}',
+                    'progress': (idx / len(store_list)) * 100,
+                    'current': idx,
+                    'total': len(store_list),
+                    'stats': self.get_processing_stats()
+                }
+                self.callback(progress_data)
+            
+            detail = self.get_store_detail(store['url'])
+            
+            self._record_detail(idx, detail)
+            
+            ua_interval = self.config.get('ua_switch_interval', 30)
+            
+            if idx == 60:
+                self.logger.warning("=== 60件処理完了 - 特別なUA切り替え実行 ===")
+                try:
+                    self.switch_user_agent()
+                except Exception as e:
+                    self.logger.error(f"60件境界でのUA切り替えエラー: {e}")
+                    time.sleep(10)
             
-        except Exception as e:
-            self.logger.error(f"Excel初期化エラー: {e}")
+            elif idx % ua_interval == 0 and idx < len(store_list) and idx != 60:
+                self.logger.info(f"定期UA切り替え実行 ({idx}件処理完了)")
+                try:
+                    self.switch_user_agent()
+                except Exception as e:
+                    self.logger.error(f"UA切り替えエラー: {e}")
+                    break
     
-    def _update_excel_row(self, row_number, detail):
-        """Excelの特定行を更新"""
+    def _process_stores_async(self, store_list):
+        """asyncioで並行取得（アクセス間隔は全体で共有、結果は完了順に記録）"""
+        concurrency = self.config.get('async_concurrency', 4)
+        self.logger.info(
+            f"並行取得モード: 同時{concurrency}件 / 上限 {self.politeness_budget.requests_per_second:.2f}件/秒"
+        )
+        
+        # 解析を別プロセスに分ける（取得スレッドが解析でGILを奪われないように）
+        parse_pool = None
+        parse_workers = self.config.get('parse_workers', 0)
+        if parse_workers:
+            try:
+                parse_pool = ParsePool(parse_workers, logger=self.logger)
+                self.logger.info(f"解析プロセス: {parse_pool.workers}個")
+            except Exception as e:
+                self.logger.warning(f"解析プロセスを起動できないため同一プロセスで解析します: {e}")
+        
+        pipeline = self.async_pipeline = AsyncDetailPipeline(
+            budget=self.politeness_budget,
+            user_agent=self.config['user_agents'][self.ua_index],
+            concurrency=concurrency,
+            timeout=self.config.get('http_timeout', 15),
+            guard=self.response_guard,
+            parse_pool=parse_pool,
+            archive=self.page_archive,
+            logger=self.logger
+        )
+        
+        fallback_items = []
+        
+        def on_result(row_number, url, detail):
+            if detail is None and self.response_guard.terminal_outcome(url):
+                # 404・再取得上限のURLはブラウザで開き直さない
+                detail = self._get_default_detail(url)
+                self._record_detail(row_number, detail)
+                self._notify_detail_progress(row_number, detail, len(store_list))
+                return
+            
+            if detail is None:
+                # 解析失敗分は後でSeleniumで取得
+                fallback_items.append((row_number, url))
+                return
+            
+            self.stats['http_fetches'] += 1
+            self._count_extraction_failures(detail)
+            self._cache_detail(detail)
+            self._record_detail(row_number, detail)
+            self._notify_detail_progress(row_number, detail, len(store_list))
+        
+        self._serve_from_cache(store_list)
+        items = self._pending_items(store_list)
         try:
-            from openpyxl import load_workbook
-            
-            book = load_workbook(self.excel_file_path)
-            sheet = book['店舗詳細']
-            
-            excel_row = row_number + 1
-            
-            # データを更新（郵便番号カラムを追加）
-            sheet.cell(row=excel_row, column=2, value=detail.get('店舗名', ''))      # B列: 店舗名
-            sheet.cell(row=excel_row, column=3, value=detail.get('電話番号', ''))    # C列: 電話番号
-            sheet.cell(row=excel_row, column=4, value=detail.get('郵便番号', ''))    # D列: 郵便番号
-            sheet.cell(row=excel_row, column=5, value=detail.get('住所', ''))        # E列: 住所
-            sheet.cell(row=excel_row, column=6, value=detail.get('取得日時', ''))    # F列: 取得日時
-            
-            book.save(self.excel_file_path)
-            book.close()
+            pipeline.run(items, on_result)
+        finally:
+            self.async_pipeline = None
+            if parse_pool:
+                parse_pool.close(cancel=True)
+        
+        if fallback_items:
+            self.logger.info(f"HTTP解析失敗 {len(fallback_items)}件をSeleniumで取得")
+            for row_number, url in sorted(fallback_items):
+                self.stats['selenium_fallbacks'] += 1
+                detail = self._get_store_detail_via_selenium(url)
+                self._cache_detail(detail)
+                self._record_detail(row_number, detail)
+                self._notify_detail_progress(row_number, detail, len(store_list))
+    
+    def _process_stores_with_pool(self, store_list):
+        """ドライバープールでN並列取得（結果は行番号順に記録）"""
+        self._serve_from_cache(store_list)
+        items = self._pending_items(store_list)
+        if not items:
+            return
+        
+        pool = self.driver_pool = DriverPool(
+            self.chrome_manager,
+            self.config,
+            time_multiplier=self.time_multiplier,
+            budget=self.politeness_budget,
+            logger=self.logger
+        )
+        
+        def on_result(row_number, url, detail):
+            if detail is None:
+                detail = self._get_default_detail(url)
+            else:
+                self._count_extraction_failures(detail)
+                self._cache_detail(detail)
+            self._record_detail(row_number, detail)
+            self._notify_detail_progress(row_number, detail, len(store_list))
+        
+        try:
+            pool.start()
+            pool.process(items, self._extract_with_pool_driver, on_result)
+        finally:
+            pool.close()
+            self.driver_pool = None
+    
+    def _extract_with_pool_driver(self, driver, url):
+        """プールのドライバーで店舗詳細を取得（CAPTCHA・IP制限時はバックオフして開き直す）"""
+        while True:
+            started = time.monotonic()
+            driver.get(url)
+            outcome, retry = self.response_guard.inspect_driver(driver, url, time.monotonic() - started)
+            if not retry:
+                break
+            self.politeness_budget.wait()
+        
+        if outcome != RESPONSE_OK:
+            self.logger.warning(f"エラーページ検出 ({outcome}): {url}")
+            return None
+        
+        self.readiness_waiter.wait_for(driver, DETAIL_READY_SELECTORS)
+        if self.page_archive:
+            # 応答そのものではなくJavaScript実行後のDOM
+            self._archive_page(url, driver.page_source)
+        extractor = GurunaviAddressExtractor(
+            driver, self.logger, readiness_waiter=self.readiness_waiter, page_ready=True
+        )
+        return extractor.extract_store_data_with_address(url)
+    
+    def _pending_items(self, store_list):
+        """未完了の (行番号, URL) のリスト"""
+        return [
+            (idx, store['url'])
+            for idx, store in enumerate(store_list, 1)
+            if idx not in self.completed_rows
+        ]
+    
+    def _restore_from_checkpoint(self, resume_state):
+        """チェックポイントとジャーナルから完了行と統計を復元"""
+        self.completed_rows = set(resume_state.get('completed_rows', []))
+        self.completed_rows.update(self.result_journal.read_records().keys())
+        
+        for key, value in resume_state.get('stats', {}).items():
+            if key in self.stats and key not in ('start_time', 'total_stores'):
+                self.stats[key] = value
+        self.stats['processed_stores'] = len(self.completed_rows)
+        
+        self.logger.info(
+            f"中断した処理を再開: 完了 {len(self.completed_rows)}件 / 全 {len(self.store_list)}件"
+        )
+    
+    def _save_checkpoint(self):
+        """実行状態を保存"""
+        if not self.checkpoint:
+            return
+        # 完了行はジャーナルにも記録済みのため、ここでは統計とともに定期保存
+        self.result_journal.sync()
+        self.checkpoint.save(
+            self.search_params, self.store_list, self.completed_rows, self.stats, area_listing=self._area_listing
+        )
+    
+    def _notify_detail_progress(self, row_number, detail, total):
+        """完了順の進捗通知"""
+        if not self.callback:
+            return
+        
+        done = self.stats['processed_stores']
+        self.callback({
+            'phase': 'detail',
+            'message': f'店舗詳細取得中 ({done}/{total}): 行{row_number} {detail.get("店舗名", "")}',
+            'progress': (done / total) * 100,
+            'current': done,
+            'total': total,
+            'stats': self.get_processing_stats()
+        })
+    
+    def _record_detail(self, row_number, detail):
+        """1件分の結果を記録して統計を更新"""
+        self._append_result_row(row_number, detail)
+        self.completed_rows.add(row_number)
+        
+        self.stats['processed_stores'] += 1
+        if detail['店舗名'] != '取得失敗' and detail['店舗名'] != '-':
+            self.stats['successful_stores'] += 1
+        else:
+            self.stats['failed_stores'] += 1
+        
+        self.stats['success_rate'] = self.stats['successful_stores'] / self.stats['processed_stores']
+        
+        self._update_estimated_completion()
+        
+        if self.stats['processed_stores'] % 50 == 0:
+            self._check_memory_usage()
+        
+        if self.stats['processed_stores'] % self.config.get('checkpoint_interval', 10) == 0:
+            self._save_checkpoint()
+    
+    def _open_result_journal(self, resume=False):
+        """結果ジャーナルを開く（Excelは最後に一括生成、再開時は追記）"""
+        journal_path = self.excel_file_path.with_name(self.excel_file_path.stem + '.journal.jsonl')
+        self.result_journal = ResultJournal(
+            journal_path,
+            fsync_interval=self.config.get('journal_fsync_interval', 50)
+        )
+        self.result_journal.open(truncate=not resume)
+        self.logger.info(f"結果ジャーナル作成: {journal_path}")
+    
+    def _append_result_row(self, row_number, detail):
+        """結果ジャーナルに1行追記"""
+        try:
+            self.result_journal.append(row_number, detail)
             
             if row_number % 10 == 0:
                 status = "成功" if detail.get('店舗名') not in ['', '-', '取得失敗'] else "失敗"
-                self.logger.info(f"Excel更新: {row_number}行目 - {status}")
+                self.logger.info(f"結果記録: {row_number}行目 - {status}")
             
         except Exception as e:
-            self.logger.error(f"Excel行更新エラー (行{row_number}): {e}")
+            self.logger.error(f"結果記録エラー (行{row_number}): {e}")
+    
+    def collect_results(self):
+        """結果ジャーナルから行番号順の結果を集約（未処理の行はURLのみ）"""
+        if not self.result_journal:
+            return []
+        self.result_journal.sync()
+        return self.result_journal.build_rows(self.store_list)
     
-    def _save_stats_to_excel(self):
-        """処理統計を同じExcelの「処理統計」シートに保存（エラー修正版）"""
+    def export_excel(self):
+        """結果ジャーナルからExcelを生成（途中経過の出力用。最終結果は save_results で保存）"""
+        if not self.result_journal or not self.excel_file_path:
+            return []
+        
         try:
-            from openpyxl import load_workbook
-            import pandas as pd
-            
-            stats = self.get_processing_stats()
-            stats_data = []
-            for key, value in stats.items():
-                stats_data.append({'項目': key, '値': str(value)})
-            
-            df_stats = pd.DataFrame(stats_data)
-            
-            if self.excel_file_path.exists():
-                # 既存のExcelファイルを読み込み
-                try:
-                    # 新しい方法: ExcelFileを使って読み込み、新規作成
-                    with pd.ExcelFile(self.excel_file_path) as excel_file:
-                        # 既存のシートを読み込み
-                        sheets_dict = {}
-                        for sheet_name in excel_file.sheet_names:
-                            if sheet_name != '処理統計':  # 処理統計以外のシートを保持
-                                sheets_dict[sheet_name] = pd.read_excel(excel_file, sheet_name=sheet_name)
-                    
-                    # 新しくファイルを作成（上書き）
-                    with pd.ExcelWriter(self.excel_file_path, engine='openpyxl') as writer:
-                        # 既存のシートを書き込み
-                        for sheet_name, df in sheets_dict.items():
-                            df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # 処理統計シートを追加/更新
-                        df_stats.to_excel(writer, sheet_name='処理統計', index=False)
-                        
-                        # 処理統計シートの列幅調整
-                        worksheet = writer.sheets['処理統計']
-                        worksheet.column_dimensions['A'].width = 25
-                        worksheet.column_dimensions['B'].width = 30
-                    
-                    self.logger.info("処理統計を保存しました")
-                    
-                except Exception as e:
-                    # フォールバック: openpyxlで直接操作
-                    self.logger.debug(f"pandas方式失敗、openpyxl直接操作: {e}")
-                    
-                    book = load_workbook(self.excel_file_path)
-                    
-                    # 既存の処理統計シートを削除
-                    if '処理統計' in book.sheetnames:
-                        del book['処理統計']
-                    
-                    # 新しいシートを作成
-                    ws = book.create_sheet('処理統計')
-                    
-                    # ヘッダー追加
-                    ws.cell(row=1, column=1, value='項目')
-                    ws.cell(row=1, column=2, value='値')
-                    
-                    # データ追加
-                    for idx, (key, value) in enumerate(stats.items(), start=2):
-                        ws.cell(row=idx, column=1, value=key)
-                        ws.cell(row=idx, column=2, value=str(value))
-                    
-                    # 列幅設定
-                    ws.column_dimensions['A'].width = 25
-                    ws.column_dimensions['B'].width = 30
-                    
-                    # 保存
-                    book.save(self.excel_file_path)
-                    book.close()
-                    
-                    self.logger.info("処理統計を保存しました（openpyxl直接）")
-            
+            return self.result_journal.export_excel(self.excel_file_path, self.store_list)
         except Exception as e:
-            self.logger.warning(f"処理統計保存エラー: {e}")
-            
-            # エラー時は別ファイルに保存
-            try:
-                stats_path = self.excel_file_path.with_name(
-                    self.excel_file_path.stem + '_stats.csv'
-                )
-                df_stats.to_csv(stats_path, index=False, encoding='utf-8-sig')
-                self.logger.info(f"処理統計をCSVで保存: {stats_path}")
-            except:
-                pass
-                
+            self.logger.error(f"Excel生成エラー: {e}")
+            return self.result_journal.build_rows(self.store_list)
+    
     def _init_memory_monitoring(self):
         """メモリ監視の初期化"""
         try:
@@ -1047,6 +1835,12 @@ class ImprovedScraperEngine:
                     if not df_stats.empty:
                         df_stats.to_excel(writer, sheet_name='処理統計', index=False)
                     
+                    # 差分シート（差分モード時）
+                    if self.area_delta:
+                        pd.DataFrame(self.area_delta.to_rows(), columns=['区分', 'URL', '店舗名']).to_excel(
+                            writer, sheet_name='差分', index=False
+                        )
+                    
                     # 列幅調整
                     for sheet_name in writer.sheets:
                         worksheet = writer.sheets[sheet_name]
@@ -1093,6 +1887,9 @@ class ImprovedScraperEngine:
                         
                         if not df_stats.empty:
                             df_stats.to_excel(writer, sheet_name='処理統計', index=False)
+                        
+                        if self.area_delta:
+                            pd.DataFrame(self.area_delta.to_rows()).to_excel(writer, sheet_name='差分', index=False)
                     
                     self.logger.info(f"基本保存成功: {full_path}")
                     
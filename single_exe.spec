@@ -45,6 +45,9 @@ a = Analysis(
         'selenium.webdriver.chrome.service',
         'selenium.common.exceptions',
         'requests',
+        'lxml',
+        'lxml.html',
+        'aiohttp',
         'urllib3',
         'certifi',
         'tkinter',
@@ -0,0 +1,107 @@
+"""
+店舗詳細キャッシュ
+実行をまたいで店舗詳細を保存し、有効期限内の店舗は再取得しない
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+
+# キャッシュ対象の項目（取得日時は取得した時点のものを保持）
+CACHED_FIELDS = ['店舗名', '電話番号', '郵便番号', '住所', '取得日時']
+
+
+class StoreCache:
+    """SQLiteによる店舗詳細キャッシュクラス（キーは店舗のベースURL）"""
+
+    def __init__(self, db_path, ttl_hours=72.0, logger=None):
+        """
+        Args:
+            db_path (str): SQLiteファイルのパス
+            ttl_hours (float): 有効期限（時間）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self.ttl_seconds = float(ttl_hours) * 3600
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # プールモードではワーカースレッドから参照されるため共有接続をロックで保護
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stores (
+                base_url TEXT PRIMARY KEY,
+                detail TEXT NOT NULL,
+                cached_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, base_url):
+        """
+        有効期限内の店舗詳細を取得
+
+        Returns:
+            dict: 店舗データ（URL以外の項目。無い・期限切れの場合はNone）
+        """
+        if not base_url:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT detail, cached_at FROM stores WHERE base_url = ?", (base_url,)
+            ).fetchone()
+
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+
+        try:
+            detail = json.loads(row[0])
+        except ValueError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return detail
+
+    def put(self, base_url, detail):
+        """店舗詳細を保存（取得失敗のデータは保存しない）"""
+        if not base_url or detail.get('店舗名') in ('取得失敗', '-', None):
+            return
+
+        payload = json.dumps({field: detail.get(field, '-') for field in CACHED_FIELDS}, ensure_ascii=False)
+        try:
+            with self._lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO stores (base_url, detail, cached_at) VALUES (?, ?, ?)",
+                    (base_url, payload, time.time())
+                )
+                self.conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"店舗キャッシュ保存エラー: {e}")
+
+    def purge_expired(self):
+        """期限切れの店舗を削除"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM stores WHERE cached_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,262 @@
+"""
+店舗URL判定
+一覧ページの全リンクに対して呼ばれるため、パターンは1つの正規表現にまとめて事前コンパイル
+"""
+
+import re
+from urllib.parse import urlparse
+
+STORE_HOST = 'r.gnavi.co.jp'
+SITE_BASE_URL = f'https://{STORE_HOST}'
+
+# 都道府県トップ（/tokyo など）は店舗ではない
+PREFECTURE_SLUGS = (
+    'hokkaido|aomori|iwate|miyagi|akita|yamagata|fukushima|ibaraki|tochigi|gunma|saitama|chiba|tokyo|'
+    'kanagawa|niigata|toyama|ishikawa|fukui|yamanashi|nagano|gifu|shizuoka|aichi|mie|shiga|kyoto|osaka|'
+    'hyogo|nara|wakayama|tottori|shimane|okayama|hiroshima|yamaguchi|tokushima|kagawa|ehime|kochi|fukuoka|'
+    'saga|nagasaki|kumamoto|oita|miyazaki|kagoshima|okinawa'
+)
+# 配下にページを持つ店舗以外のディレクトリ（/area/xxx など）
+RESERVED_DIRECTORIES = 'area|city|campaign|lottery|guide|help|special|feature|category|genre|api|static|css|js|img'
+# 店舗IDとして扱わない接頭辞（/search, /kanjirank など）
+RESERVED_PREFIXES = 'kanjirank|mycoupon|search|apps'
+# 店舗配下のページ
+STORE_SUBPAGES = 'menu|course|map|coupon|photo|plan'
+
+# 末尾の / を除いたパスに対して判定
+STORE_PATH_PATTERN = re.compile(
+    rf'^/(?!(?:{RESERVED_PREFIXES}))'
+    rf'(?!(?:{PREFECTURE_SLUGS})$)'
+    rf'(?!(?:{RESERVED_DIRECTORIES})/)'
+    rf'[a-z0-9]{{3,20}}(?:/(?:{STORE_SUBPAGES}))?$',
+    re.IGNORECASE
+)
+
+
+def store_host_of(base_url):
+    """サイトのベースURLから店舗ページのホスト名を取得（https://r.gnavi.co.jp → r.gnavi.co.jp）"""
+    return urlparse(base_url).netloc.lower() or STORE_HOST
+
+
+def is_store_url(url, store_host=STORE_HOST):
+    """
+    ぐるなびの店舗ページ（トップ・メニュー・地図など）のURLか判定
+
+    Args:
+        store_host (str): 店舗ページのホスト名（模擬サーバーではポート番号を含む）
+    """
+    if not url or not isinstance(url, str):
+        return False
+
+    # ホスト名を含まないリンクはURL解析せずに除外
+    if store_host not in url.lower():
+        return False
+
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return False
+
+    if parsed.netloc.lower() != store_host:
+        return False
+
+    return STORE_PATH_PATTERN.match(parsed.path.rstrip('/')) is not None
+
+
+def filter_store_urls(hrefs, url_filter=is_store_url):
+    """
+    リンク一覧から店舗URLを抽出
+
+    Args:
+        hrefs (iterable): リンクのURL
+        url_filter (callable): 店舗URL判定（省略時は is_store_url）
+
+    Returns:
+        list: クエリと末尾の / を除いた店舗URL（重複除去、出現順を維持）
+    """
+    store_urls = []
+    seen = set()
+    for href in hrefs:
+        if not url_filter(href):
+            continue
+        normalized_url = href.split('?')[0].rstrip('/')
+        if normalized_url not in seen:
+            seen.add(normalized_url)
+            store_urls.append(normalized_url)
+    return store_urls
+
+
+def _legacy_is_valid_store_url(url):
+    """ImprovedScraperEngine.is_valid_store_url の旧実装（同値性チェック用）"""
+    if not url or not isinstance(url, str):
+        return False
+
+    try:
+        parsed = urlparse(url.strip())
+
+        if parsed.netloc.lower() != 'r.gnavi.co.jp':
+            return False
+
+        path = parsed.path.rstrip('/')
+
+        invalid_patterns = [
+            r'/rs/?$', r'/area/', r'/city/', r'/campaign/', r'/lottery/', r'/kanjirank', r'/mycoupon',
+            r'/guide/', r'/help/', r'/search', r'/special/', r'/feature/', r'/category/', r'/genre/',
+            r'/apps', r'/api/', r'/static/', r'/css/', r'/js/', r'/img/',
+            rf'^/({PREFECTURE_SLUGS})/?$',
+        ]
+
+        for pattern in invalid_patterns:
+            if re.search(pattern, path, re.IGNORECASE):
+                return False
+
+        valid_patterns = [
+            r'^/[a-zA-Z0-9]{3,20}/?$',
+            r'^/[a-zA-Z0-9]{3,20}/(menu|course|map|coupon|photo|plan)/?$'
+        ]
+
+        for pattern in valid_patterns:
+            if re.match(pattern, path, re.IGNORECASE):
+                return True
+
+        return False
+
+    except Exception:
+        return False
+
+
+# 一覧ページに実際に現れるリンクの形
+SAMPLE_HREFS = [
+    'https://r.gnavi.co.jp/g123456/',
+    'https://r.gnavi.co.jp/a7b8c9d0/menu/',
+    'https://r.gnavi.co.jp/a7b8c9d0/course/',
+    'https://r.gnavi.co.jp/a7b8c9d0/map/',
+    'https://r.gnavi.co.jp/a7b8c9d0/coupon/',
+    'https://r.gnavi.co.jp/a7b8c9d0/photo/',
+    'https://r.gnavi.co.jp/a7b8c9d0/plan/',
+    'https://r.gnavi.co.jp/a7b8c9d0/plan/123/',
+    'https://r.gnavi.co.jp/a7b8c9d0/menu2/',
+    'https://r.gnavi.co.jp/e123456/?sc_lid=list_pr',
+    'https://r.gnavi.co.jp/e123456/#photo',
+    'https://R.GNAVI.CO.JP/ABC123/',
+    'http://r.gnavi.co.jp/k123/',
+    'https://r.gnavi.co.jp/area/jp/rs/',
+    'https://r.gnavi.co.jp/area/aream2115/rs/?p=2',
+    'https://r.gnavi.co.jp/area/menu/',
+    'https://r.gnavi.co.jp/city/13101/rs/',
+    'https://r.gnavi.co.jp/city/menu',
+    'https://r.gnavi.co.jp/img/map/',
+    'https://r.gnavi.co.jp/css/photo',
+    'https://r.gnavi.co.jp/campaign/rsv/',
+    'https://r.gnavi.co.jp/lottery/',
+    'https://r.gnavi.co.jp/kanjirank/',
+    'https://r.gnavi.co.jp/kanjirank2020/',
+    'https://r.gnavi.co.jp/mycoupon/',
+    'https://r.gnavi.co.jp/searchresult/',
+    'https://r.gnavi.co.jp/search/',
+    'https://r.gnavi.co.jp/apps/',
+    'https://r.gnavi.co.jp/appsabc/menu/',
+    'https://r.gnavi.co.jp/guide/',
+    'https://r.gnavi.co.jp/help/faq/',
+    'https://r.gnavi.co.jp/special/',
+    'https://r.gnavi.co.jp/feature/abc/',
+    'https://r.gnavi.co.jp/category/',
+    'https://r.gnavi.co.jp/genre/',
+    'https://r.gnavi.co.jp/api/',
+    'https://r.gnavi.co.jp/static/',
+    'https://r.gnavi.co.jp/tokyo/',
+    'https://r.gnavi.co.jp/Tokyo',
+    'https://r.gnavi.co.jp/tokyo/menu/',
+    'https://r.gnavi.co.jp/tokyoabc/',
+    'https://r.gnavi.co.jp/okinawa/rs/',
+    'https://r.gnavi.co.jp/rs/',
+    'https://r.gnavi.co.jp/ab/',
+    'https://r.gnavi.co.jp/abcdefghijklmnopqrstu/',
+    'https://r.gnavi.co.jp/abc-def/',
+    'https://r.gnavi.co.jp/',
+    'https://r.gnavi.co.jp',
+    'https://r.gnavi.co.jp//abc123//',
+    'https://r.gnavi.co.jp:443/abc123/',
+    'https://user@r.gnavi.co.jp/abc123/',
+    'https://r.gnavi.co.jp/abc123;jsessionid=1',
+    'https://r.gnavi.co.jp.example.com/abc123/',
+    'https://gnavi.co.jp/abc123/',
+    'https://www.gnavi.co.jp/',
+    'https://mypage.gnavi.co.jp/',
+    'https://www.google.com/maps?q=r.gnavi.co.jp',
+    'https://twitter.com/share?url=https://r.gnavi.co.jp/abc123/',
+    '//r.gnavi.co.jp/abc123/',
+    'r.gnavi.co.jp/abc123/',
+    '  https://r.gnavi.co.jp/abc123/  ',
+    'javascript:void(0)',
+    'mailto:info@gnavi.co.jp',
+    'tel:03-1234-5678',
+    '#top',
+    '',
+    'https://[r.gnavi.co.jp/abc123/',
+]
+
+
+def check_equivalence(hrefs):
+    """
+    新旧の判定結果を比較
+
+    Returns:
+        list: 結果が異なったURL
+    """
+    return [href for href in hrefs if is_store_url(href) != _legacy_is_valid_store_url(href)]
+
+
+def benchmark(hrefs, repeat=20):
+    """
+    新旧の判定速度を比較
+
+    Returns:
+        dict: {'legacy_us': 旧実装の1件あたり時間(μs), 'compiled_us': 新実装の1件あたり時間(μs)}
+    """
+    import time
+
+    results = {}
+    for name, fn in (('legacy_us', _legacy_is_valid_store_url), ('compiled_us', is_store_url)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for href in hrefs:
+                fn(href)
+        results[name] = (time.perf_counter() - started) / (repeat * len(hrefs)) * 1e6
+    return results
+
+
+# 同値性チェックとベンチマーク
+if __name__ == "__main__":
+    import sys
+    import random
+
+    corpus = list(SAMPLE_HREFS)
+
+    # 保存した一覧ページのHTMLを指定すると、そのリンクも対象にする
+    for html_path in sys.argv[1:]:
+        with open(html_path, 'r', encoding='utf-8', errors='replace') as f:
+            corpus.extend(re.findall(r'href="([^"]*)"', f.read()))
+
+    # 大文字小文字・末尾・クエリを変えた変種
+    rng = random.Random(0)
+    variants = []
+    for href in corpus:
+        variants.append(href.upper())
+        variants.append(href.rstrip('/') + '//')
+        variants.append(href + '?p=' + str(rng.randint(1, 50)))
+        variants.append(href.replace('https://', 'HTTPS://'))
+    corpus.extend(variants)
+
+    mismatches = check_equivalence(corpus)
+    print(f"同値性チェック: {len(corpus)}件中 不一致 {len(mismatches)}件")
+    for href in mismatches:
+        print(f"  不一致: {href!r} (新: {is_store_url(href)}, 旧: {_legacy_is_valid_store_url(href)})")
+
+    # 一覧1ページ相当（店舗リンク少数 + 多数のナビゲーションリンク）を想定
+    page = [rng.choice(corpus) for _ in range(2000)]
+    result = benchmark(page)
+    print(
+        f"1リンクあたり: 旧 {result['legacy_us']:.2f}μs → 新 {result['compiled_us']:.2f}μs "
+        f"({result['legacy_us'] / result['compiled_us']:.1f}倍)"
+    )
@@ -0,0 +1,146 @@
+"""
+上限付きURL重複チェック
+直近のURLは挿入順のLRUで正確に保持し、あふれたURLはBloomフィルタに移してメモリを一定に保つ
+"""
+
+import math
+import hashlib
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """ビット配列によるBloomフィルタ（偽陰性なし・偽陽性率は容量で決まる）"""
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        """
+        Args:
+            capacity (int): 想定する登録件数
+            error_rate (float): 想定件数登録時の偽陽性率
+        """
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class BoundedUrlSet:
+    """
+    メモリ上限付きのURL集合
+
+    直近 max_exact 件は正確に保持し、それより古いURLはBloomフィルタで判定する。
+    一度登録したURLを見落とすことはない（重複は必ず除外される）。
+    Bloomフィルタの偽陽性により、新しいURLを既出と判定する確率は error_rate 程度。
+    """
+
+    def __init__(self, max_exact=20000, bloom_capacity=1000000, error_rate=0.001):
+        self.max_exact = max(1, int(max_exact))
+        self._recent = OrderedDict()
+        self._evicted = BloomFilter(bloom_capacity, error_rate)
+
+    def add(self, url):
+        """
+        URLを登録
+
+        Returns:
+            bool: 新規のURLならTrue（既出ならFalse）
+        """
+        if url in self._recent:
+            self._recent.move_to_end(url)
+            return False
+        if self._evicted.count and url in self._evicted:
+            return False
+
+        self._recent[url] = None
+        if len(self._recent) > self.max_exact:
+            oldest, _ = self._recent.popitem(last=False)
+            self._evicted.add(oldest)
+        return True
+
+    def __contains__(self, url):
+        if url in self._recent:
+            return True
+        return self._evicted.count > 0 and url in self._evicted
+
+    def __len__(self):
+        """登録済みの件数（Bloomフィルタに移した分を含む）"""
+        return len(self._recent) + self._evicted.count
+
+    def clear(self):
+        self._recent.clear()
+        self._evicted.clear()
+
+    @property
+    def exact_count(self):
+        return len(self._recent)
+
+    @property
+    def evicted_count(self):
+        return self._evicted.count
+
+
+# 10万URLの合成クロールでの検証
+if __name__ == "__main__":
+    import time
+    import random
+    import tracemalloc
+
+    rng = random.Random(0)
+    total = 100000
+    # ぐるなびの店舗IDに近い形式（英小文字1文字 + 6桁 など）
+    store_ids = set()
+    while len(store_ids) < total:
+        store_ids.add(rng.choice('abcdefghijk') + str(rng.randint(100000, 9999999)))
+    base_urls = [f"https://r.gnavi.co.jp/{store_id}" for store_id in sorted(store_ids)]
+    rng.shuffle(base_urls)
+
+    # 一覧ページは30件ずつ、各ページに過去ページの店舗（PR枠・再掲）を混ぜる
+    crawl = []
+    for start in range(0, total, 30):
+        page = base_urls[start:start + 30]
+        if start:
+            page += [base_urls[rng.randrange(0, start)] for _ in range(5)]
+        rng.shuffle(page)
+        crawl.extend(page)
+
+    tracemalloc.start()
+    seen = BoundedUrlSet(max_exact=20000, bloom_capacity=200000)
+    started = time.perf_counter()
+    accepted = [url for url in crawl if seen.add(url)]
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    duplicates = len(accepted) - len(set(accepted))
+    missed = total - len(set(accepted))
+    print(f"合成クロール: {len(crawl):,}リンク / ユニーク {total:,}件")
+    print(f"  重複通過: {duplicates}件（0件であること）")
+    print(f"  新規の誤除外（Bloom偽陽性）: {missed}件 ({missed / total:.3%})")
+    print(f"  正確保持 {seen.exact_count:,}件 + Bloom {seen.evicted_count:,}件 ({seen._evicted.nbytes / 1024:.0f}KB)")
+    print(f"  ピークメモリ: {peak / 1024 / 1024:.1f}MB / 処理時間: {elapsed:.2f}秒")
+
+    assert duplicates == 0, "重複URLが通過しました"
+    assert missed / total < 0.01, "偽陽性率が想定を超えています"
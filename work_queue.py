@@ -0,0 +1,683 @@
+"""
+分散取得用の作業キュー
+コーディネーターが店舗一覧をSQLiteのキューに登録し、複数のワーカー（別プロセス・別マシン）が
+店舗URLを期限付きで借りて詳細を取得する。期限切れの店舗は他のワーカーが取り直す。
+
+別マシンから共有する場合:
+    キューのファイルはネットワークファイルシステム上に置くため、WALは使わずロールバックジャーナルで書き込む
+    （WALは共有メモリを使うため同一マシン内でしか動かない）。排他はファイルシステムのロックに依存する。
+    貸出期限は各ワーカーの時刻で書き込んで比較するため、全マシンの時刻をNTPなどで同期しておくこと
+    （ずれが貸出期限に近いと、処理中の店舗を他のワーカーが取り直す）。
+
+使い方:
+    python work_queue.py enqueue queue.db 東京都 [--city 渋谷] [--max-count 500 | --unlimited]
+    python work_queue.py work queue.db [--processes 3] [--worker-id host-a]
+    python work_queue.py status queue.db
+    python work_queue.py export queue.db output/tokyo.xlsx
+    python work_queue.py selftest [--processes 2]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+from result_journal import RESULT_COLUMNS, write_results_excel
+from response_guard import RESPONSE_NOT_FOUND
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class WorkQueue:
+    """SQLiteによる店舗URLの作業キュークラス（プロセスごとに1インスタンス）"""
+
+    def __init__(self, db_path, lease_seconds=300.0, max_attempts=3, logger=None):
+        """
+        Args:
+            db_path (str): SQLiteファイルのパス（全ワーカーから参照できる場所）
+            lease_seconds (float): 借りた店舗の有効期限（秒）。過ぎると他のワーカーが取り直す
+            max_attempts (int): 1店舗を借りる回数の上限（超えたら取得失敗とする）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = max(1, int(max_attempts))
+
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # トランザクションは BEGIN IMMEDIATE で明示的に開始（他プロセスとの取り合いを防ぐ）
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        # 別マシンとネットワークファイルシステムで共有するためWALは使わない
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                url TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                name TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                detail TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, position)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _transaction(self, func):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def set_meta(self, key, value):
+        self._transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value, ensure_ascii=False))
+        ))
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def enqueue(self, stores):
+        """
+        店舗を登録（登録済みのURLは無視するため、コーディネーターを再実行しても重複しない）
+
+        Args:
+            stores (list): get_store_list() の店舗（'url', 'name'）
+
+        Returns:
+            int: 新たに登録した件数
+        """
+        def insert(conn):
+            position = conn.execute("SELECT COALESCE(MAX(position), 0) FROM tasks").fetchone()[0]
+            added = 0
+            now = time.time()
+            for store in stores:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO tasks (url, position, name, updated_at) VALUES (?, ?, ?, ?)",
+                    (store['url'], position + 1, store.get('name'), now)
+                )
+                if cursor.rowcount:
+                    position += 1
+                    added += 1
+            return added
+
+        return self._transaction(insert)
+
+    def lease(self, worker_id, limit=1):
+        """
+        未取得の店舗を借りる（期限切れの店舗も対象）
+
+        Returns:
+            list: 店舗（'url', 'name', 'attempts'）。無い場合は空
+        """
+        def take(conn):
+            now = time.time()
+            # 上限回数まで借りられても完了しなかった店舗（ワーカーが毎回落ちる等）は失敗にする
+            conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (STATUS_FAILED, 'lease expired', now, STATUS_LEASED, now, self.max_attempts)
+            )
+            rows = conn.execute(
+                "SELECT url, name, attempts FROM tasks "
+                "WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY position LIMIT ?",
+                (STATUS_PENDING, STATUS_LEASED, now, limit)
+            ).fetchall()
+            for url, _, _ in rows:
+                conn.execute(
+                    "UPDATE tasks SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE url = ?",
+                    (STATUS_LEASED, worker_id, now + self.lease_seconds, now, url)
+                )
+            return [{'url': url, 'name': name, 'attempts': attempts + 1} for url, name, attempts in rows]
+
+        return self._transaction(take)
+
+    def renew(self, worker_id):
+        """借りている店舗の期限を延長（処理中であることを示す）"""
+        now = time.time()
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE status = ? AND worker = ?",
+            (now + self.lease_seconds, now, STATUS_LEASED, worker_id)
+        ).rowcount)
+
+    def complete(self, url, worker_id, detail):
+        """
+        取得結果を保存（同じ店舗を期限切れで2つのワーカーが取得しても最初の結果だけを残す）
+
+        Returns:
+            bool: 今回の結果を保存した場合True
+        """
+        payload = json.dumps({column: detail.get(column, '-') for column in RESULT_COLUMNS}, ensure_ascii=False)
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE tasks SET status = ?, worker = ?, detail = ?, lease_until = NULL, error = NULL, updated_at = ? "
+            "WHERE url = ? AND status NOT IN (?, ?)",
+            (STATUS_DONE, worker_id, payload, time.time(), url, STATUS_DONE, STATUS_FAILED)
+        ).rowcount == 1)
+
+    def fail(self, url, worker_id, error, final=False):
+        """
+        取得できなかった店舗を戻す（上限回数に達したら失敗として確定）
+
+        Args:
+            final (bool): 取り直しても結果が変わらない場合（ページが無いなど）は回数に関わらず失敗として確定
+
+        Returns:
+            str: 戻した後の状態（借りていない店舗の場合はNone）
+        """
+        def update(conn):
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE url = ? AND status = ? AND worker = ?",
+                (url, STATUS_LEASED, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            status = STATUS_FAILED if final or row[0] >= self.max_attempts else STATUS_PENDING
+            conn.execute(
+                "UPDATE tasks SET status = ?, lease_until = NULL, error = ?, updated_at = ? WHERE url = ?",
+                (status, str(error), time.time(), url)
+            )
+            return status
+
+        return self._transaction(update)
+
+    def release(self, worker_id):
+        """ワーカー停止時に借りている店舗を返す（試行回数は戻す）"""
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE tasks SET status = ?, worker = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0), "
+            "updated_at = ? WHERE status = ? AND worker = ?",
+            (STATUS_PENDING, time.time(), STATUS_LEASED, worker_id)
+        ).rowcount)
+
+    def counts(self):
+        """状態ごとの件数"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        counts = {status: 0 for status in (STATUS_PENDING, STATUS_LEASED, STATUS_DONE, STATUS_FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    def worker_counts(self):
+        """ワーカーごとの完了件数"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT worker, COUNT(*) FROM tasks WHERE status = ? GROUP BY worker ORDER BY worker", (STATUS_DONE,)
+            ).fetchall()
+        return dict(rows)
+
+    def is_drained(self):
+        """一覧の登録が終わり、全店舗が完了・失敗した状態か"""
+        counts = self.counts()
+        return self.get_meta('enqueue_complete', False) and counts[STATUS_PENDING] == 0 and counts[STATUS_LEASED] == 0
+
+    def attempts(self):
+        """店舗ごとの状態と借りた回数（{URL: (状態, 回数)}）"""
+        with self._lock:
+            rows = self.conn.execute("SELECT url, status, attempts FROM tasks").fetchall()
+        return {url: (status, attempts) for url, status, attempts in rows}
+
+    def results(self):
+        """
+        登録順の取得結果（失敗した店舗は取得失敗の行）
+
+        Returns:
+            list: 出力カラムの辞書のリスト
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT url, status, detail FROM tasks ORDER BY position").fetchall()
+
+        results = []
+        for url, status, detail in rows:
+            if status == STATUS_DONE and detail:
+                results.append(json.loads(detail))
+            else:
+                results.append({
+                    'URL': url, '店舗名': '取得失敗', '電話番号': '-', '郵便番号': '-', '住所': '-', '取得日時': '-'
+                })
+        return results
+
+    def close(self):
+        with self._lock:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
+
+
+class QueueCoordinator:
+    """店舗一覧を取得してキューに登録するクラス"""
+
+    def __init__(self, engine, work_queue, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.engine = engine
+        self.queue = work_queue
+
+    def enqueue_search(self, prefecture, city, max_count, unlimited):
+        """
+        店舗一覧を取得しながらキューに登録（ワーカーは一覧の取得中から詳細取得を始められる）
+
+        Returns:
+            int: 新たに登録した件数
+        """
+        self.queue.set_meta('search_params', {
+            'prefecture': prefecture, 'city': city, 'max_count': max_count, 'unlimited': unlimited
+        })
+        self.queue.set_meta('enqueue_complete', False)
+
+        added = 0
+        batch = []
+
+        def flush():
+            nonlocal added
+            if batch:
+                added += self.queue.enqueue(batch)
+                batch.clear()
+
+        def on_store(store):
+            batch.append(store)
+            if len(batch) >= 30:
+                flush()
+
+        store_list = self.engine.get_store_list(prefecture, city, max_count, unlimited, on_store=on_store)
+        flush()
+        # ブラウザでの一覧取得は通知されない場合があるため、取得結果もまとめて登録（登録済みは無視）
+        added += self.queue.enqueue(store_list)
+        if not self.engine.stop_requested:
+            self.queue.set_meta('enqueue_complete', True)
+
+        self.logger.info(f"キュー登録完了: {added}件 (一覧 {len(store_list)}件)")
+        return added
+
+
+class QueueWorker:
+    """キューから店舗を借りて詳細を取得するクラス"""
+
+    def __init__(self, engine, work_queue, worker_id=None, batch_size=5, idle_timeout=60.0, poll_interval=2.0, logger=None):
+        """
+        Args:
+            engine (ImprovedScraperEngine): 詳細取得に使うエンジン
+            work_queue (WorkQueue): 作業キュー
+            worker_id (str): ワーカー名（省略時は ホスト名-プロセスID）
+            batch_size (int): 1回に借りる店舗数
+            idle_timeout (float): 一覧の登録完了前にキューが空の状態で待つ上限（秒）
+            poll_interval (float): キューが空のときの確認間隔（秒）
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.engine = engine
+        self.queue = work_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = max(1, int(batch_size))
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.stop_requested = False
+        self.processed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self._heartbeat_stop = threading.Event()
+
+    def run(self):
+        """
+        キューが空になるまで詳細取得
+
+        Returns:
+            int: このワーカーが保存した件数
+        """
+        self.logger.info(f"ワーカー開始: {self.worker_id}")
+        idle_since = None
+        # 待機（レート制限の待ち時間は貸出期限より長くなりうる）中も借りている店舗の期限を延長し続ける
+        self._heartbeat_stop.clear()
+        heartbeat = threading.Thread(target=self._heartbeat, name=f"heartbeat-{self.worker_id}", daemon=True)
+        heartbeat.start()
+        try:
+            while not self.stop_requested:
+                leased = self.queue.lease(self.worker_id, self.batch_size)
+                if not leased:
+                    if self.queue.is_drained():
+                        break
+                    idle_since = idle_since or time.time()
+                    if time.time() - idle_since > self.idle_timeout:
+                        self.logger.info(f"キューが{self.idle_timeout:.0f}秒空のため終了します")
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                idle_since = None
+                for store in leased:
+                    if self.stop_requested:
+                        break
+                    self._process(store)
+        finally:
+            self._heartbeat_stop.set()
+            heartbeat.join()
+            released = self.queue.release(self.worker_id)
+            if released:
+                self.logger.info(f"未処理の{released}件をキューに戻しました")
+
+        self.logger.info(
+            f"ワーカー終了: {self.worker_id} (保存 {self.processed}件, 取得失敗 {self.failed}件, "
+            f"他ワーカーと重複 {self.duplicates}件)"
+        )
+        return self.processed
+
+    def stop(self):
+        self.stop_requested = True
+        self.engine.request_stop()
+
+    def _heartbeat(self):
+        """貸出期限の1/3ごとに借りている店舗の期限を延長"""
+        interval = self.queue.lease_seconds / 3
+        while not self._heartbeat_stop.wait(interval):
+            try:
+                self.queue.renew(self.worker_id)
+            except sqlite3.Error as e:
+                self.logger.warning(f"貸出期限の延長エラー: {e}")
+
+    def _process(self, store):
+        url = store['url']
+        # 取り直した店舗は前回の再取得回数を持ち越さない
+        self.engine.response_guard.forget(url)
+        error = None
+        try:
+            detail = self.engine.get_store_detail(url)
+        except Exception as e:
+            detail, error = None, e
+
+        # get_store_detail は取得できなかった店舗を例外ではなく「取得失敗」の行で返す
+        if detail is None or detail.get('店舗名') == '取得失敗':
+            outcome = self.engine.response_guard.terminal_outcome(url)
+            status = self.queue.fail(
+                url, self.worker_id, error or outcome or '取得失敗', final=outcome == RESPONSE_NOT_FOUND
+            )
+            self.failed += 1
+            self.logger.warning(f"店舗詳細取得失敗: {url} - {error or outcome or '取得失敗'} ({status})")
+            return
+
+        if self.queue.complete(url, self.worker_id, detail):
+            self.processed += 1
+        else:
+            self.duplicates += 1
+
+
+def _create_engine(config):
+    """設定ファイルからエンジンを作成（ブラウザはHTTP取得できない場合のみ起動）"""
+    from prefecture_mapper import PrefectureMapper
+    from chrome_driver_manager import ChromeDriverManager
+    from scraper_engine import ImprovedScraperEngine
+
+    return ImprovedScraperEngine(ChromeDriverManager(), PrefectureMapper(), config)
+
+
+def _worker_process(db_path, config, worker_id, options):
+    """ワーカープロセスの本体"""
+    work_queue = WorkQueue(db_path, options['lease_seconds'], options['max_attempts'])
+    engine = _create_engine(config)
+    worker = QueueWorker(
+        engine, work_queue, worker_id,
+        batch_size=options['batch_size'],
+        idle_timeout=options['idle_timeout']
+    )
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.cleanup()
+        work_queue.close()
+
+
+def _start_workers(db_path, config, base_id, count, options):
+    """このマシンでワーカープロセスを起動"""
+    import multiprocessing
+
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(db_path, config, f"{base_id}-{i}", options),
+            name=f"worker-{i}"
+        )
+        for i in range(1, count + 1)
+    ]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def _lease_and_hang(db_path, worker_id, count, lease_seconds, leased_urls):
+    """店舗を借りたまま応答しなくなるワーカー（自己診断で強制終了する）"""
+    work_queue = WorkQueue(db_path, lease_seconds)
+    leased_urls.put([store['url'] for store in work_queue.lease(worker_id, count)])
+    time.sleep(3600)
+
+
+def run_selftest(processes=2, store_count=30, logger=None):
+    """
+    模擬サーバーに対して複数のワーカープロセスでキューを処理し、排他と再取得を確認
+
+    - 店舗を借りたまま強制終了（SIGKILL）したワーカーの店舗は、期限切れ後に他のワーカーが1回だけ取得する
+    - 一時的に500を返す店舗は fail() でキューに戻り、別の回で取得できる
+    - 500を返し続ける店舗は max_attempts 回で失敗として確定する
+    - それ以外の店舗は1回だけ借りられ、サーバーへの取得も1回だけ（同じ店舗を同時に借りない）
+    - 500の後の待機は貸出期限より長いが、待機中も借りている店舗の期限は延長され続ける
+
+    Returns:
+        dict: 集計（確認に失敗した場合は AssertionError）
+    """
+    import shutil
+    import tempfile
+    import multiprocessing
+    from app_config import default_config
+    from fake_gurunavi_server import FakeGurunaviServer, RatePolicy
+
+    logger = logger or logging.getLogger(__name__)
+    work_dir = tempfile.mkdtemp(prefix='gurunavi_queue_selftest_')
+    max_attempts = 3
+    server = FakeGurunaviServer(
+        RatePolicy(rate_limit_rps=1000, captcha_rps=2000, block_rps=3000),
+        stores_per_area=store_count, latency=(0.01, 0.03)
+    )
+    store_ids = server._store_ids('jp')
+    # 先頭の店舗は強制終了するワーカーが借りる
+    killed_count = 2
+    flaky = {store_id: 1 for store_id in store_ids[3:6]}
+    broken = store_ids[7]
+    server.flaky_stores = dict(flaky, **{broken: max_attempts * 10})
+    server.start()
+
+    config = default_config()
+    config.update({
+        'site_base_url': server.base_url,
+        'cooltime_min': 0.01, 'cooltime_max': 0.02,
+        'store_cache_enabled': False,
+        'page_archive_enabled': False,
+        # 500はエンジン内で再取得せず、キューに戻して取り直す
+        'max_blocked_retries': 0,
+        # 500の後の待機は貸出期限より長くし、待機中も同じバッチの店舗を借り続けられるか確認する
+        'server_error_delay': 4.0,
+        'max_backoff_delay': 4.0
+    })
+    # 貸出期限は短くし、処理中の延長が止まれば他のワーカーと重複して検出できるようにする
+    options = {'lease_seconds': 3.0, 'max_attempts': max_attempts, 'batch_size': 2, 'idle_timeout': 10.0}
+    db_path = str(Path(work_dir) / 'queue.db')
+    work_queue = WorkQueue(db_path, options['lease_seconds'], max_attempts, logger)
+    try:
+        engine = _create_engine(config)
+        try:
+            QueueCoordinator(engine, work_queue, logger).enqueue_search('全国', '', store_count, False)
+        finally:
+            engine.cleanup()
+
+        # 店舗を借りたワーカーを、取得前に強制終了する
+        leased_urls = multiprocessing.Queue()
+        hung = multiprocessing.Process(
+            target=_lease_and_hang, args=(db_path, 'selftest-killed', killed_count, 1.0, leased_urls), name='killed'
+        )
+        hung.start()
+        killed = {url.rstrip('/').rsplit('/', 1)[-1] for url in leased_urls.get(timeout=60)}
+        hung.kill()
+        hung.join()
+        assert killed == set(store_ids[:killed_count]), f"強制終了するワーカーが借りた店舗: {killed}"
+
+        workers = _start_workers(db_path, config, 'selftest', processes, options)
+        for process in workers:
+            process.join(timeout=300)
+            assert process.exitcode == 0, f"ワーカー異常終了: {process.name} ({process.exitcode})"
+
+        attempts = {url.rstrip('/').rsplit('/', 1)[-1]: value for url, value in work_queue.attempts().items()}
+        worker_counts = work_queue.worker_counts()
+        summary = {
+            'counts': work_queue.counts(),
+            'workers': worker_counts,
+            'killed': {store_id: attempts[store_id] for store_id in killed},
+            'flaky': {store_id: attempts[store_id] for store_id in flaky},
+            'broken': attempts[broken],
+            'server_hits': sum(server.store_hits.values())
+        }
+
+        assert work_queue.is_drained(), f"未処理の店舗があります: {summary['counts']}"
+        assert len(worker_counts) == processes, f"全ワーカーが処理していません: {worker_counts}"
+        assert 'selftest-killed' not in worker_counts, f"強制終了したワーカーの完了があります: {worker_counts}"
+        for store_id, (status, count) in attempts.items():
+            fetched = count
+            if store_id in killed:
+                # 強制終了したワーカーの貸出1回 + 期限切れ後の取り直し1回（取得は取り直しの1回だけ）
+                assert (status, count) == (STATUS_DONE, 2), f"{store_id}: {status} {count}回"
+                fetched = 1
+            elif store_id == broken:
+                assert (status, count) == (STATUS_FAILED, max_attempts), f"{store_id}: {status} {count}回"
+            elif store_id in flaky:
+                assert (status, count) == (STATUS_DONE, flaky[store_id] + 1), f"{store_id}: {status} {count}回"
+            else:
+                assert (status, count) == (STATUS_DONE, 1), f"{store_id}: {status} {count}回 (重複して借りられた)"
+            assert server.store_hits[store_id] == fetched, f"{store_id}: 取得{server.store_hits[store_id]}回 / 貸出{count}回"
+        assert sum(worker_counts.values()) == summary['counts'][STATUS_DONE]
+        return summary
+    finally:
+        work_queue.close()
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    from app_config import load_config
+
+    parser = argparse.ArgumentParser(description="ぐるなび店舗情報取得（分散作業キュー）")
+    parser.add_argument('--config', default='config.json', help='設定ファイル（GUIと共通）')
+    parser.add_argument('--lease-seconds', type=float, default=300.0, help='借りた店舗の有効期限（秒）')
+    parser.add_argument('--max-attempts', type=int, default=3, help='1店舗の取得を試みる回数')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = commands.add_parser('enqueue', help='店舗一覧を取得してキューに登録')
+    enqueue_parser.add_argument('db')
+    enqueue_parser.add_argument('prefecture')
+    enqueue_parser.add_argument('--city', default='')
+    enqueue_parser.add_argument('--max-count', type=int, default=100)
+    enqueue_parser.add_argument('--unlimited', action='store_true')
+
+    work_parser = commands.add_parser('work', help='キューの店舗の詳細を取得')
+    work_parser.add_argument('db')
+    work_parser.add_argument('--processes', type=int, default=1, help='このマシンで起動するワーカー数')
+    work_parser.add_argument('--worker-id', help='ワーカー名（省略時は ホスト名-プロセスID）')
+    work_parser.add_argument('--batch-size', type=int, default=5)
+    work_parser.add_argument('--idle-timeout', type=float, default=60.0)
+
+    status_parser = commands.add_parser('status', help='キューの状態を表示')
+    status_parser.add_argument('db')
+
+    export_parser = commands.add_parser('export', help='取得結果をExcelに保存')
+    export_parser.add_argument('db')
+    export_parser.add_argument('output', help='出力ファイル（.xlsx）')
+
+    selftest_parser = commands.add_parser('selftest', help='模擬サーバーで複数プロセスの排他と再取得を確認')
+    selftest_parser.add_argument('--processes', type=int, default=2)
+    selftest_parser.add_argument('--stores', type=int, default=30)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    if args.command == 'selftest':
+        logging.getLogger().setLevel(logging.WARNING)
+        summary = run_selftest(args.processes, args.stores, logger)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        print("OK: 重複した貸出なし / 強制終了したワーカーの店舗は期限切れ後に1回だけ取得 / "
+              "一時的な失敗は再取得 / 失敗し続ける店舗は上限回数で確定")
+        return 0
+
+    if args.command == 'work':
+        config = load_config(args.config, logger)
+        options = {
+            'lease_seconds': args.lease_seconds,
+            'max_attempts': args.max_attempts,
+            'batch_size': args.batch_size,
+            'idle_timeout': args.idle_timeout
+        }
+        if args.processes <= 1:
+            _worker_process(args.db, config, args.worker_id, options)
+        else:
+            processes = _start_workers(args.db, config, args.worker_id or socket.gethostname(), args.processes, options)
+            try:
+                for process in processes:
+                    process.join()
+            except KeyboardInterrupt:
+                for process in processes:
+                    process.join()
+        return 0
+
+    work_queue = WorkQueue(args.db, args.lease_seconds, args.max_attempts, logger)
+    try:
+        if args.command == 'enqueue':
+            engine = _create_engine(load_config(args.config, logger))
+            try:
+                QueueCoordinator(engine, work_queue, logger).enqueue_search(
+                    args.prefecture, args.city, args.max_count, args.unlimited
+                )
+            finally:
+                engine.cleanup()
+
+        elif args.command == 'status':
+            print(json.dumps({
+                'search_params': work_queue.get_meta('search_params'),
+                'enqueue_complete': work_queue.get_meta('enqueue_complete', False),
+                'counts': work_queue.counts(),
+                'workers': work_queue.worker_counts()
+            }, ensure_ascii=False, indent=2))
+
+        elif args.command == 'export':
+            output = Path(args.output)
+            if output.suffix != '.xlsx':
+                output = output.with_name(output.name + '.xlsx')
+            rows = work_queue.results()
+            write_results_excel(rows, output)
+            logger.info(f"保存しました: {output} ({len(rows)}件)")
+            if not work_queue.is_drained():
+                logger.warning(f"未完了の店舗があります: {work_queue.counts()}")
+    finally:
+        work_queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())